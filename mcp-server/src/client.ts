@@ -2,7 +2,12 @@
  * HTTP client for communicating with the FastAPI backend.
  */
 
-import type { LatentQueryRequest, LatentQueryResponse, ModuleListResponse } from "./types.js";
+import type {
+  LatentQueryBatchResponse,
+  LatentQueryRequest,
+  LatentQueryResponse,
+  ModuleListResponse,
+} from "./types.js";
 
 const BACKEND_URL = process.env.AC_BACKEND_URL || "http://127.0.0.1:8420";
 
@@ -23,6 +28,24 @@ export async function queryLatentBackend(
   return (await response.json()) as LatentQueryResponse;
 }
 
+/** Send several queries in one request; responses come back in the same order. */
+export async function queryLatentBackendBatch(
+  queries: LatentQueryRequest[]
+): Promise<LatentQueryResponse[]> {
+  const response = await fetch(`${BACKEND_URL}/v1/latent/query/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ queries }),
+  });
+
+  if (!response.ok) {
+    const errorText = await response.text();
+    throw new Error(`Backend error ${response.status}: ${errorText}`);
+  }
+
+  return ((await response.json()) as LatentQueryBatchResponse).results;
+}
+
 export async function listModules(
   moduleType?: string
 ): Promise<ModuleListResponse> {
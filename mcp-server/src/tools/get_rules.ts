@@ -8,7 +8,7 @@
  */
 
 import type { LatentQueryResponse } from "../types.js";
-import { queryLatentBackend, listModules } from "../client.js";
+import { queryLatentBackendBatch } from "../client.js";
 
 /** Map user-friendly project types to search intents */
 const STACK_INTENTS: Record<string, string> = {
@@ -34,20 +34,21 @@ export async function handleGetRules(args: {
   const stackKey = args.project_type.toLowerCase().trim();
   const intent = STACK_INTENTS[stackKey] || `${stackKey} coding standards security best practices`;
 
-  // Fetch rules (coding standards, security, testing guidelines)
-  const rulesResponse: LatentQueryResponse = await queryLatentBackend({
-    intent,
-    tool_name: "get_rules",
-    top_k: 5,
-    module_type_filter: "rule",
-  });
-
-  // Fetch relevant skills (patterns, workflows)
-  const skillsResponse: LatentQueryResponse = await queryLatentBackend({
-    intent,
-    tool_name: "get_rules",
-    top_k: 3,
-  });
+  // Rules (coding standards, security, testing guidelines) and relevant
+  // skills (patterns, workflows) in one round trip; the intent is encoded once
+  const [rulesResponse, skillsResponse]: LatentQueryResponse[] = await queryLatentBackendBatch([
+    {
+      intent,
+      tool_name: "get_rules",
+      top_k: 5,
+      module_type_filter: "rule",
+    },
+    {
+      intent,
+      tool_name: "get_rules",
+      top_k: 3,
+    },
+  ]);
 
   // Build a condensed rules summary
   const sections: string[] = [];
@@ -38,6 +38,24 @@ export interface LatentQueryResponse {
   matched_modules: MatchedModule[];
 }
 
+export interface LatentQueryBatchRequest {
+  queries: LatentQueryRequest[];
+}
+
+export interface BatchMetrics {
+  queries: number;
+  distinct_intents: number;
+  distinct_modules: number;
+  retrieval_time_ms: number;
+  decode_time_ms: number;
+  total_time_ms: number;
+}
+
+export interface LatentQueryBatchResponse {
+  results: LatentQueryResponse[];
+  metrics: BatchMetrics;
+}
+
 export interface ModuleListItem {
   module_id: string;
   name: string;
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Convert a tensor directory between the per-file and packed layouts.
+
+Usage:
+    python scripts/pack_tensors.py                  # data/tensors → one .pack file
+    python scripts/pack_tensors.py --keep-files     # pack, keep the .safetensors files
+    python scripts/pack_tensors.py --unpack         # back to one .safetensors per module
+"""
+
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.compiler.persistence import pack_tensor_dir, unpack_tensor_dir
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Pack or unpack compiled tensors")
+    parser.add_argument("--tensor-dir", default="data/tensors", help="Tensor directory")
+    parser.add_argument("--unpack", action="store_true", help="Convert a pack back to per-file")
+    parser.add_argument("--keep-files", action="store_true", help="Keep .safetensors files after packing")
+    args = parser.parse_args()
+
+    if not Path(args.tensor_dir).exists():
+        print(f"ERROR: {args.tensor_dir} not found. Run compilation first.")
+        return 1
+
+    if args.unpack:
+        count = unpack_tensor_dir(args.tensor_dir)
+        print(f"Unpacked {count} modules in {args.tensor_dir}")
+    else:
+        count = pack_tensor_dir(args.tensor_dir, remove_files=not args.keep_files)
+        print(f"Packed {count} modules in {args.tensor_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
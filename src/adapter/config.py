@@ -164,6 +164,12 @@ ENDOFTEXT = "<|endoftext|>"
 
 # Realignment hyperparameters
 REALIGN_LAMBDA = 1e-4  # Tikhonov regularization for ridge regression
+# Solved realignment matrices are cached here, keyed by model, weights and lambda
+REALIGN_CACHE_DIR = os.environ.get("AC_REALIGN_DIR", "data/realignment")
+
+# Prefix KV cache: max relative error of cached vs. uncached hidden states
+# before the cache is disabled (bfloat16 drifts more than float32)
+PREFIX_CACHE_RTOL = 1e-2
 
 # Latent step defaults (from active profile)
 LATENT_STEPS_COMPILE = _default_profile.latent_steps_compile
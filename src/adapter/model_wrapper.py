@@ -11,25 +11,80 @@ from __future__ import annotations
 
 import gc
 import logging
+from collections.abc import Generator, Iterator
+from dataclasses import dataclass
 from typing import Any
 
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoModelForCausalLM, AutoTokenizer, DynamicCache
 
+from .chat_template import build_intent_query_prompt, build_rule_encoding_prompt
 from .config import (
     DECODE_TEMPERATURE,
     DECODE_TOP_P,
     MAX_DECODE_TOKENS,
     MODEL_NAME,
+    PREFIX_CACHE_RTOL,
+    REALIGN_CACHE_DIR,
     get_profile,
     resolve_device,
     resolve_dtype,
 )
-from .realignment import apply_realignment, compute_realignment_matrix
+from .realignment import apply_realignment, load_or_compute_realignment
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class PrefixCache:
+    """KV state of the ChatML prefix shared by all encoding prompts.
+
+    Computed once per model. Every prompt that starts with these tokens only
+    needs to forward its own suffix on top of a fork of this cache.
+    """
+
+    input_ids: torch.Tensor  # [P]
+    layers: list[tuple[torch.Tensor, torch.Tensor]]  # per layer (keys, values) [1, kv, P, d]
+    last_hidden: torch.Tensor  # [P, H] last-layer hidden states, for mean pooling
+
+    def fork(self, length: int, batch_size: int = 1) -> DynamicCache:
+        """Fresh DynamicCache holding the first `length` prefix positions.
+
+        The cache grows by concatenation, so the stored tensors are shared
+        read-only and never modified by the forward pass.
+        """
+        layers = [
+            (
+                keys[:, :, :length].expand(batch_size, -1, -1, -1),
+                values[:, :, :length].expand(batch_size, -1, -1, -1),
+            )
+            for keys, values in self.layers
+        ]
+        if hasattr(DynamicCache, "from_legacy_cache"):  # transformers < 5
+            return DynamicCache.from_legacy_cache(tuple(layers))
+        return DynamicCache(ddp_cache_data=layers)
+
+
+def _cache_to_layers(cache: Any) -> list[tuple[torch.Tensor, torch.Tensor]]:
+    """Extract per-layer (keys, values) from a DynamicCache across transformers versions."""
+    if hasattr(cache, "layers"):
+        return [(layer.keys, layer.values) for layer in cache.layers]
+    return list(zip(cache.key_cache, cache.value_cache))
+
+
+def _common_prefix_length(a: torch.Tensor, b: torch.Tensor) -> int:
+    """Length of the common prefix of two 1-D token id tensors."""
+    n = min(a.shape[0], b.shape[0])
+    mismatch = (a[:n] != b[:n].to(a.device)).nonzero()
+    return int(mismatch[0, 0]) if mismatch.numel() else n
+
+
+def _relative_error(actual: torch.Tensor, expected: torch.Tensor) -> float:
+    """||actual - expected|| / ||expected|| in float32."""
+    expected = expected.float()
+    return ((actual.float() - expected).norm() / expected.norm().clamp_min(1e-8)).item()
+
+
 class AdaptedModelWrapper:
     """Model wrapper with multi-model support and latent space operations.
 
@@ -48,6 +103,8 @@ class AdaptedModelWrapper:
         model_name: str = MODEL_NAME,
         device: str | None = None,
         load_model: bool = True,
+        use_prefix_cache: bool = True,
+        realign_cache_dir: str | None = REALIGN_CACHE_DIR,
     ):
         self.profile = get_profile(model_name)
         self.model_name = self.profile.model_name
@@ -63,6 +120,9 @@ class AdaptedModelWrapper:
         self.tokenizer = None
         self.realign_matrix = None
         self.target_norm = None
+        self.use_prefix_cache = use_prefix_cache
+        self.realign_cache_dir = realign_cache_dir
+        self._prefix_cache: PrefixCache | None = None
 
         if load_model:
             self._load_model()
@@ -91,10 +151,16 @@ class AdaptedModelWrapper:
         )
         self.model.eval()
 
-        logger.info("Computing realignment matrix...")
+        self._init_realignment()
+
+    def _init_realignment(self) -> None:
+        """Load or compute the realignment matrix for the currently loaded model."""
+        logger.info("Preparing realignment matrix...")
         W_in = self.model.get_input_embeddings().weight
         W_out = self.model.get_output_embeddings().weight
-        self.realign_matrix, self.target_norm = compute_realignment_matrix(W_in, W_out)
+        self.realign_matrix, self.target_norm = load_or_compute_realignment(
+            W_in, W_out, self.model_name, cache_dir=self.realign_cache_dir
+        )
         self.realign_matrix = self.realign_matrix.to(self.device)
         logger.info(
             "Realignment matrix computed: [%d, %d], target_norm=%.4f",
@@ -120,6 +186,27 @@ class AdaptedModelWrapper:
         )
         return {k: v.to(self.device) for k, v in encoded.items()}
 
+    def tokenize_chat_batch(
+        self,
+        messages_batch: list[list[dict[str, str]]],
+        add_generation_prompt: bool = True,
+    ) -> dict[str, torch.Tensor]:
+        """Tokenize several ChatML message lists into one left-padded batch.
+
+        Left padding keeps the last real token of every row at position -1,
+        which is where the latent loop reads its hidden state from.
+        """
+        texts = [
+            self.tokenizer.apply_chat_template(
+                messages, tokenize=False, add_generation_prompt=add_generation_prompt
+            )
+            for messages in messages_batch
+        ]
+        encoded = self.tokenizer(
+            texts, return_tensors="pt", padding=True, truncation=True
+        )
+        return {k: v.to(self.device) for k, v in encoded.items()}
+
     def get_token_count(self, text: str) -> int:
         """Count tokens in a text string."""
         return len(self.tokenizer.encode(text))
@@ -140,6 +227,10 @@ class AdaptedModelWrapper:
         """
         inputs = self.tokenize_chat(messages, add_generation_prompt=False)
 
+        prefix, prefix_len = self._match_prefix(inputs["input_ids"][0])
+        if prefix is not None:
+            return self._encode_text_with_prefix(inputs["input_ids"], prefix, prefix_len)
+
         outputs = self.model(
             **inputs,
             output_hidden_states=True,
@@ -170,6 +261,95 @@ class AdaptedModelWrapper:
 
         return mean_embedding, layer_states
 
+    def _encode_text_with_prefix(
+        self, input_ids: torch.Tensor, prefix: PrefixCache, prefix_len: int
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        """encode_text() that forwards only the tokens after the cached prefix."""
+        seq_len = input_ids.shape[1]
+        outputs = self.model(
+            input_ids=input_ids[:, prefix_len:],
+            attention_mask=torch.ones((1, seq_len), device=self.device, dtype=torch.long),
+            position_ids=torch.arange(prefix_len, seq_len, device=self.device).unsqueeze(0),
+            past_key_values=prefix.fork(prefix_len),
+            output_hidden_states=True,
+            use_cache=True,
+        )
+
+        all_hidden = outputs.hidden_states
+        layer_states = torch.stack([
+            all_hidden[i][0, -1, :] for i in range(1, len(all_hidden))
+        ])  # [n_layers, H]
+
+        # Mean over prefix + suffix tokens, matching the uncached pooling
+        total = all_hidden[-1][0].float().sum(dim=0) + prefix.last_hidden[:prefix_len].float().sum(dim=0)
+        mean_embedding = total / seq_len  # [H]
+
+        return mean_embedding, layer_states
+
+    @torch.no_grad()
+    def encode_text_batch(
+        self, messages_batch: list[list[dict[str, str]]]
+    ) -> list[tuple[torch.Tensor, torch.Tensor]]:
+        """encode_text() over several prompts in one left-padded forward pass.
+
+        Position ids come from the attention mask, so each row gets the same
+        positions (and, up to float rounding, the same result) as encoding it
+        alone. With the prefix cache the batch is [prefix | padding | suffix].
+
+        Returns:
+            One (mean_embedding [H], layer_states [n_layers, H]) per prompt,
+            in input order.
+        """
+        prefix, prefix_len = None, 0
+        if self._get_prefix_cache() is not None:
+            sequences = [
+                self.tokenize_chat(messages, add_generation_prompt=False)["input_ids"][0]
+                for messages in messages_batch
+            ]
+            matches = [self._match_prefix(ids) for ids in sequences]
+            prefix_len = min(length for _, length in matches)
+            prefix = matches[0][0] if prefix_len > 0 else None
+
+        if prefix is not None:
+            input_ids, token_mask = self._pad_left([ids[prefix_len:] for ids in sequences])
+            attention_mask = torch.cat([
+                torch.ones((len(sequences), prefix_len), device=self.device, dtype=token_mask.dtype),
+                token_mask,
+            ], dim=1)
+            position_ids = prefix_len + (token_mask.cumsum(dim=1) - 1).clamp_min(0)
+            past_key_values = prefix.fork(prefix_len, batch_size=len(sequences))
+        else:
+            inputs = self.tokenize_chat_batch(messages_batch, add_generation_prompt=False)
+            input_ids = inputs["input_ids"]
+            token_mask = attention_mask = inputs["attention_mask"]
+            position_ids = (attention_mask.long().cumsum(dim=1) - 1).clamp_min(0)
+            past_key_values = None
+
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=past_key_values,
+            output_hidden_states=True,
+            use_cache=prefix is not None,
+        )
+
+        all_hidden = outputs.hidden_states
+        layer_states = torch.stack([
+            all_hidden[i][:, -1, :] for i in range(1, len(all_hidden))
+        ], dim=1)  # [B, n_layers, H]
+
+        # Mean over each row's real tokens (plus the shared prefix, if cached)
+        mask = token_mask.unsqueeze(-1).float()  # [B, seq, 1]
+        totals = (all_hidden[-1].float() * mask).sum(dim=1)  # [B, H]
+        counts = mask.sum(dim=1)  # [B, 1]
+        if prefix is not None:
+            totals = totals + prefix.last_hidden[:prefix_len].float().sum(dim=0)
+            counts = counts + prefix_len
+        mean_embeddings = totals / counts
+
+        return [(mean_embeddings[b], layer_states[b]) for b in range(len(messages_batch))]
+
     @torch.no_grad()
     def generate_latent_steps(
         self,
@@ -205,13 +385,27 @@ class AdaptedModelWrapper:
 
         trajectory = []
 
-        # Initial forward pass with token inputs
-        outputs = self.model(
-            input_ids=input_ids,
-            attention_mask=attention_mask,
-            output_hidden_states=True,
-            use_cache=True,
-        )
+        # Initial forward pass with token inputs (only the suffix if the
+        # shared system-prompt prefix is cached)
+        prefix, prefix_len = self._match_prefix(input_ids[0])
+        if prefix is not None:
+            outputs = self.model(
+                input_ids=input_ids[:, prefix_len:],
+                attention_mask=attention_mask,
+                position_ids=torch.arange(
+                    prefix_len, input_ids.shape[1], device=self.device
+                ).unsqueeze(0),
+                past_key_values=prefix.fork(prefix_len),
+                output_hidden_states=True,
+                use_cache=True,
+            )
+        else:
+            outputs = self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                output_hidden_states=True,
+                use_cache=True,
+            )
 
         all_hidden = outputs.hidden_states
         last_hidden = all_hidden[-1][:, -1:, :]  # [B, 1, H]
@@ -255,6 +449,215 @@ class AdaptedModelWrapper:
 
         return mean_embedding, layer_states, latent_trajectory, past_key_values
 
+    @torch.no_grad()
+    def generate_latent_steps_batch(
+        self,
+        messages_batch: list[list[dict[str, str]]],
+        n_steps: int | None = None,
+    ) -> list[tuple[torch.Tensor, torch.Tensor, torch.Tensor]]:
+        """Run the latent reasoning loop over several prompts at once.
+
+        Prompts are left-padded into a single batch that shares one padded
+        KV-cache. Position ids are derived from the attention mask so every
+        row sees the same positions it would get when run on its own. When
+        the shared system-prompt prefix is cached, the batch is laid out as
+        [prefix | padding | suffix] and only the suffixes are forwarded.
+
+        Args:
+            messages_batch: List of ChatML message lists
+            n_steps: Number of latent reasoning steps
+
+        Returns:
+            One (mean_embedding [H], layer_states [n_layers, H],
+            latent_trajectory [n_steps, H]) tuple per prompt, in input order.
+        """
+        if n_steps is None:
+            n_steps = self.profile.latent_steps_compile
+
+        prefix, prefix_len = None, 0
+        if self._get_prefix_cache() is not None:
+            sequences = [
+                self.tokenize_chat(messages, add_generation_prompt=True)["input_ids"][0]
+                for messages in messages_batch
+            ]
+            matches = [self._match_prefix(ids) for ids in sequences]
+            prefix_len = min(length for _, length in matches)
+            prefix = matches[0][0] if prefix_len > 0 else None
+
+        if prefix is not None:
+            input_ids, suffix_mask = self._pad_left([ids[prefix_len:] for ids in sequences])
+            attention_mask = torch.cat([
+                torch.ones((len(sequences), prefix_len), device=self.device, dtype=suffix_mask.dtype),
+                suffix_mask,
+            ], dim=1)
+            position_ids = prefix_len + (suffix_mask.cumsum(dim=1) - 1).clamp_min(0)
+            past_key_values = prefix.fork(prefix_len, batch_size=len(sequences))
+        else:
+            inputs = self.tokenize_chat_batch(messages_batch, add_generation_prompt=True)
+            input_ids = inputs["input_ids"]
+            attention_mask = inputs["attention_mask"]
+            position_ids = (attention_mask.long().cumsum(dim=1) - 1).clamp_min(0)
+            past_key_values = None
+
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=past_key_values,
+            output_hidden_states=True,
+            use_cache=True,
+        )
+
+        all_hidden = outputs.hidden_states
+        last_hidden = all_hidden[-1][:, -1:, :]  # [B, 1, H]
+        trajectory = [last_hidden[:, 0, :]]  # [B, H] per step
+
+        layer_states = torch.stack([
+            all_hidden[i][:, -1, :] for i in range(1, len(all_hidden))
+        ], dim=1)  # [B, n_layers, H]
+
+        past_key_values = outputs.past_key_values
+        next_position = position_ids[:, -1:] + 1  # [B, 1]
+
+        for _ in range(n_steps - 1):
+            realigned = apply_realignment(
+                last_hidden, self.realign_matrix, self.target_norm
+            )  # [B, 1, H]
+
+            attention_mask = torch.cat([
+                attention_mask,
+                torch.ones((attention_mask.shape[0], 1), device=self.device, dtype=attention_mask.dtype),
+            ], dim=1)
+
+            outputs = self.model(
+                inputs_embeds=realigned,
+                attention_mask=attention_mask,
+                position_ids=next_position,
+                past_key_values=past_key_values,
+                output_hidden_states=True,
+                use_cache=True,
+            )
+
+            last_hidden = outputs.hidden_states[-1][:, -1:, :]  # [B, 1, H]
+            trajectory.append(last_hidden[:, 0, :])
+            past_key_values = outputs.past_key_values
+            next_position = next_position + 1
+
+        latent_trajectories = torch.stack(trajectory, dim=1)  # [B, n_steps, H]
+        mean_embeddings = latent_trajectories.mean(dim=1)  # [B, H]
+
+        return [
+            (mean_embeddings[b], layer_states[b], latent_trajectories[b])
+            for b in range(latent_trajectories.shape[0])
+        ]
+
+    def _pad_left(self, sequences: list[torch.Tensor]) -> tuple[torch.Tensor, torch.Tensor]:
+        """Left-pad 1-D token id tensors into (input_ids, attention_mask)."""
+        max_len = max(seq.shape[0] for seq in sequences)
+        input_ids = torch.full(
+            (len(sequences), max_len), self.tokenizer.pad_token_id,
+            device=self.device, dtype=torch.long,
+        )
+        attention_mask = torch.zeros((len(sequences), max_len), device=self.device, dtype=torch.long)
+        for row, seq in enumerate(sequences):
+            input_ids[row, max_len - seq.shape[0]:] = seq
+            attention_mask[row, max_len - seq.shape[0]:] = 1
+        return input_ids, attention_mask
+
+    # ------------------------------------------------------------------
+    # Shared system-prompt prefix cache
+    # ------------------------------------------------------------------
+
+    def _get_prefix_cache(self) -> PrefixCache | None:
+        """Return the prefix cache, building (and verifying) it on first use."""
+        if not self.use_prefix_cache or self.model is None:
+            return None
+        if self._prefix_cache is None:
+            self._prefix_cache = self._build_prefix_cache()
+            if self._prefix_cache is None:
+                self.use_prefix_cache = False
+        return self._prefix_cache
+
+    @torch.no_grad()
+    def _build_prefix_cache(self) -> PrefixCache | None:
+        """Run the token prefix shared by all encoding prompts once and keep its KV state.
+
+        The prefix is the longest common token prefix of a few probe prompts
+        from build_rule_encoding_prompt / build_intent_query_prompt. The cached
+        path is checked against the uncached one before it is enabled.
+        """
+        probes = [
+            build_rule_encoding_prompt("agent", "alpha", "probe"),
+            build_rule_encoding_prompt("skill", "beta", "probe"),
+            build_intent_query_prompt("probe"),
+        ]
+        probe_ids = [
+            self.tokenize_chat(p, add_generation_prompt=False)["input_ids"][0] for p in probes
+        ]
+        prefix_len = min(_common_prefix_length(probe_ids[0], ids) for ids in probe_ids[1:])
+        if prefix_len < 2:
+            logger.info("No shared prompt prefix found; prefix cache disabled")
+            return None
+
+        prefix_ids = probe_ids[0][:prefix_len].unsqueeze(0)
+        outputs = self.model(
+            input_ids=prefix_ids,
+            attention_mask=torch.ones_like(prefix_ids),
+            output_hidden_states=True,
+            use_cache=True,
+        )
+        cache = PrefixCache(
+            input_ids=prefix_ids[0],
+            layers=_cache_to_layers(outputs.past_key_values),
+            last_hidden=outputs.hidden_states[-1][0],
+        )
+
+        self._prefix_cache = cache
+        error = self.verify_prefix_cache(build_intent_query_prompt("verify the prefix cache"))
+        if error > PREFIX_CACHE_RTOL:
+            logger.warning(
+                "Prefix cache disabled: relative error %.2e exceeds %.0e", error, PREFIX_CACHE_RTOL
+            )
+            return None
+
+        logger.info("Prefix cache ready: %d shared tokens (rel. error %.2e)", prefix_len, error)
+        return cache
+
+    @torch.no_grad()
+    def verify_prefix_cache(self, messages: list[dict[str, str]]) -> float:
+        """Compare encode_text() with and without the prefix cache.
+
+        Returns:
+            Largest relative error (||cached - uncached|| / ||uncached||) over
+            the mean embedding and every per-layer state.
+        """
+        cached_mean, cached_layers = self.encode_text(messages)
+        enabled = self.use_prefix_cache
+        self.use_prefix_cache = False
+        try:
+            ref_mean, ref_layers = self.encode_text(messages)
+        finally:
+            self.use_prefix_cache = enabled
+
+        errors = [_relative_error(cached_mean, ref_mean)]
+        errors.extend(_relative_error(c, r) for c, r in zip(cached_layers, ref_layers))
+        return max(errors)
+
+    def _match_prefix(self, input_ids: torch.Tensor) -> tuple[PrefixCache | None, int]:
+        """Find how much of input_ids [seq] is covered by the cached prefix.
+
+        At least one token is always left for the suffix forward pass.
+        """
+        prefix = self._get_prefix_cache()
+        if prefix is None:
+            return None, 0
+        length = min(
+            _common_prefix_length(prefix.input_ids, input_ids), input_ids.shape[0] - 1
+        )
+        if length <= 0:
+            return None, 0
+        return prefix, length
+
     @torch.no_grad()
     def decode_from_latent(
         self,
@@ -282,6 +685,55 @@ class AdaptedModelWrapper:
         Returns:
             Generated text string (the dense prompt).
         """
+        combined_embeds, combined_mask = self._decode_inputs(latent_embeddings, decode_messages)
+        generated_ids = self._generate_with_embeds(
+            combined_embeds, combined_mask, max_new_tokens, temperature, top_p
+        )
+
+        # Decode generated token IDs to text
+        text = self.tokenizer.decode(generated_ids, skip_special_tokens=True)
+        return text.strip()
+
+    @torch.no_grad()
+    def decode_from_latent_stream(
+        self,
+        latent_embeddings: torch.Tensor,
+        decode_messages: list[dict[str, str]],
+        max_new_tokens: int = MAX_DECODE_TOKENS,
+        temperature: float = DECODE_TEMPERATURE,
+        top_p: float = DECODE_TOP_P,
+    ) -> Generator[str, None, str]:
+        """decode_from_latent(), yielding text pieces as tokens are generated.
+
+        Pieces concatenate to the generated text (leading whitespace dropped).
+        A piece is held back while it ends in an incomplete UTF-8 sequence.
+
+        Returns:
+            The same text decode_from_latent() returns (StopIteration.value).
+        """
+        combined_embeds, combined_mask = self._decode_inputs(latent_embeddings, decode_messages)
+        generated_ids: list[int] = []
+        emitted = ""
+        for token_id in self._iter_generate_with_embeds(
+            combined_embeds, combined_mask, max_new_tokens, temperature, top_p
+        ):
+            generated_ids.append(token_id)
+            text = self.tokenizer.decode(generated_ids, skip_special_tokens=True).lstrip()
+            if text.endswith("\ufffd") or not text.startswith(emitted):
+                continue
+            if len(text) > len(emitted):
+                yield text[len(emitted):]
+                emitted = text
+
+        text = self.tokenizer.decode(generated_ids, skip_special_tokens=True).strip()
+        if text.startswith(emitted) and len(text) > len(emitted):
+            yield text[len(emitted):]
+        return text
+
+    def _decode_inputs(
+        self, latent_embeddings: torch.Tensor, decode_messages: list[dict[str, str]]
+    ) -> tuple[torch.Tensor, torch.Tensor]:
+        """Prompt embeddings with the realigned latents inserted, and their mask."""
         inputs = self.tokenize_chat(decode_messages, add_generation_prompt=True)
         input_ids = inputs["input_ids"]  # [1, seq_len]
         attention_mask = inputs["attention_mask"]  # [1, seq_len]
@@ -313,19 +765,7 @@ class AdaptedModelWrapper:
             latent_mask,
             attention_mask[:, insert_idx:],
         ], dim=1)
-
-        # Generate text
-        # We need to use model.generate with inputs_embeds
-        # Build position_ids manually since we're using inputs_embeds
-        seq_len = combined_embeds.shape[1]
-
-        generated_ids = self._generate_with_embeds(
-            combined_embeds, combined_mask, max_new_tokens, temperature, top_p
-        )
-
-        # Decode generated token IDs to text
-        text = self.tokenizer.decode(generated_ids, skip_special_tokens=True)
-        return text.strip()
+        return combined_embeds, combined_mask
 
     def _find_user_insert_position(self, input_ids: torch.Tensor) -> int:
         """Find the position after '<|im_start|>user\\n' for latent insertion.
@@ -350,7 +790,6 @@ class AdaptedModelWrapper:
         else:
             return input_ids.shape[0] // 2
 
-    @torch.no_grad()
     def _generate_with_embeds(
         self,
         inputs_embeds: torch.Tensor,
@@ -359,12 +798,25 @@ class AdaptedModelWrapper:
         temperature: float,
         top_p: float,
     ) -> list[int]:
-        """Generate tokens autoregressively from embedding inputs.
+        """Generate tokens autoregressively from embedding inputs."""
+        return list(self._iter_generate_with_embeds(
+            inputs_embeds, attention_mask, max_new_tokens, temperature, top_p
+        ))
+
+    @torch.no_grad()
+    def _iter_generate_with_embeds(
+        self,
+        inputs_embeds: torch.Tensor,
+        attention_mask: torch.Tensor,
+        max_new_tokens: int,
+        temperature: float,
+        top_p: float,
+    ) -> Iterator[int]:
+        """Yield generated token ids one at a time, stopping at EOS / im_end.
 
         Uses a manual generation loop since model.generate() with inputs_embeds
         can have compatibility issues across different transformers versions.
         """
-        generated_ids: list[int] = []
         past_key_values = None
         current_embeds = inputs_embeds
         current_mask = attention_mask
@@ -405,7 +857,7 @@ class AdaptedModelWrapper:
             if next_token_id in stop_ids:
                 break
 
-            generated_ids.append(next_token_id)
+            yield next_token_id
 
             # Prepare next step input
             next_embed = embed_layer(
@@ -417,8 +869,6 @@ class AdaptedModelWrapper:
                 torch.ones((1, 1), device=self.device, dtype=current_mask.dtype),
             ], dim=1)
 
-        return generated_ids
-
     def cleanup(self) -> None:
         """Release model from memory."""
         if self.model is not None:
@@ -428,5 +878,6 @@ class AdaptedModelWrapper:
             del self.tokenizer
             self.tokenizer = None
         self.realign_matrix = None
+        self._prefix_cache = None
         gc.collect()
         logger.info("Model resources released.")
@@ -8,14 +8,29 @@ enabling the latent reasoning loop where hidden states are re-fed as embeddings.
 
 Behavior varies by model:
 - Qwen3-4B/14B (tie_word_embeddings=False): full Ridge Regression, richer projection
-- Qwen2.5-1.5B (tie_word_embeddings=True): M* ≈ I, very stable loop
+- Qwen2.5-1.5B (tie_word_embeddings=True): M* ≈ I, very stable loop; the solve
+  is skipped and M = I is used directly
+
+Solving for M* takes two [vocab, H]^T @ [vocab, H] products, which costs seconds
+on CPU, so the result is cached on disk as a safetensors file keyed by model
+name, a weight checksum and lambda (see load_or_compute_realignment).
 """
 
 from __future__ import annotations
 
+import hashlib
+import logging
+import os
+
 import torch
 
-from .config import REALIGN_LAMBDA
+from ..shared.tensor_io import load_metadata, load_tensor, save_tensors
+from .config import REALIGN_CACHE_DIR, REALIGN_LAMBDA
+
+logger = logging.getLogger(__name__)
+
+# Rows hashed per weight matrix by weight_checksum (plus full column sums)
+CHECKSUM_SAMPLE_ROWS = 4096
 
 
 def compute_realignment_matrix(
@@ -34,6 +49,11 @@ def compute_realignment_matrix(
         Tuple of (M [hidden_dim, hidden_dim], target_norm, target_mean_norm)
         where target_norm is the mean L2 norm of input embeddings.
     """
+    if is_tied(embed_weight, lm_head_weight):
+        # W_out == W_in: M* = (W^T W + lambda I)^-1 W^T W, which is I up to lambda
+        H = embed_weight.shape[1]
+        return torch.eye(H), _target_norm(embed_weight)
+
     W_in = embed_weight.detach().float()
     W_out = lm_head_weight.detach().float()
 
@@ -49,12 +69,108 @@ def compute_realignment_matrix(
     # Solve: gram @ M = target  =>  M = gram^{-1} @ target
     M = torch.linalg.solve(gram, target)  # [H, H]
 
-    # Compute target embedding statistics for normalization
+    return M, _target_norm(W_in)
+
+
+def _target_norm(embed_weight: torch.Tensor) -> float:
+    """Mean L2 norm of the input embeddings, used to rescale realigned states."""
     with torch.no_grad():
         # Sample a subset for efficiency (first 2000 embeddings)
-        sample = W_in[:2000]
-        target_norm = sample.norm(dim=1).mean().item()
+        sample = embed_weight.detach()[:2000].float()
+        return sample.norm(dim=1).mean().item()
 
+
+def is_tied(embed_weight: torch.Tensor, lm_head_weight: torch.Tensor) -> bool:
+    """True if the input embeddings and output head share storage."""
+    return (
+        embed_weight.shape == lm_head_weight.shape
+        and embed_weight.data_ptr() == lm_head_weight.data_ptr()
+    )
+
+
+def weight_checksum(embed_weight: torch.Tensor, lm_head_weight: torch.Tensor) -> str:
+    """Cheap fingerprint of both weight matrices.
+
+    Hashes shape, dtype, CHECKSUM_SAMPLE_ROWS evenly spaced rows and the
+    per-column sums of each matrix, so any fine-tune or different checkpoint
+    changes the checksum without hashing the full vocabulary.
+    """
+    digest = hashlib.sha256()
+    with torch.no_grad():
+        for weight in (embed_weight, lm_head_weight):
+            w = weight.detach()
+            digest.update(f"{tuple(w.shape)}:{w.dtype}".encode())
+            rows = torch.linspace(
+                0, w.shape[0] - 1, min(CHECKSUM_SAMPLE_ROWS, w.shape[0]), device=w.device
+            ).long()
+            digest.update(w[rows].float().cpu().numpy().tobytes())
+            digest.update(w.sum(dim=0, dtype=torch.float32).cpu().numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def realignment_cache_path(
+    cache_dir: str, model_name: str, checksum: str, reg_lambda: float
+) -> str:
+    """Cache file for one (model, weights, lambda) combination."""
+    key = hashlib.sha256(f"{model_name}|{checksum}|{reg_lambda!r}".encode()).hexdigest()[:16]
+    safe_name = model_name.replace("/", "--")
+    return os.path.join(cache_dir, f"{safe_name}-{key}.safetensors")
+
+
+def load_or_compute_realignment(
+    embed_weight: torch.Tensor,
+    lm_head_weight: torch.Tensor,
+    model_name: str,
+    cache_dir: str | None = REALIGN_CACHE_DIR,
+    reg_lambda: float = REALIGN_LAMBDA,
+) -> tuple[torch.Tensor, float]:
+    """compute_realignment_matrix() backed by an on-disk safetensors cache.
+
+    Tied-embedding models take the identity fast path and are never cached.
+    A missing, unreadable or mismatched cache file is recomputed and
+    rewritten; a failed write only logs a warning.
+
+    Args:
+        embed_weight: Input embedding matrix W_in [vocab_size, hidden_dim]
+        lm_head_weight: Output head matrix W_out [vocab_size, hidden_dim]
+        model_name: Model identifier, part of the cache key
+        cache_dir: Cache directory, or None to always compute
+        reg_lambda: Tikhonov regularization parameter
+
+    Returns:
+        Tuple of (M [hidden_dim, hidden_dim], target_norm)
+    """
+    if cache_dir is None or is_tied(embed_weight, lm_head_weight):
+        return compute_realignment_matrix(embed_weight, lm_head_weight, reg_lambda)
+
+    checksum = weight_checksum(embed_weight, lm_head_weight)
+    path = realignment_cache_path(cache_dir, model_name, checksum, reg_lambda)
+    if os.path.exists(path):
+        try:
+            metadata = load_metadata(path)
+            if metadata.get("checksum") == checksum:
+                M = load_tensor(path, "realign_matrix")
+                logger.info("Loaded cached realignment matrix from %s", path)
+                return M, float(metadata["target_norm"])
+        except Exception as e:
+            logger.warning(
+                "Ignoring unreadable realignment cache %s: %s", path, e, exc_info=True
+            )
+
+    M, target_norm = compute_realignment_matrix(embed_weight, lm_head_weight, reg_lambda)
+    try:
+        save_tensors(
+            {"realign_matrix": M.detach().float().cpu().contiguous()},
+            path,
+            metadata={
+                "model_name": model_name,
+                "checksum": checksum,
+                "reg_lambda": repr(reg_lambda),
+                "target_norm": repr(target_norm),
+            },
+        )
+    except Exception as e:
+        logger.warning("Failed to cache realignment matrix: %s", e, exc_info=True)
     return M, target_norm
 
 
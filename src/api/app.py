@@ -3,15 +3,20 @@
 from __future__ import annotations
 
 import logging
+import threading
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from ..adapter.config import FASTAPI_HOST, FASTAPI_PORT, RETRIEVAL_ONLY
+from ..adapter.config import FASTAPI_HOST, FASTAPI_PORT, RETRIEVAL_ONLY, get_profile
+from ..compiler.bm25 import BM25Index
+from ..compiler.content_pack import CONTENT_PACK
 from ..compiler.indexer import NumpyIndex
 from ..gateway.content_store import SourceContentStore
 from ..gateway.retriever import LatentRetriever
 from ..gateway.session import SessionManager
+from ..gateway.tensor_cache import TensorCache
 from .middleware import add_middleware
 from .routes import router
 
@@ -23,11 +28,21 @@ class LazyModelWrapper:
 
     This allows the FastAPI server to start instantly (~100ms) and only
     incur the ~30-60s model load when the first actual query arrives.
+    Calls are serialized with a lock, so concurrent inference slots never
+    load the model twice or run two forward passes on it at once.
     """
 
     def __init__(self, model_name: str | None = None):
         self._wrapper = None
         self._model_name = model_name
+        self._lock = threading.RLock()
+
+    @property
+    def model_name(self) -> str:
+        # Resolved without loading, so decode cache keys need no model
+        if self._wrapper is not None:
+            return self._wrapper.model_name
+        return get_profile(self._model_name).model_name
 
     @property
     def model(self):
@@ -50,40 +65,62 @@ class LazyModelWrapper:
         return self._wrapper.target_norm
 
     def _ensure_loaded(self):
-        if self._wrapper is None:
-            from ..adapter.model_wrapper import AdaptedModelWrapper
+        with self._lock:
+            if self._wrapper is None:
+                from ..adapter.model_wrapper import AdaptedModelWrapper
 
-            logger.info("Lazy-loading model (first query)...")
-            kwargs = {}
-            if self._model_name:
-                kwargs["model_name"] = self._model_name
-            self._wrapper = AdaptedModelWrapper(**kwargs)
-            logger.info("Model loaded successfully.")
+                logger.info("Lazy-loading model (first query)...")
+                kwargs = {}
+                if self._model_name:
+                    kwargs["model_name"] = self._model_name
+                self._wrapper = AdaptedModelWrapper(**kwargs)
+                logger.info("Model loaded successfully.")
 
     def get_token_count(self, text: str) -> int:
-        self._ensure_loaded()
-        return self._wrapper.get_token_count(text)
+        with self._lock:
+            self._ensure_loaded()
+            return self._wrapper.get_token_count(text)
 
     def encode_text(self, messages):
-        self._ensure_loaded()
-        return self._wrapper.encode_text(messages)
+        with self._lock:
+            self._ensure_loaded()
+            return self._wrapper.encode_text(messages)
+
+    def encode_text_batch(self, messages_batch):
+        with self._lock:
+            self._ensure_loaded()
+            return self._wrapper.encode_text_batch(messages_batch)
 
     def generate_latent_steps(self, messages, n_steps=5):
-        self._ensure_loaded()
-        return self._wrapper.generate_latent_steps(messages, n_steps)
+        with self._lock:
+            self._ensure_loaded()
+            return self._wrapper.generate_latent_steps(messages, n_steps)
 
     def decode_from_latent(self, latent_embeddings, decode_messages, **kwargs):
-        self._ensure_loaded()
-        return self._wrapper.decode_from_latent(latent_embeddings, decode_messages, **kwargs)
+        with self._lock:
+            self._ensure_loaded()
+            return self._wrapper.decode_from_latent(
+                latent_embeddings, decode_messages, **kwargs
+            )
+
+    def decode_from_latent_stream(self, latent_embeddings, decode_messages, **kwargs):
+        # Holds the lock until the stream is exhausted or closed; consume it on one thread
+        with self._lock:
+            self._ensure_loaded()
+            return (yield from self._wrapper.decode_from_latent_stream(
+                latent_embeddings, decode_messages, **kwargs
+            ))
 
     def tokenize_chat(self, messages, add_generation_prompt=True):
-        self._ensure_loaded()
-        return self._wrapper.tokenize_chat(messages, add_generation_prompt)
+        with self._lock:
+            self._ensure_loaded()
+            return self._wrapper.tokenize_chat(messages, add_generation_prompt)
 
     def cleanup(self):
-        if self._wrapper:
-            self._wrapper.cleanup()
-            self._wrapper = None
+        with self._lock:
+            if self._wrapper:
+                self._wrapper.cleanup()
+                self._wrapper = None
 
 
 @asynccontextmanager
@@ -95,9 +132,16 @@ async def lifespan(app: FastAPI):
     tensor_dir = os.environ.get("AC_TENSOR_DIR", "data/tensors")
     index_dir = os.environ.get("AC_INDEX_DIR", "data/index")
     repo_root = os.environ.get("AC_SOURCE_REPO", "vendor/everything-claude-code")
+    scan_cache = os.environ.get("AC_SCAN_CACHE", "data/cache/scan_cache.json") or None
+    # float16 / int8 keep a quantized copy in memory and rescore from a mapped file
+    index_storage = os.environ.get("AC_INDEX_STORAGE", "float32")
+    # ivf narrows each query to a few k-means lists; exact scores every entry
+    index_backend = os.environ.get("AC_INDEX_BACKEND", "exact")
+    # Map embeddings.npy read-only so uvicorn workers share one page-cache copy
+    index_mmap = os.environ.get("AC_INDEX_MMAP", "true").lower() in ("1", "true", "yes")
 
     # Load index (lightweight, milliseconds)
-    index = NumpyIndex()
+    index = NumpyIndex(storage=index_storage, backend=index_backend, mmap=index_mmap)
     try:
         index.load(index_dir)
         logger.info("Index loaded: %d modules from %s", len(index.entries), index_dir)
@@ -105,16 +149,34 @@ async def lifespan(app: FastAPI):
         logger.warning("Failed to load index: %s (compile first?)", e)
 
     # Load source content store (for returning actual markdown in responses)
+    # Prefer the compiler's content pack: no repo scan, bodies decompressed on demand
     content_store = SourceContentStore()
-    content_store.load_from_repo(repo_root)
+    content_pack = os.environ.get("AC_CONTENT_PACK", os.path.join(index_dir, CONTENT_PACK))
+    if not content_store.load_from_pack(content_pack):
+        content_store.load_from_repo(repo_root, cache_file=scan_cache)
+
+    # BM25 over module content (written by the compiler beside manifest.json)
+    keyword_index = BM25Index.load(index_dir)
+    if keyword_index is None:
+        logger.info("No BM25 index in %s; keyword search scans index metadata", index_dir)
 
     # Wire up components
-    retriever = LatentRetriever(index, tensor_dir)
+    # Tensors load lazily on first use and stay in this LRU across requests
+    tensor_cache = TensorCache(
+        max_bytes=int(float(os.environ.get("AC_TENSOR_CACHE_MB", "256")) * 1024 * 1024)
+    )
+    retriever = LatentRetriever(
+        index, tensor_dir, keyword_index=keyword_index, tensor_cache=tensor_cache
+    )
     session_manager = SessionManager()
     app.state.retriever = retriever
     app.state.session_manager = session_manager
     app.state.content_store = content_store
     app.state.retrieval_only = RETRIEVAL_ONLY
+    app.state.started_at = time.time()
+    app.state.encode_batcher = None
+    app.state.inference = None
+    app.state.semantic_cache = None
 
     if RETRIEVAL_ONLY:
         # Retrieval-only mode: no model, no encoder, no decoder
@@ -125,23 +187,61 @@ async def lifespan(app: FastAPI):
         app.state.decoder = None
     else:
         from ..adapter.model_wrapper import AdaptedModelWrapper
+        from ..gateway.batcher import EncodeBatcher
+        from ..gateway.decode_cache import DecodeCache
         from ..gateway.decoder import LatentDecoder
+        from ..gateway.inference import InferenceExecutor
         from ..gateway.intent_encoder import IntentEncoder
+        from ..gateway.semantic_cache import SemanticIntentCache
 
         # Create lazy model wrapper (defers actual load)
         wrapper = LazyModelWrapper()
         intent_encoder = IntentEncoder(wrapper)
-        decoder = LatentDecoder(wrapper)
+        # Decoded prompts persist across restarts and are shared by all workers
+        decode_cache_path = os.environ.get(
+            "AC_DECODE_CACHE", "data/cache/decode_cache.sqlite3"
+        )
+        decode_cache = None
+        if decode_cache_path:
+            decode_cache = DecodeCache(
+                decode_cache_path,
+                max_entries=int(os.environ.get("AC_DECODE_CACHE_SIZE", "10000")),
+            )
+        decoder = LatentDecoder(wrapper, store=decode_cache)
 
         app.state.wrapper = wrapper
         app.state.intent_encoder = intent_encoder
         app.state.decoder = decoder
+        # Encodes and decodes run here, off the event loop, so cheap endpoints stay responsive
+        app.state.inference = InferenceExecutor(
+            slots=int(os.environ.get("AC_INFERENCE_SLOTS", "1"))
+        )
+        # Concurrent intents share one forward pass; tune the window with /v1/metrics
+        app.state.encode_batcher = EncodeBatcher(
+            intent_encoder,
+            window_ms=float(os.environ.get("AC_BATCH_WINDOW_MS", "5")),
+            max_batch_size=int(os.environ.get("AC_BATCH_MAX_SIZE", "16")),
+            executor=app.state.inference,
+        )
+        # Opt-in: near-duplicate intents reuse a cached vector (audited, see /v1/metrics)
+        if os.environ.get("AC_SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes"):
+            app.state.semantic_cache = SemanticIntentCache(
+                overlap_threshold=float(os.environ.get("AC_SEMANTIC_OVERLAP", "0.8")),
+                cosine_threshold=float(os.environ.get("AC_SEMANTIC_COSINE", "0.9")),
+                audit_rate=float(os.environ.get("AC_SEMANTIC_AUDIT_RATE", "0.05")),
+            )
 
     yield
 
     # Cleanup
+    if app.state.encode_batcher:
+        await app.state.encode_batcher.close()
+    if app.state.inference:
+        app.state.inference.shutdown()
     if not RETRIEVAL_ONLY and app.state.wrapper:
         app.state.wrapper.cleanup()
+        if app.state.decoder.store:
+            app.state.decoder.store.close()
     logger.info("AwesomeContext Gateway stopped.")
 
 
@@ -2,17 +2,27 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import threading
 import time
 from uuid import uuid4
 
+import numpy as np
 from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
 
+from ..gateway.semantic_cache import AUDIT_TOP_K
 from .schemas import (
+    BatchMetrics,
     HealthResponse,
+    LatentQueryBatchRequest,
+    LatentQueryBatchResponse,
     LatentQueryRequest,
     LatentQueryResponse,
     MatchedModule,
+    MetricsResponse,
     ModuleListItem,
     ModuleListResponse,
     QueryMetrics,
@@ -22,6 +32,9 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Fire-and-forget tasks (semantic cache audits), referenced until done
+_background_tasks: set[asyncio.Task] = set()
+
 
 def _build_metadata_prompt(retrieved, tool_name: str) -> str:
     """Build a structured text response from module metadata (fallback when no content)."""
@@ -54,24 +67,200 @@ def _build_source_prompt(retrieved, tool_name: str, content_store) -> str:
     return "\n\n---\n\n".join(sections)
 
 
-@router.post("/latent/query", response_model=LatentQueryResponse)
-async def latent_query(body: LatentQueryRequest, request: Request):
-    """Main query endpoint. Handles all three MCP tool types:
+def _query_plan(body: LatentQueryRequest) -> tuple[str | None, str | None, set[str] | None]:
+    """Query text, type filter and excluded types for an intent-based query."""
+    # compliance_verify prefers code, but falls back to intent for keyword mode
+    query_text = (body.code or body.intent) if body.tool_name == "compliance_verify" else body.intent
+    type_filter = body.module_type_filter
+    if body.tool_name == "compliance_verify" and not type_filter:
+        type_filter = "rule"  # Default to rules for compliance checks
 
-    - architect_consult: intent-based retrieval across all module types
-    - skill_injector: direct skill_id lookup
-    - compliance_verify: encode code, match against rules
+    # Exclude hooks/contexts from intent queries (they're lifecycle events,
+    # not knowledge modules, and their short content causes hub bias)
+    exclude = None
+    if body.tool_name == "architect_consult" and not type_filter:
+        exclude = {"hook", "context"}
+    return query_text, type_filter, exclude
+
+
+def _is_direct_lookup(body: LatentQueryRequest) -> bool:
+    return body.tool_name == "skill_injector" and bool(body.skill_id)
+
+
+def _error_response(body: LatentQueryRequest) -> LatentQueryResponse:
+    return LatentQueryResponse(
+        dense_prompt="Error: no intent or code provided for query.",
+        latent_id=str(uuid4()),
+        session_id=body.session_id,
+        metrics=QueryMetrics(
+            tokens_saved=0,
+            retrieval_time_ms=0,
+            decode_time_ms=0,
+            total_time_ms=0,
+            modules_searched=0,
+            modules_matched=0,
+        ),
+        matched_modules=[],
+    )
+
+
+async def _run_model(request: Request, fn, *args, **kwargs):
+    """Run a model-bound call in an inference slot, off the event loop.
+
+    Without an executor (retrieval-only apps, tests) the call runs inline.
     """
-    t_start = time.perf_counter()
+    inference = getattr(request.app.state, "inference", None)
+    if inference:
+        return await inference.run(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def _dense_prompt(request: Request, retrieved, tool_name: str) -> str:
+    """Decode latent states to dense text (or return source content)."""
+    retrieval_only = getattr(request.app.state, "retrieval_only", False)
+    decoder = request.app.state.decoder if not retrieval_only else None
+    content_store = getattr(request.app.state, "content_store", None)
+    if not retrieved:
+        return "No matching modules found for this query."
+    if decoder:
+        return await _run_model(request, decoder.decode, retrieved, tool_name=tool_name)
+    if content_store and len(content_store) > 0:
+        # Retrieval-only with content store: return actual source markdown
+        return _build_source_prompt(retrieved, tool_name, content_store)
+    # Fallback: metadata-only response
+    return _build_metadata_prompt(retrieved, tool_name)
+
+
+async def _build_response(
+    request: Request,
+    body: LatentQueryRequest,
+    retrieved,
+    dense_prompt: str,
+    retrieval_ms: float,
+    decode_ms: float,
+    t_start: float,
+) -> LatentQueryResponse:
+    """Count token savings, record the session and build the response."""
+    total_ms = (time.perf_counter() - t_start) * 1000
+
+    # Calculate token savings
+    original_tokens = sum(m.original_token_count for m in retrieved)
+    wrapper = request.app.state.wrapper
+    if wrapper:
+        dense_tokens = await _run_model(request, wrapper.get_token_count, dense_prompt)
+    else:
+        dense_tokens = len(dense_prompt.split()) * 1.3  # rough estimate
+    tokens_saved = max(0, int(original_tokens - dense_tokens))
 
+    # Update session
+    query_text = body.intent or body.code or body.skill_id or ""
+    request.app.state.session_manager.record_query(
+        session_id=body.session_id,
+        query=query_text,
+        module_ids=[m.module_id for m in retrieved],
+        tokens_saved=tokens_saved,
+    )
+
+    logger.info(
+        "Query [%s]: %d modules matched, %d tokens saved, %.0fms total",
+        body.tool_name,
+        len(retrieved),
+        tokens_saved,
+        total_ms,
+    )
+
+    return LatentQueryResponse(
+        dense_prompt=dense_prompt,
+        latent_id=str(uuid4()),
+        session_id=body.session_id,
+        metrics=QueryMetrics(
+            tokens_saved=tokens_saved,
+            retrieval_time_ms=round(retrieval_ms, 1),
+            decode_time_ms=round(decode_ms, 1),
+            total_time_ms=round(total_ms, 1),
+            modules_searched=len(request.app.state.retriever.index.entries),
+            modules_matched=len(retrieved),
+        ),
+        matched_modules=_matched(retrieved),
+    )
+
+
+def _matched(retrieved) -> list[MatchedModule]:
+    return [
+        MatchedModule(
+            module_id=m.module_id,
+            name=m.name,
+            module_type=m.module_type,
+            score=round(m.score, 4),
+            description=m.description,
+        )
+        for m in retrieved
+    ]
+
+
+async def _encode_with_model(request: Request, query_text: str) -> np.ndarray:
+    batcher = getattr(request.app.state, "encode_batcher", None)
+    if batcher:
+        return await batcher.encode(query_text)
+    return await _run_model(request, request.app.state.intent_encoder.encode, query_text)
+
+
+async def _encode_intent(request: Request, query_text: str) -> np.ndarray:
+    """Query vector: exact intent cache, then near-duplicate cache, then the model."""
+    semantic = getattr(request.app.state, "semantic_cache", None)
+    if semantic is None or request.app.state.intent_encoder.cached(query_text) is not None:
+        return await _encode_with_model(request, query_text)
+
+    # Model-free fingerprint of the intent: its keyword candidates
+    candidates = [
+        m.module_id
+        for m in request.app.state.retriever.retrieve_by_keywords(
+            query_text, top_k=semantic.candidates
+        )
+    ]
+    hit = semantic.lookup(query_text, candidates)
+    if hit is not None:
+        logger.debug(
+            "Semantic cache hit: %r reuses %r (overlap %.2f, cosine %.2f)",
+            query_text, hit.intent, hit.overlap, hit.cosine,
+        )
+        if semantic.should_audit():
+            task = asyncio.create_task(_audit_semantic_hit(request, query_text, hit))
+            _background_tasks.add(task)
+            task.add_done_callback(_background_tasks.discard)
+        return hit.vector
+
+    query_vec = await _encode_with_model(request, query_text)
+    semantic.add(query_text, candidates, query_vec)
+    return query_vec
+
+
+async def _audit_semantic_hit(request: Request, query_text: str, hit) -> None:
+    """Encode a served near-duplicate anyway and record whether reuse was right."""
+    try:
+        encoded = await _encode_with_model(request, query_text)
+    except Exception as e:
+        logger.warning("Semantic cache audit failed: %s", e, exc_info=True)
+        return
+    index = request.app.state.retriever.index
+
+    def top(vector):
+        return {e.module_id for e, _ in index.query(vector, top_k=AUDIT_TOP_K, min_score=-1.0)}
+
+    same = top(hit.vector) == top(encoded)
+    if not same:
+        logger.info("Semantic cache false reuse: %r served with %r", query_text, hit.intent)
+    request.app.state.semantic_cache.record_audit(hit.vector, encoded, same)
+
+
+async def _retrieve(request: Request, body: LatentQueryRequest) -> tuple[list | None, float]:
+    """Retrieved modules and retrieval time; None when the query has no text."""
     retriever = request.app.state.retriever
-    session_mgr = request.app.state.session_manager
     retrieval_only = getattr(request.app.state, "retrieval_only", False)
     intent_encoder = request.app.state.intent_encoder if not retrieval_only else None
-    decoder = request.app.state.decoder if not retrieval_only else None
 
     # Route based on tool type
-    if body.tool_name == "skill_injector" and body.skill_id:
+    if _is_direct_lookup(body):
         # Direct lookup by skill_id
         t_retrieve = time.perf_counter()
         module = retriever.retrieve_by_id(body.skill_id)
@@ -79,39 +268,15 @@ async def latent_query(body: LatentQueryRequest, request: Request):
         retrieval_ms = (time.perf_counter() - t_retrieve) * 1000
     else:
         # Intent-based retrieval
-        # compliance_verify prefers code, but falls back to intent for keyword mode
-        query_text = (body.code or body.intent) if body.tool_name == "compliance_verify" else body.intent
+        query_text, type_filter, exclude = _query_plan(body)
         if not query_text:
-            return LatentQueryResponse(
-                dense_prompt="Error: no intent or code provided for query.",
-                latent_id=str(uuid4()),
-                session_id=body.session_id,
-                metrics=QueryMetrics(
-                    tokens_saved=0,
-                    retrieval_time_ms=0,
-                    decode_time_ms=0,
-                    total_time_ms=0,
-                    modules_searched=0,
-                    modules_matched=0,
-                ),
-                matched_modules=[],
-            )
+            return None, 0.0
 
         t_retrieve = time.perf_counter()
-        type_filter = body.module_type_filter
-        if body.tool_name == "compliance_verify" and not type_filter:
-            type_filter = "rule"  # Default to rules for compliance checks
-
-        # Exclude hooks/contexts from intent queries (they're lifecycle events,
-        # not knowledge modules, and their short content causes hub bias)
-        exclude = None
-        if body.tool_name == "architect_consult" and not type_filter:
-            exclude = {"hook", "context"}
-
         if intent_encoder:
             # Full mode: encode intent → cosine search
             t_encode = time.perf_counter()
-            query_vec = intent_encoder.encode(query_text)
+            query_vec = await _encode_intent(request, query_text)
             encode_ms = (time.perf_counter() - t_encode) * 1000
             logger.debug("Intent encoding: %.1fms", encode_ms)
 
@@ -131,72 +296,191 @@ async def latent_query(body: LatentQueryRequest, request: Request):
                 exclude_types=exclude,
             )
         retrieval_ms = (time.perf_counter() - t_retrieve) * 1000
+    return retrieved, retrieval_ms
+
+
+@router.post("/latent/query", response_model=LatentQueryResponse)
+async def latent_query(body: LatentQueryRequest, request: Request):
+    """Main query endpoint. Handles all three MCP tool types:
+
+    - architect_consult: intent-based retrieval across all module types
+    - skill_injector: direct skill_id lookup
+    - compliance_verify: encode code, match against rules
+    """
+    t_start = time.perf_counter()
+
+    retrieved, retrieval_ms = await _retrieve(request, body)
+    if retrieved is None:
+        return _error_response(body)
 
-    # Decode latent states to dense text (or return source content)
     t_decode = time.perf_counter()
-    content_store = getattr(request.app.state, "content_store", None)
-    if not retrieved:
-        dense_prompt = "No matching modules found for this query."
-    elif decoder:
-        dense_prompt = decoder.decode(retrieved, tool_name=body.tool_name)
-    elif content_store and len(content_store) > 0:
-        # Retrieval-only with content store: return actual source markdown
-        dense_prompt = _build_source_prompt(retrieved, body.tool_name, content_store)
-    else:
-        # Fallback: metadata-only response
-        dense_prompt = _build_metadata_prompt(retrieved, body.tool_name)
+    dense_prompt = await _dense_prompt(request, retrieved, body.tool_name)
     decode_ms = (time.perf_counter() - t_decode) * 1000
 
-    total_ms = (time.perf_counter() - t_start) * 1000
+    return await _build_response(
+        request, body, retrieved, dense_prompt, retrieval_ms, decode_ms, t_start
+    )
 
-    # Calculate token savings
-    original_tokens = sum(m.original_token_count for m in retrieved)
-    wrapper = request.app.state.wrapper
-    if wrapper:
-        dense_tokens = wrapper.get_token_count(dense_prompt)
-    else:
-        dense_tokens = len(dense_prompt.split()) * 1.3  # rough estimate
-    tokens_saved = max(0, int(original_tokens - dense_tokens))
 
-    # Update session
-    query_text = body.intent or body.code or body.skill_id or ""
-    session_mgr.record_query(
-        session_id=body.session_id,
-        query=query_text,
-        module_ids=[m.module_id for m in retrieved],
-        tokens_saved=tokens_saved,
+@router.post("/latent/query/stream")
+async def latent_query_stream(body: LatentQueryRequest, request: Request):
+    """/latent/query as server-sent events, streaming the decode.
+
+    Events: "modules" (matches, once retrieval is done), "delta" ({"text"},
+    decoded text as it is generated), then "done" with the full
+    LatentQueryResponse, metrics included. A failed decode ends with "error".
+    """
+    t_start = time.perf_counter()
+    retrieved, retrieval_ms = await _retrieve(request, body)
+    return StreamingResponse(
+        _query_events(request, body, retrieved, retrieval_ms, t_start),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    logger.info(
-        "Query [%s]: %d modules matched, %d tokens saved, %.0fms total",
-        body.tool_name,
-        len(retrieved),
-        tokens_saved,
-        total_ms,
+
+async def _query_events(request: Request, body, retrieved, retrieval_ms, t_start):
+    if retrieved is None:
+        yield _sse("done", _error_response(body).model_dump())
+        return
+    yield _sse("modules", {"matched_modules": [m.model_dump() for m in _matched(retrieved)]})
+
+    retrieval_only = getattr(request.app.state, "retrieval_only", False)
+    decoder = request.app.state.decoder if not retrieval_only else None
+    t_decode = time.perf_counter()
+    if decoder and retrieved:
+        loop = asyncio.get_running_loop()
+        pieces: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            # One thread drives the whole generation (the model lock is held throughout)
+            stream = decoder.decode_stream(retrieved, tool_name=body.tool_name)
+            try:
+                while not stop.is_set():
+                    loop.call_soon_threadsafe(pieces.put_nowait, next(stream))
+            except StopIteration as done:
+                return done.value
+            finally:
+                stream.close()
+                loop.call_soon_threadsafe(pieces.put_nowait, None)
+
+        inference = getattr(request.app.state, "inference", None)
+        decoding = asyncio.ensure_future(
+            inference.run(produce) if inference else asyncio.to_thread(produce)
+        )
+        try:
+            while (piece := await pieces.get()) is not None:
+                yield _sse("delta", {"text": piece})
+            dense_prompt = await decoding
+        except Exception as e:
+            logger.warning("Streaming decode failed: %s", e, exc_info=True)
+            yield _sse("error", {"detail": str(e)})
+            return
+        finally:
+            # Client gone or decode failed: stop generating at the next token
+            stop.set()
+    else:
+        dense_prompt = await _dense_prompt(request, retrieved, body.tool_name)
+        yield _sse("delta", {"text": dense_prompt})
+    decode_ms = (time.perf_counter() - t_decode) * 1000
+
+    response = await _build_response(
+        request, body, retrieved, dense_prompt, retrieval_ms, decode_ms, t_start
     )
+    yield _sse("done", response.model_dump())
 
-    return LatentQueryResponse(
-        dense_prompt=dense_prompt,
-        latent_id=str(uuid4()),
-        session_id=body.session_id,
-        metrics=QueryMetrics(
-            tokens_saved=tokens_saved,
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/latent/query/batch", response_model=LatentQueryBatchResponse)
+async def latent_query_batch(body: LatentQueryBatchRequest, request: Request):
+    """Answer several queries together.
+
+    Distinct intents are encoded in one batched forward pass and scored with
+    one matrix product; each matched module's tensors are loaded once, and
+    queries that match the same modules for the same tool share one decode.
+    Per-item retrieval/decode times are the shared batch times.
+    """
+    t_start = time.perf_counter()
+
+    retriever = request.app.state.retriever
+    retrieval_only = getattr(request.app.state, "retrieval_only", False)
+    intent_encoder = request.app.state.intent_encoder if not retrieval_only else None
+
+    queries = body.queries
+    retrieved: list[list | None] = [None] * len(queries)
+    plans = {}
+    for i, query in enumerate(queries):
+        if _is_direct_lookup(query):
+            module = retriever.retrieve_by_id(query.skill_id)
+            retrieved[i] = [module] if module else []
+        else:
+            plan = _query_plan(query)
+            if plan[0]:
+                plans[i] = plan
+
+    t_retrieve = time.perf_counter()
+    if plans and intent_encoder:
+        texts = [text for text, _, _ in plans.values()]
+        batcher = getattr(request.app.state, "encode_batcher", None)
+        if batcher:
+            # Join whatever other requests are encoding right now
+            vectors = np.stack(await asyncio.gather(*(batcher.encode(t) for t in texts)))
+        else:
+            vectors = await _run_model(request, intent_encoder.encode_batch, texts)
+        results = retriever.retrieve_batch(
+            vectors,
+            top_k=[queries[i].top_k for i in plans],
+            module_type_filters=[type_filter for _, type_filter, _ in plans.values()],
+            query_texts=texts,
+            exclude_types=[exclude for _, _, exclude in plans.values()],
+        )
+        for i, result in zip(plans, results):
+            retrieved[i] = result
+    else:
+        for i, (text, type_filter, exclude) in plans.items():
+            retrieved[i] = retriever.retrieve_by_keywords(
+                query_text=text,
+                top_k=queries[i].top_k,
+                module_type_filter=type_filter,
+                exclude_types=exclude,
+            )
+    retrieval_ms = (time.perf_counter() - t_retrieve) * 1000
+
+    t_decode = time.perf_counter()
+    prompts: dict[tuple, str] = {}
+    for i, query in enumerate(queries):
+        if retrieved[i] is not None:
+            key = (query.tool_name, tuple(m.module_id for m in retrieved[i]))
+            if key not in prompts:
+                prompts[key] = await _dense_prompt(request, retrieved[i], query.tool_name)
+    decode_ms = (time.perf_counter() - t_decode) * 1000
+
+    responses = []
+    for i, query in enumerate(queries):
+        if retrieved[i] is None:
+            responses.append(_error_response(query))
+            continue
+        key = (query.tool_name, tuple(m.module_id for m in retrieved[i]))
+        responses.append(await _build_response(
+            request, query, retrieved[i], prompts[key], retrieval_ms, decode_ms, t_start
+        ))
+
+    return LatentQueryBatchResponse(
+        results=responses,
+        metrics=BatchMetrics(
+            queries=len(queries),
+            distinct_intents=len({text.strip() for text, _, _ in plans.values()}),
+            distinct_modules=len({
+                m.module_id for modules in retrieved if modules for m in modules
+            }),
             retrieval_time_ms=round(retrieval_ms, 1),
             decode_time_ms=round(decode_ms, 1),
-            total_time_ms=round(total_ms, 1),
-            modules_searched=len(retriever.index.entries),
-            modules_matched=len(retrieved),
+            total_time_ms=round((time.perf_counter() - t_start) * 1000, 1),
         ),
-        matched_modules=[
-            MatchedModule(
-                module_id=m.module_id,
-                name=m.name,
-                module_type=m.module_type,
-                score=round(m.score, 4),
-                description=m.description,
-            )
-            for m in retrieved
-        ],
     )
 
 
@@ -215,6 +499,22 @@ async def list_modules(
     )
 
 
+@router.get("/metrics", response_model=MetricsResponse)
+async def metrics(request: Request):
+    """Serving statistics: intent micro-batches, inference slots and caches."""
+    batcher = getattr(request.app.state, "encode_batcher", None)
+    inference = getattr(request.app.state, "inference", None)
+    semantic = getattr(request.app.state, "semantic_cache", None)
+    started = getattr(request.app.state, "started_at", time.time())
+    return MetricsResponse(
+        uptime_seconds=round(time.time() - started, 1),
+        intent_batcher=batcher.stats.snapshot() if batcher else None,
+        inference=inference.stats() if inference else None,
+        semantic_cache=semantic.stats() if semantic is not None else None,
+        tensor_cache=request.app.state.retriever.tensor_cache.stats(),
+    )
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check(request: Request):
     """Health check endpoint."""
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from typing import Any
 from uuid import uuid4
 
 from pydantic import BaseModel, Field
@@ -51,6 +52,32 @@ class LatentQueryResponse(BaseModel):
     matched_modules: list[MatchedModule]
 
 
+class LatentQueryBatchRequest(BaseModel):
+    """Request body for POST /v1/latent/query/batch."""
+
+    queries: list[LatentQueryRequest] = Field(
+        ..., min_length=1, max_length=32, description="Queries answered together"
+    )
+
+
+class BatchMetrics(BaseModel):
+    """Performance metrics for a whole batch."""
+
+    queries: int
+    distinct_intents: int = Field(description="Intents encoded (after de-duplication)")
+    distinct_modules: int = Field(description="Modules whose tensors were loaded")
+    retrieval_time_ms: float
+    decode_time_ms: float
+    total_time_ms: float
+
+
+class LatentQueryBatchResponse(BaseModel):
+    """Response body for POST /v1/latent/query/batch."""
+
+    results: list[LatentQueryResponse] = Field(description="One response per query, in order")
+    metrics: BatchMetrics
+
+
 class ModuleListItem(BaseModel):
     """An item in the module listing."""
 
@@ -75,3 +102,21 @@ class HealthResponse(BaseModel):
     model_loaded: bool
     index_loaded: bool
     modules_count: int
+
+
+class MetricsResponse(BaseModel):
+    """Response for GET /v1/metrics."""
+
+    uptime_seconds: float
+    intent_batcher: dict[str, Any] | None = Field(
+        default=None, description="Micro-batcher stats (full mode only)"
+    )
+    inference: dict[str, int] | None = Field(
+        default=None, description="Inference slots, running and waiting jobs (full mode only)"
+    )
+    semantic_cache: dict[str, Any] | None = Field(
+        default=None, description="Near-duplicate intent cache: hit rate, thresholds, audits"
+    )
+    tensor_cache: dict[str, Any] | None = Field(
+        default=None, description="Module tensor LRU: hits, misses and bytes held"
+    )
@@ -0,0 +1 @@
+"""Offline benchmarks: compile and query throughput on a tiny stand-in model."""
@@ -0,0 +1,221 @@
+"""Compile/query throughput benchmark on the tiny stand-in model.
+
+Runs each stage of the latent pipeline over a synthetic corpus and reports,
+per stage, tokens/s, modules/s and p50/p95 latency, plus the process peak RSS:
+
+    encode_text            single forward pass (intent encoding at query time)
+    generate_latent_steps  forward pass + N latent reasoning steps
+    encode_module          full LatentEncoder path used by the compiler
+    decode_from_latent     latent injection + token generation
+
+Usage:
+    python -m src.benchmarks.compile_bench
+    python -m src.benchmarks.compile_bench --modules 64 --output bench.json
+    python -m src.benchmarks.compile_bench --min-modules-per-sec 5  # Exit 1 below the floor
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from collections.abc import Callable
+from typing import Any
+
+import numpy as np
+
+from ..adapter.chat_template import build_decode_prompt, build_rule_encoding_prompt
+from ..compiler.encoder import LatentEncoder
+from ..shared.types import ParsedModule
+from .tiny_model import build_tiny_wrapper
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+_WORDS = (
+    "always", "validate", "inputs", "at", "module", "boundaries", "prefer", "immutable", "data",
+    "keep", "functions", "small", "and", "focused", "handle", "errors", "explicitly", "never",
+    "swallow", "exceptions", "write", "tests", "for", "edge", "cases", "document", "public",
+    "interfaces", "avoid", "global", "state", "use", "dependency", "injection", "log", "with",
+    "context", "reuse", "connections", "close", "resources", "deterministically",
+)
+
+
+def synthetic_corpus(n_modules: int, seed: int = 0) -> list[ParsedModule]:
+    """Rule modules of varied length built from a fixed vocabulary."""
+    rng = random.Random(seed)
+    modules = []
+    for i in range(n_modules):
+        lines = [
+            "- " + " ".join(rng.choices(_WORDS, k=rng.randint(6, 14)))
+            for _ in range(rng.randint(2, 12))
+        ]
+        modules.append(ParsedModule(
+            module_id=f"rules/bench--r{i:04d}",
+            module_type="rule",
+            name=f"r{i:04d}",
+            description=f"Synthetic rule {i}",
+            content="\n".join(lines),
+            source_path=f"bench/r{i:04d}.md",
+        ))
+    return modules
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MiB, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _time_stage(
+    items: list[Any], fn: Callable[[Any], int], warmup: int = 1
+) -> dict[str, float]:
+    """Run fn over items; fn returns the number of tokens it processed."""
+    for item in items[:warmup]:
+        fn(item)
+
+    latencies = []
+    tokens = 0
+    t_start = time.perf_counter()
+    for item in items:
+        t0 = time.perf_counter()
+        tokens += fn(item)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t_start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "modules": len(items),
+        "tokens": tokens,
+        "seconds": round(elapsed, 4),
+        "tokens_per_sec": round(tokens / elapsed, 2) if elapsed else 0.0,
+        "modules_per_sec": round(len(items) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+    }
+
+
+def run_benchmark(
+    n_modules: int = 32,
+    latent_steps: int = 3,
+    decode_tokens: int = 16,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Benchmark every pipeline stage and return the report as a JSON-ready dict."""
+    wrapper = build_tiny_wrapper(seed=seed)
+    encoder = LatentEncoder(wrapper)
+    modules = synthetic_corpus(n_modules, seed=seed)
+    prompts = [
+        build_rule_encoding_prompt(m.module_type, m.name, m.content) for m in modules
+    ]
+
+    def prompt_tokens(messages: list[dict[str, str]]) -> int:
+        return int(wrapper.tokenize_chat(messages)["input_ids"].shape[1])
+
+    def encode_text(messages):
+        wrapper.encode_text(messages)
+        return prompt_tokens(messages)
+
+    def latent_steps_stage(messages):
+        wrapper.generate_latent_steps(messages, n_steps=latent_steps)
+        return prompt_tokens(messages) + latent_steps
+
+    def encode_module(item):
+        module, messages = item
+        encoder.encode_module(module, latent_steps=latent_steps)
+        return prompt_tokens(messages) + latent_steps
+
+    trajectories = [
+        wrapper.generate_latent_steps(messages, n_steps=latent_steps)[2]
+        for messages in prompts[: min(8, n_modules)]
+    ]
+    decode_messages = build_decode_prompt("rule", "bench")
+
+    def decode(trajectory):
+        text = wrapper.decode_from_latent(
+            trajectory, decode_messages, max_new_tokens=decode_tokens
+        )
+        return wrapper.get_token_count(text)
+
+    stages = {
+        "encode_text": _time_stage(prompts, encode_text),
+        "generate_latent_steps": _time_stage(prompts, latent_steps_stage),
+        "encode_module": _time_stage(list(zip(modules, prompts)), encode_module),
+        "decode_from_latent": _time_stage(trajectories, decode),
+    }
+    report = {
+        "model": {
+            "hidden_size": wrapper.profile.hidden_size,
+            "num_hidden_layers": wrapper.profile.num_hidden_layers,
+            "vocab_size": wrapper.profile.vocab_size,
+        },
+        "config": {
+            "modules": n_modules,
+            "latent_steps": latent_steps,
+            "decode_tokens": decode_tokens,
+            "seed": seed,
+        },
+        "stages": stages,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    wrapper.cleanup()
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the latent pipeline offline")
+    parser.add_argument("--modules", type=int, default=32, help="Synthetic corpus size")
+    parser.add_argument("--latent-steps", type=int, default=3, help="Latent steps per module")
+    parser.add_argument(
+        "--decode-tokens", type=int, default=16, help="Max new tokens per decode"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Model and corpus seed")
+    parser.add_argument("--output", default=None, help="Also write the JSON report here")
+    parser.add_argument(
+        "--min-modules-per-sec",
+        type=float,
+        default=None,
+        help="Exit 1 if encode_module throughput falls below this",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    report = run_benchmark(
+        n_modules=args.modules,
+        latent_steps=args.latent_steps,
+        decode_tokens=args.decode_tokens,
+        seed=args.seed,
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    throughput = report["stages"]["encode_module"]["modules_per_sec"]
+    if args.min_modules_per_sec is not None and throughput < args.min_modules_per_sec:
+        logger.error(
+            "encode_module throughput %.2f modules/s is below the floor of %.2f",
+            throughput,
+            args.min_modules_per_sec,
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
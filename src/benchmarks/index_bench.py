@@ -0,0 +1,168 @@
+"""Recall and latency of the index storage modes and search backends.
+
+Builds a synthetic clustered embedding set, saves it once as a float32 index
+and loads it back in every configuration: each storage mode with the exact
+backend, plus the IVF backend. All answer the same queries; recall@k is the
+overlap of each top k with the exact float32 top k.
+
+Usage:
+    python -m src.benchmarks.index_bench
+    python -m src.benchmarks.index_bench --entries 50000 --dim 2560 --top-k 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+import torch
+
+from ..compiler.indexer import NumpyIndex
+from ..shared.types import EncodedModule
+
+logger = logging.getLogger(__name__)
+
+# Report label → (storage, backend); the first one is the recall baseline
+CONFIGURATIONS = {
+    "float32": ("float32", "exact"),
+    "float16": ("float16", "exact"),
+    "int8": ("int8", "exact"),
+    "ivf": ("float32", "ivf"),
+}
+
+
+def synthetic_embeddings(
+    n_entries: int, dim: int, n_clusters: int = 64, seed: int = 0
+) -> np.ndarray:
+    """Clustered float32 vectors, so near neighbours are close in score."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, n_clusters, n_entries)
+    noise = rng.standard_normal((n_entries, dim)).astype(np.float32)
+    return centers[assignment] + 0.8 * noise
+
+
+def _build_index_dir(embeddings: np.ndarray, index_dir: str) -> None:
+    index = NumpyIndex()
+    index.build([
+        EncodedModule(
+            module_id=f"rules/bench--e{i:06d}",
+            module_type="rule",
+            name=f"e{i:06d}",
+            description="",
+            mean_embedding=torch.from_numpy(row),
+            layer_states=None,
+            latent_trajectory=None,
+            content_hash="",
+            token_count=0,
+        )
+        for i, row in enumerate(embeddings)
+    ])
+    index.save(index_dir)
+
+
+def _resident_bytes(index: NumpyIndex) -> int:
+    """Bytes of the matrix a query scans in memory."""
+    if index.storage == "float32":
+        return int(index.embeddings.nbytes)
+    index.query(np.ones(index.embeddings.shape[1], dtype=np.float32), min_score=-2.0)
+    scales = index._scales.nbytes if index._scales is not None else 0
+    return int(index._approx.nbytes + scales)
+
+
+def run_benchmark(
+    n_entries: int = 20000,
+    dim: int = 1536,
+    n_queries: int = 200,
+    top_k: int = 10,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Query every configuration and return the report as a JSON-ready dict."""
+    embeddings = synthetic_embeddings(n_entries, dim, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, n_entries, n_queries)
+    queries = embeddings[picks] + rng.standard_normal((n_queries, dim)).astype(np.float32)
+
+    modes: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as index_dir:
+        _build_index_dir(embeddings, index_dir)
+        baseline: list[set[str]] = []
+        for label, (storage, backend) in CONFIGURATIONS.items():
+            t0 = time.perf_counter()
+            index = NumpyIndex(storage=storage, backend=backend)
+            index.load(index_dir)
+            load_seconds = time.perf_counter() - t0
+            resident = _resident_bytes(index)
+
+            latencies = []
+            recalls = []
+            for i, query in enumerate(queries):
+                t0 = time.perf_counter()
+                results = index.query(query, top_k=top_k, min_score=-2.0)
+                latencies.append(time.perf_counter() - t0)
+                ids = {entry.module_id for entry, _ in results}
+                if label == "float32":
+                    baseline.append(ids)
+                recalls.append(len(ids & baseline[i]) / top_k)
+
+            ms = np.array(latencies) * 1000
+            modes[label] = {
+                f"recall_at_{top_k}": round(float(np.mean(recalls)), 4),
+                "p50_ms": round(float(np.percentile(ms, 50)), 3),
+                "p95_ms": round(float(np.percentile(ms, 95)), 3),
+                "queries_per_sec": round(n_queries / float(np.sum(latencies)), 1),
+                "resident_bytes": resident,
+                "load_seconds": round(load_seconds, 3),
+            }
+            del index  # release the mapping before the directory is removed
+
+    return {
+        "config": {
+            "entries": n_entries,
+            "dim": dim,
+            "queries": n_queries,
+            "top_k": top_k,
+            "seed": seed,
+        },
+        "modes": modes,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark index storage modes and backends")
+    parser.add_argument("--entries", type=int, default=20000, help="Indexed vectors")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=200, help="Queries per mode")
+    parser.add_argument("--top-k", type=int, default=10, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0, help="Data seed")
+    parser.add_argument("--output", default=None, help="Also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    report = run_benchmark(
+        n_entries=args.entries,
+        dim=args.dim,
+        n_queries=args.queries,
+        top_k=args.top_k,
+        seed=args.seed,
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
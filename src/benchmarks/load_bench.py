@@ -0,0 +1,149 @@
+"""Cold start and per-process memory of NumpyIndex load modes.
+
+Saves one synthetic index, then loads it in a fresh Python process per mode
+(as a newly started uvicorn worker would) and reports the load time and the
+process's private memory after load plus one query. Modes:
+
+- "json": manifest.json + embeddings.npy read into memory (the old path)
+- "binary": manifest.bin, embeddings read into memory
+- "binary+mmap": manifest.bin, embeddings.npy mapped read-only
+
+Mapped pages sit in the shared page cache rather than in each worker's
+private memory, so private_mb is what every extra worker costs.
+
+Usage:
+    python -m src.benchmarks.load_bench
+    python -m src.benchmarks.load_bench --entries 100000 --dim 1536
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+import numpy as np
+
+from ..compiler.indexer import IndexEntry, NumpyIndex
+from ..compiler.manifest import BINARY_MANIFEST
+
+logger = logging.getLogger(__name__)
+
+# Mode label → mmap flag; "json" hides manifest.bin for its run
+LOAD_MODES = {
+    "json": False,
+    "binary": False,
+    "binary+mmap": True,
+}
+
+
+def private_memory_mb() -> float | None:
+    """Anonymous (non file-backed) resident memory in MiB, on Linux."""
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def _save_synthetic_index(index_dir: str, n_entries: int, dim: int, seed: int) -> None:
+    rng = np.random.default_rng(seed)
+    index = NumpyIndex()
+    embeddings = rng.standard_normal((n_entries, dim)).astype(np.float32)
+    index.embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    index.entries = [
+        IndexEntry(
+            module_id=f"skills/bench--module-{i:06d}",
+            name=f"Module {i}",
+            module_type=("skill", "rule", "agent")[i % 3],
+            description=f"Synthetic module {i} for load benchmarking",
+            token_count=int(rng.integers(100, 4000)),
+            content_hash=f"{i:064x}",
+        )
+        for i in range(n_entries)
+    ]
+    index.save(index_dir)
+
+
+def _child(index_dir: str, mmap: bool) -> dict[str, Any]:
+    """Load and query once; runs in a fresh process."""
+    baseline = private_memory_mb()
+    t0 = time.perf_counter()
+    index = NumpyIndex(mmap=mmap)
+    index.load(index_dir)
+    load_ms = (time.perf_counter() - t0) * 1000
+    index.query(np.ones(index.embeddings.shape[1], dtype=np.float32), min_score=-2.0)
+    private = private_memory_mb()
+    return {
+        "load_ms": round(load_ms, 1),
+        "private_mb": None if private is None else round(private - baseline, 1),
+    }
+
+
+def run_benchmark(
+    n_entries: int = 50000, dim: int = 1536, seed: int = 0
+) -> dict[str, Any]:
+    """Load the same index once per mode, each in a new process."""
+    modes: dict[str, Any] = {}
+    with tempfile.TemporaryDirectory() as index_dir:
+        _save_synthetic_index(index_dir, n_entries, dim, seed)
+        binary_path = os.path.join(index_dir, BINARY_MANIFEST)
+        for label, mmap in LOAD_MODES.items():
+            hidden = binary_path + ".hidden"
+            if label == "json":
+                os.rename(binary_path, hidden)
+            try:
+                command = [sys.executable, "-m", __spec__.name, "--child", index_dir]
+                if mmap:
+                    command.append("--mmap")
+                output = subprocess.run(command, check=True, capture_output=True, text=True)
+                modes[label] = json.loads(output.stdout)
+            finally:
+                if label == "json":
+                    os.rename(hidden, binary_path)
+
+    return {
+        "config": {"entries": n_entries, "dim": dim, "seed": seed},
+        "modes": modes,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark index cold start and memory")
+    parser.add_argument("--entries", type=int, default=50000, help="Indexed entries")
+    parser.add_argument("--dim", type=int, default=1536, help="Embedding dimension")
+    parser.add_argument("--seed", type=int, default=0, help="Data seed")
+    parser.add_argument("--output", default=None, help="Also write the JSON report here")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--mmap", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    if args.child:
+        print(json.dumps(_child(args.child, args.mmap)))
+        return 0
+
+    report = run_benchmark(n_entries=args.entries, dim=args.dim, seed=args.seed)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Micro-benchmark of NumpyIndex.query filtering and top-k selection.
+
+Compares the current query path (precomputed type masks and type-grouped
+rows, argpartition selection) with the previous one, kept here as
+legacy_query(): per-call Python-list masks and a full argsort. Both run on
+the same in-memory float32 index for each size and filter case.
+
+Usage:
+    python -m src.benchmarks.query_bench
+    python -m src.benchmarks.query_bench --sizes 1000 10000 100000 --dim 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import json
+import logging
+import sys
+import time
+from typing import Any
+
+import numpy as np
+
+from ..compiler.indexer import IndexEntry, NumpyIndex
+
+logger = logging.getLogger(__name__)
+
+MODULE_TYPES = ("skill", "rule", "agent", "command", "hook", "context")
+# Case label → (module_type_filter, exclude_types), as routes.py issues them
+FILTER_CASES: dict[str, tuple[str | None, set[str] | None]] = {
+    "none": (None, None),
+    "type_filter": ("rule", None),
+    "exclude": (None, {"hook", "context"}),
+}
+
+
+def legacy_query(
+    index: NumpyIndex,
+    query_embedding: np.ndarray,
+    top_k: int = 3,
+    module_type_filter: str | None = None,
+    min_score: float = 0.3,
+    exclude_types: set[str] | None = None,
+) -> list[tuple[IndexEntry, float]]:
+    """The exact float32 query path before type layouts, for comparison."""
+    query_norm = query_embedding / max(np.linalg.norm(query_embedding), 1e-8)
+    query_norm = query_norm.astype(np.float32)
+    keep = None
+    if module_type_filter:
+        keep = np.array([e.module_type == module_type_filter for e in index.entries])
+    if exclude_types:
+        mask = np.array([e.module_type not in exclude_types for e in index.entries])
+        keep = mask if keep is None else keep & mask
+
+    scores = index.embeddings @ query_norm
+    if keep is not None:
+        scores = np.where(keep, scores, -1.0)
+    top_indices = np.argsort(scores)[::-1][:top_k]
+    return [
+        (index.entries[i], float(scores[i])) for i in top_indices if scores[i] >= min_score
+    ]
+
+
+def _synthetic_index(n_entries: int, dim: int, seed: int) -> NumpyIndex:
+    rng = np.random.default_rng(seed)
+    index = NumpyIndex()
+    embeddings = rng.standard_normal((n_entries, dim)).astype(np.float32)
+    index.embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    index.entries = [
+        IndexEntry(
+            module_id=f"m/{i:06d}",
+            name=f"m{i:06d}",
+            module_type=MODULE_TYPES[i % len(MODULE_TYPES)],
+            description="",
+            token_count=0,
+            content_hash="",
+        )
+        for i in range(n_entries)
+    ]
+    index._reset_rows()
+    # Type-grouped rows, as build() and save() lay them out
+    index._group_rows_by_type()
+    return index
+
+
+def _time_ms(fn, queries: np.ndarray) -> np.ndarray:
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        fn(query)
+        latencies.append(time.perf_counter() - t0)
+    return np.array(latencies) * 1000
+
+
+def run_benchmark(
+    sizes: tuple[int, ...] = (1000, 10000, 100000),
+    dim: int = 256,
+    n_queries: int = 100,
+    top_k: int = 3,
+    seed: int = 0,
+) -> dict[str, Any]:
+    """Time both query paths per size and filter case; JSON-ready report."""
+    rng = np.random.default_rng(seed + 1)
+    results: dict[str, dict[str, Any]] = {}
+    for n_entries in sizes:
+        index = _synthetic_index(n_entries, dim, seed)
+        queries = rng.standard_normal((n_queries, dim)).astype(np.float32)
+        cases: dict[str, Any] = {}
+        for label, (type_filter, exclude) in FILTER_CASES.items():
+            kwargs = {
+                "top_k": top_k,
+                "module_type_filter": type_filter,
+                "exclude_types": exclude,
+                "min_score": -2.0,
+            }
+            same = all(
+                [e.module_id for e, _ in index.query(q, **kwargs)]
+                == [e.module_id for e, _ in legacy_query(index, q, **kwargs)]
+                for q in queries[:10]
+            )
+            current = _time_ms(functools.partial(index.query, **kwargs), queries)
+            legacy = _time_ms(functools.partial(legacy_query, index, **kwargs), queries)
+            cases[label] = {
+                "current_p50_ms": round(float(np.percentile(current, 50)), 4),
+                "legacy_p50_ms": round(float(np.percentile(legacy, 50)), 4),
+                "speedup": round(float(np.median(legacy) / np.median(current)), 2),
+                "same_results": same,
+            }
+        results[str(n_entries)] = cases
+
+    return {
+        "config": {
+            "sizes": list(sizes),
+            "dim": dim,
+            "queries": n_queries,
+            "top_k": top_k,
+            "seed": seed,
+        },
+        "sizes": results,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark index query filtering and top-k")
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="Index sizes"
+    )
+    parser.add_argument("--dim", type=int, default=256, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=100, help="Queries per case")
+    parser.add_argument("--top-k", type=int, default=3, help="Results per query")
+    parser.add_argument("--seed", type=int, default=0, help="Data seed")
+    parser.add_argument("--output", default=None, help="Also write the JSON report here")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+    )
+
+    report = run_benchmark(
+        sizes=tuple(args.sizes),
+        dim=args.dim,
+        n_queries=args.queries,
+        top_k=args.top_k,
+        seed=args.seed,
+    )
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Tiny randomly initialised Qwen2 model: a network-free stand-in for the real checkpoint.
+
+Shapes match what AdaptedModelWrapper expects (ChatML tokenizer, Qwen2 layers,
+realignment matrix), so the full compile and decode paths run on CPU in seconds.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+
+import torch
+from tokenizers import Tokenizer, decoders, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast, Qwen2Config, Qwen2ForCausalLM
+
+from ..adapter.config import MODEL_PROFILES
+from ..adapter.model_wrapper import AdaptedModelWrapper
+
+CHATML_TEMPLATE = (
+    "{% for message in messages %}"
+    "{{ '<|im_start|>' + message['role'] + '\\n' + message['content'] + '<|im_end|>\\n' }}"
+    "{% endfor %}"
+    "{% if add_generation_prompt %}{{ '<|im_start|>assistant\\n' }}{% endif %}"
+)
+
+
+def build_tiny_tokenizer() -> PreTrainedTokenizerFast:
+    """Byte-level tokenizer with no merges plus the ChatML special tokens."""
+    alphabet = sorted(pre_tokenizers.ByteLevel.alphabet())
+    tokenizer = Tokenizer(models.BPE(vocab={c: i for i, c in enumerate(alphabet)}, merges=[]))
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    fast = PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        eos_token="<|endoftext|>",
+        pad_token="<|endoftext|>",
+        additional_special_tokens=["<|im_start|>", "<|im_end|>"],
+        padding_side="left",
+    )
+    fast.chat_template = CHATML_TEMPLATE
+    return fast
+
+
+def build_tiny_wrapper(seed: int = 0) -> AdaptedModelWrapper:
+    """AdaptedModelWrapper around a 2-layer, 64-dim Qwen2 model on CPU."""
+    wrapper = AdaptedModelWrapper(
+        model_name="Qwen/Qwen2.5-Coder-1.5B-Instruct",
+        device="cpu",
+        load_model=False,
+        realign_cache_dir=None,
+    )
+    tokenizer = build_tiny_tokenizer()
+    config = Qwen2Config(
+        vocab_size=len(tokenizer),
+        hidden_size=64,
+        intermediate_size=128,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=4096,
+        tie_word_embeddings=False,
+    )
+    torch.manual_seed(seed)
+    wrapper.profile = dataclasses.replace(
+        MODEL_PROFILES[wrapper.model_name],
+        hidden_size=64,
+        num_hidden_layers=2,
+        vocab_size=len(tokenizer),
+        tie_word_embeddings=False,
+        latent_steps_compile=3,
+        latent_steps_runtime=2,
+    )
+    wrapper.dtype = torch.float32
+    wrapper.tokenizer = tokenizer
+    wrapper.model = Qwen2ForCausalLM(config).eval()
+    wrapper._init_realignment()
+    return wrapper
@@ -0,0 +1,203 @@
+"""Search backends for NumpyIndex: exact brute force or an IVF coarse quantizer.
+
+A backend only narrows the rows a query has to score. NumpyIndex still scores
+the candidates exactly, adds keyword boosts and applies type filters, so every
+backend returns the same scores as the exact path for the rows it finds.
+
+- "exact": no candidate selection; every row is scored (the reference path).
+- "ivf": inverted file index. Spherical k-means splits the L2-normalized
+  embeddings into ~sqrt(N) lists; a query scores the centroids and only the
+  rows of the nprobe closest lists. Stored as ivf.npz beside manifest.json.
+
+New backends subclass SearchBackend and register in BACKENDS.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+IVF_FILENAME = "ivf.npz"
+# k-means trains on at most this many points per list (sampled)
+IVF_TRAIN_POINTS_PER_LIST = 64
+IVF_KMEANS_ITERATIONS = 10
+# Rows per matmul block when assigning rows to lists
+IVF_ASSIGN_BLOCK_ROWS = 8192
+
+
+class SearchBackend:
+    """Candidate selection strategy for NumpyIndex.query().
+
+    Subclasses keep their structure in sync with the embedding matrix:
+    build() after a full build, update() after upserts and removals, and
+    save()/load() beside the index files. candidates() returns None to mean
+    "score every row", which is also the answer while the structure is stale.
+    """
+
+    name = "exact"
+    stale = False
+
+    def build(self, embeddings: np.ndarray) -> None:
+        """Create the search structure from scratch."""
+
+    def update(self, embeddings: np.ndarray) -> None:
+        """Re-sync after rows were upserted or removed."""
+        self.build(embeddings)
+
+    def invalidate(self) -> None:
+        """Mark the structure stale; queries use the exact path until update()."""
+
+    def candidates(self, query: np.ndarray, min_rows: int = 0) -> np.ndarray | None:
+        """Row indices worth scoring exactly, sorted ascending, or None for all rows.
+
+        Args:
+            query: L2-normalized query vector [H]
+            min_rows: Probe further until at least this many rows are returned
+        """
+        return None
+
+    def save(self, index_dir: str) -> None:
+        """Persist beside manifest.json."""
+
+    def load(self, index_dir: str, embeddings: np.ndarray) -> None:
+        """Load from index_dir, rebuilding if missing or stale."""
+
+
+class IVFBackend(SearchBackend):
+    """Inverted file index over spherical k-means lists.
+
+    Args:
+        n_lists: Number of lists; default round(sqrt(N))
+        nprobe: Lists scanned per query; default max(1, n_lists // 8)
+        seed: k-means sampling and initialization seed
+    """
+
+    name = "ivf"
+
+    def __init__(self, n_lists: int | None = None, nprobe: int | None = None, seed: int = 0):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.seed = seed
+        self.centroids: np.ndarray | None = None  # [n_lists, H], L2-normalized
+        self.offsets: np.ndarray | None = None    # [n_lists + 1] into rows
+        self.rows: np.ndarray | None = None       # [N] row ids grouped by list
+        self.stale = True
+
+    def build(self, embeddings: np.ndarray) -> None:
+        self.centroids = self._train(embeddings)
+        self._assign(embeddings)
+
+    def update(self, embeddings: np.ndarray) -> None:
+        """Reassign rows to the existing lists; k-means is only rerun by build()."""
+        if self.centroids is None or self.centroids.shape[1] != embeddings.shape[1]:
+            self.build(embeddings)
+        else:
+            self._assign(embeddings)
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    def candidates(self, query: np.ndarray, min_rows: int = 0) -> np.ndarray | None:
+        if self.stale or self.centroids is None:
+            return None
+        n_lists = len(self.centroids)
+        nprobe = min(n_lists, self.nprobe or max(1, n_lists // 8))
+        rows = self._probe(query, nprobe)
+        while len(rows) < min_rows and nprobe < n_lists:
+            nprobe = min(n_lists, nprobe * 2)
+            rows = self._probe(query, nprobe)
+        return rows
+
+    def save(self, index_dir: str) -> None:
+        if self.centroids is None or self.stale:
+            return
+        np.savez(
+            os.path.join(index_dir, IVF_FILENAME),
+            centroids=self.centroids,
+            offsets=self.offsets,
+            rows=self.rows,
+        )
+
+    def load(self, index_dir: str, embeddings: np.ndarray) -> None:
+        path = os.path.join(index_dir, IVF_FILENAME)
+        embeddings_path = os.path.join(index_dir, "embeddings.npy")
+        if (
+            os.path.exists(path)
+            and os.stat(path).st_mtime_ns >= os.stat(embeddings_path).st_mtime_ns
+        ):
+            with np.load(path) as data:
+                centroids, offsets, rows = data["centroids"], data["offsets"], data["rows"]
+            if len(rows) == len(embeddings) and centroids.shape[1] == embeddings.shape[1]:
+                self.centroids, self.offsets, self.rows = centroids, offsets, rows
+                self.stale = False
+                return
+
+        logger.info("Building IVF index for %d rows", len(embeddings))
+        self.build(embeddings)
+        try:
+            self.save(index_dir)
+        except OSError as e:
+            logger.warning("Failed to save IVF index: %s", e)
+
+    def _probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        centroid_scores = self.centroids @ query
+        if nprobe < len(centroid_scores):
+            lists = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            lists = np.arange(len(centroid_scores))
+        rows = np.concatenate([
+            self.rows[self.offsets[i]:self.offsets[i + 1]] for i in lists
+        ])
+        rows.sort()
+        return rows
+
+    def _train(self, embeddings: np.ndarray) -> np.ndarray:
+        """Spherical k-means on a sample of the rows."""
+        n_rows = len(embeddings)
+        n_lists = max(1, min(n_rows, self.n_lists or round(n_rows**0.5)))
+        rng = np.random.default_rng(self.seed)
+        n_sample = min(n_rows, n_lists * IVF_TRAIN_POINTS_PER_LIST)
+        sample = np.asarray(
+            embeddings[np.sort(rng.choice(n_rows, n_sample, replace=False))], dtype=np.float32
+        )
+        centroids = sample[rng.choice(n_sample, n_lists, replace=False)].copy()
+        for _ in range(IVF_KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=n_lists)
+            present = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = centroids.copy()  # empty lists keep their centroid
+            sums[present] = np.add.reduceat(sample[order], starts[present], axis=0)
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-8)
+        return centroids.astype(np.float32)
+
+    def _assign(self, embeddings: np.ndarray) -> None:
+        labels = np.empty(len(embeddings), dtype=np.int64)
+        for start in range(0, len(embeddings), IVF_ASSIGN_BLOCK_ROWS):
+            block = np.asarray(embeddings[start:start + IVF_ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            labels[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        self.rows = np.argsort(labels, kind="stable").astype(np.int64)
+        counts = np.bincount(labels, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.stale = False
+
+
+BACKENDS: dict[str, type[SearchBackend]] = {
+    "exact": SearchBackend,
+    "ivf": IVFBackend,
+}
+
+
+def make_backend(name: str) -> SearchBackend:
+    """Instantiate a registered search backend by name."""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown index backend {name!r}; expected one of {tuple(BACKENDS)}"
+        ) from None
@@ -0,0 +1,240 @@
+"""BM25 inverted index over module content for retrieval-only keyword search.
+
+Built by the compiler from the scanned modules (id, name, description and the
+full markdown body, i.e. what SourceContentStore serves) and saved beside
+manifest.json:
+
+    bm25.json          terms, module ids, type names, corpus hash, parameters
+    bm25.offsets.npy   [V + 1] int64, postings of term t are rows offsets[t]:offsets[t+1]
+    bm25.docs.npy      [P] int32 document ids, ascending within each term
+    bm25.weights.npy   [P] float32 precomputed BM25 term weight per posting
+    bm25.types.npy     [N] int16 index into the type names, for filtering
+
+Weights are final per-posting BM25 contributions, so a query gathers its
+terms' posting lists (memory-mapped) and sums the weights of the documents in
+them; its cost follows the postings touched, not the corpus size. Documents
+need not contain every query term: like the substring scan it replaces, any
+single matching term makes a module eligible.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from ..shared.tensor_io import save_npy
+from ..shared.types import ParsedModule
+
+logger = logging.getLogger(__name__)
+
+META_FILENAME = "bm25.json"
+BM25_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+_ARRAYS = ("offsets", "docs", "weights", "types")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens; ids like "rules/common--security" split on punctuation."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def module_text(module: ParsedModule) -> str:
+    return f"{module.module_id} {module.name} {module.description} {module.content}"
+
+
+def corpus_hash(modules: list[ParsedModule]) -> str:
+    """Digest of module ids, types and content hashes; unchanged corpus, same index."""
+    digest = hashlib.sha256()
+    for m in sorted(modules, key=lambda m: m.module_id):
+        digest.update(f"{m.module_id}\0{m.module_type}\0{m.content_hash}\0".encode())
+    return digest.hexdigest()
+
+
+def build_bm25_index(
+    modules: list[ParsedModule],
+    index_dir: str,
+    k1: float = BM25_K1,
+    b: float = BM25_B,
+) -> bool:
+    """Write the BM25 index for modules into index_dir.
+
+    Returns:
+        False if the saved index already covers exactly this corpus.
+    """
+    digest = corpus_hash(modules)
+    meta_path = os.path.join(index_dir, META_FILENAME)
+    if os.path.exists(meta_path):
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if (
+                meta.get("version") == BM25_VERSION
+                and meta.get("corpus_hash") == digest
+                and meta.get("k1") == k1
+                and meta.get("b") == b
+            ):
+                return False
+        except (OSError, ValueError):
+            pass
+
+    modules = sorted(modules, key=lambda m: m.module_id)
+    term_ids: dict[str, int] = {}
+    type_ids: dict[str, int] = {}
+    posting_terms: list[int] = []
+    posting_docs: list[int] = []
+    posting_tf: list[int] = []
+    doc_lengths = np.zeros(len(modules), dtype=np.float32)
+    doc_types = np.zeros(len(modules), dtype=np.int16)
+    for doc, module in enumerate(modules):
+        tokens = tokenize(module_text(module))
+        doc_lengths[doc] = len(tokens)
+        doc_types[doc] = type_ids.setdefault(module.module_type, len(type_ids))
+        for term, tf in Counter(tokens).items():
+            posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+            posting_docs.append(doc)
+            posting_tf.append(tf)
+
+    terms = np.asarray(posting_terms, dtype=np.int64)
+    docs = np.asarray(posting_docs, dtype=np.int32)
+    tf = np.asarray(posting_tf, dtype=np.float32)
+    order = np.lexsort((docs, terms))
+    terms, docs, tf = terms[order], docs[order], tf[order]
+
+    n_docs = max(len(modules), 1)
+    df = np.bincount(terms, minlength=len(term_ids)).astype(np.float32)
+    idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    avgdl = max(float(doc_lengths.mean()) if len(modules) else 0.0, 1.0)
+    norm = k1 * (1.0 - b + b * doc_lengths[docs] / avgdl)
+    weights = (idf[terms] * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32)
+    offsets = np.concatenate([[0], np.cumsum(df.astype(np.int64))]).astype(np.int64)
+
+    os.makedirs(index_dir, exist_ok=True)
+    arrays = {"offsets": offsets, "docs": docs, "weights": weights, "types": doc_types}
+    for name, array in arrays.items():
+        # Replace, never overwrite: a live server keeps these files mapped
+        save_npy(os.path.join(index_dir, f"bm25.{name}.npy"), array)
+
+    # Written last: a complete meta file means the arrays beside it match
+    meta = {
+        "version": BM25_VERSION,
+        "corpus_hash": digest,
+        "k1": k1,
+        "b": b,
+        "n_postings": len(docs),
+        "terms": list(term_ids),
+        "module_ids": [m.module_id for m in modules],
+        "types": list(type_ids),
+    }
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+    logger.info(
+        "Built BM25 index: %d modules, %d terms, %d postings",
+        len(modules),
+        len(term_ids),
+        len(docs),
+    )
+    return True
+
+
+class BM25Index:
+    """Memory-mapped BM25 index loaded from an index directory."""
+
+    def __init__(
+        self,
+        terms: dict[str, int],
+        module_ids: list[str],
+        type_names: list[str],
+        arrays: dict[str, np.ndarray],
+    ):
+        self.terms = terms
+        self.module_ids = module_ids
+        self.type_ids = {name: i for i, name in enumerate(type_names)}
+        self.offsets = arrays["offsets"]
+        self.docs = arrays["docs"]
+        self.weights = arrays["weights"]
+        self.types = np.asarray(arrays["types"])
+
+    @classmethod
+    def load(cls, index_dir: str) -> BM25Index | None:
+        """Load the index, or None if index_dir has no (complete) BM25 index."""
+        meta_path = os.path.join(index_dir, META_FILENAME)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("version") != BM25_VERSION:
+                return None
+            arrays = {
+                name: np.load(os.path.join(index_dir, f"bm25.{name}.npy"), mmap_mode="r")
+                for name in _ARRAYS
+            }
+        except (OSError, ValueError) as e:
+            logger.warning("Failed to load BM25 index: %s", e)
+            return None
+        if len(arrays["docs"]) != meta["n_postings"] or len(arrays["types"]) != len(
+            meta["module_ids"]
+        ):
+            logger.warning("BM25 index in %s is incomplete; recompile", index_dir)
+            return None
+        terms = {term: i for i, term in enumerate(meta["terms"])}
+        logger.info("Loaded BM25 index: %d modules, %d terms", len(meta["module_ids"]), len(terms))
+        return cls(terms, meta["module_ids"], meta["types"], arrays)
+
+    def __len__(self) -> int:
+        return len(self.module_ids)
+
+    def query(
+        self,
+        text: str,
+        top_k: int = 3,
+        module_type_filter: str | None = None,
+        exclude_types: set[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """Top modules by BM25 score.
+
+        Returns:
+            List of (module_id, score) sorted by descending score; only
+            modules matching at least one query term.
+        """
+        term_ids = {self.terms[t] for t in tokenize(text) if t in self.terms}
+        if not term_ids or top_k <= 0:
+            return []
+
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in sorted(term_ids)]
+        docs = np.concatenate([self.docs[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+        # Score only the documents in the postings
+        candidates, inverse = np.unique(docs, return_inverse=True)
+        scores = np.zeros(len(candidates), dtype=np.float64)
+        np.add.at(scores, inverse, weights)
+
+        keep = scores > 0
+        if module_type_filter is not None:
+            type_id = self.type_ids.get(module_type_filter)
+            if type_id is None:
+                return []
+            keep &= self.types[candidates] == type_id
+        for name in exclude_types or ():
+            type_id = self.type_ids.get(name)
+            if type_id is not None:
+                keep &= self.types[candidates] != type_id
+        candidates, scores = candidates[keep], scores[keep]
+
+        if len(candidates) > top_k:
+            top = np.argpartition(-scores, top_k - 1)[:top_k]
+            candidates, scores = candidates[top], scores[top]
+        # Descending score, ties by module id for a stable order
+        order = np.lexsort((candidates, -scores))
+        return [(self.module_ids[candidates[i]], float(scores[i])) for i in order]
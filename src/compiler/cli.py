@@ -4,6 +4,12 @@ Usage:
     python -m src.compiler.cli --repo-root vendor/everything-claude-code --output data/tensors
     python -m src.compiler.cli --delta  # Only recompile changed files
     python -m src.compiler.cli --dry-run  # Show what would be compiled
+    python -m src.compiler.cli --batch-size 8  # Encode modules in length-bucketed batches
+    python -m src.compiler.cli --workers 4  # Shard modules across 4 worker processes
+    python -m src.compiler.cli --writer-threads 4  # More threads writing .safetensors files
+    python -m src.compiler.cli --pack  # Fold tensors into one memory-mapped pack file
+    python -m src.compiler.cli --delta --resume  # Continue after a crashed run
+    python -m src.compiler.cli --index-backend ivf  # Also build an IVF index for large corpora
 """
 
 from __future__ import annotations
@@ -17,11 +23,18 @@ from tqdm import tqdm
 
 from ..adapter.config import DEFAULT_MODEL_NAME, get_profile
 from ..adapter.model_wrapper import AdaptedModelWrapper
-from .delta import DeltaCompiler
+from ..shared.tensor_pack import has_pack
+from .ann import BACKENDS
+from .bm25 import build_bm25_index
+from .content_pack import write_content_pack
+from .delta import CompileFingerprint, DeltaCompiler
 from .encoder import LatentEncoder
 from .indexer import NumpyIndex
-from .persistence import delete_module, save_encoded_module
-from .scanner import scan_repository
+from .journal import CompileJournal
+from .persistence import delete_module, load_index_entry, load_module_metadata, pack_tensor_dir
+from .pipeline import CompilePipeline
+from .runner import CompileResult, compile_sharded
+from .scanner import iter_repository
 
 logging.basicConfig(
     level=logging.INFO,
@@ -81,25 +94,89 @@ def main(argv: list[str] | None = None) -> int:
         help=f"Override model name (default: auto-detect → {DEFAULT_MODEL_NAME}). "
              "Supported: Qwen/Qwen3-4B, Qwen/Qwen3-14B, Qwen/Qwen2.5-Coder-1.5B-Instruct",
     )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Modules encoded per forward pass; modules are bucketed by token "
+             "length to keep padding low (default: 1)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes, each loading its own model copy (default: 1)",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type=int,
+        default=None,
+        help="torch threads per worker process (default: cpu_count // workers)",
+    )
+    parser.add_argument(
+        "--writer-threads",
+        type=int,
+        default=2,
+        help="Threads writing .safetensors files in the streaming pipeline (default: 2)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,
+        help="Capacity of each queue between pipeline stages (default: 16)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip modules an interrupted run already saved (per the compile journal)",
+    )
+    parser.add_argument(
+        "--no-scan-cache",
+        action="store_true",
+        help="Re-parse every source file instead of reusing the scan cache",
+    )
+    parser.add_argument(
+        "--pack",
+        action="store_true",
+        help="Fold the compiled tensors into a single memory-mapped pack file "
+             "(an existing pack is always refreshed)",
+    )
+    parser.add_argument(
+        "--index-backend",
+        choices=sorted(BACKENDS),
+        default="exact",
+        help="Search structure saved with the index (ivf: inverted file for 100k+ entries)",
+    )
 
     args = parser.parse_args(argv)
 
     t_start = time.time()
 
-    # Step 1: Scan repository
+    # Resolve model profile (auto-selects Qwen3-4B on GPU, or Qwen2.5-1.5B on CPU);
+    # together with the prompt template it fingerprints the compiled tensors
+    profile = get_profile(args.model_name or None)
+    fingerprint = CompileFingerprint.from_profile(profile, args.latent_steps)
+
+    # Single-process builds stream scan → encode → write through a pipeline;
+    # dry runs and sharded builds need the full module list up front.
+    if not args.dry_run and args.workers <= 1:
+        return _compile_streaming(args, fingerprint, t_start)
+
+    # Step 1: Scan repository. Modules are compiled in discovery order, as the
+    # streaming build sees them, so both builds form the same batches.
     logger.info("Scanning repository: %s", args.repo_root)
-    all_modules = scan_repository(args.repo_root)
+    discovered = list(iter_repository(args.repo_root, cache_file=_scan_cache_file(args)))
 
     if args.module_type:
-        all_modules = [m for m in all_modules if m.module_type == args.module_type]
-        logger.info("Filtered to %d %s modules", len(all_modules), args.module_type)
+        discovered = [m for m in discovered if m.module_type == args.module_type]
+        logger.info("Filtered to %d %s modules", len(discovered), args.module_type)
+    all_modules = sorted(discovered, key=lambda m: m.module_id)
 
     # Step 2: Determine what to compile
     if args.delta:
-        delta = DeltaCompiler(hash_file=f"{args.cache_dir}/content_hashes.json")
-        delta.load_previous_hashes()
+        delta = _load_delta(args, fingerprint)
 
-        to_compile = [m for m in all_modules if delta.needs_recompile(m)]
+        to_compile = [m for m in discovered if _needs_recompile(delta, m, args)]
         deleted = delta.get_deleted_modules(all_modules)
 
         logger.info(
@@ -113,7 +190,7 @@ def main(argv: list[str] | None = None) -> int:
         for module_id in deleted:
             delete_module(args.output, module_id)
     else:
-        to_compile = all_modules
+        to_compile = discovered
         delta = None
         deleted = []
 
@@ -132,16 +209,38 @@ def main(argv: list[str] | None = None) -> int:
         logger.info("Total: %d to compile, %d to delete", len(to_compile), len(deleted))
         return 0
 
-    if not to_compile:
+    # Skip modules an interrupted run already saved
+    journal = _open_journal(args, fingerprint)
+    resumed = []
+    if journal.done:
+        remaining = []
+        for m in to_compile:
+            entry = _resume_entry(journal, m, args)
+            if entry is None:
+                remaining.append(m)
+            else:
+                resumed.append(entry)
+        to_compile = remaining
+        logger.info(
+            "Resuming: %d modules already compiled, %d remaining", len(resumed), len(to_compile)
+        )
+
+    if not to_compile and not resumed:
         logger.info("Nothing to compile (all modules up to date)")
         # Still rebuild index in case of deletions
-        if deleted:
-            _rebuild_index(args.output, args.index_dir)
+        if deleted and not _update_index(
+            [], deleted, args.output, args.index_dir, fingerprint.key, args.index_backend
+        ):
+            _rebuild_index(args.output, args.index_dir, fingerprint.key, args.index_backend)
+        _build_source_indexes(args, all_modules)
+        if delta:
+            delta.save_hashes()
+        journal.remove()
+        _maybe_pack(args)
         return 0
 
-    # Step 3: Load model (auto-selects Qwen3-4B on GPU, or Qwen2.5-1.5B on CPU)
+    # Step 3: Log the resolved model
     model_name = args.model_name or None
-    profile = get_profile(model_name)
     logger.info(
         "Using model: %s (device=%s, dtype=%s, latent_steps=%d)",
         profile.model_name,
@@ -152,31 +251,237 @@ def main(argv: list[str] | None = None) -> int:
     wrapper_kwargs = {}
     if model_name:
         wrapper_kwargs["model_name"] = model_name
-    wrapper = AdaptedModelWrapper(**wrapper_kwargs)
-    encoder = LatentEncoder(wrapper)
 
-    # Step 4: Compile modules
-    compiled = []
-    failed = []
-    for module in tqdm(to_compile, desc="Compiling", unit="module"):
+    # Step 4: Compile modules, sharded across worker processes
+    if not to_compile:
+        result = CompileResult(resumed)
+        return _finish(
+            args, fingerprint, result, all_modules, delta, deleted, None, journal, t_start
+        )
+    with tqdm(total=len(to_compile), desc="Compiling", unit="module") as progress:
+        result = compile_sharded(
+            to_compile,
+            args.output,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            latent_steps=args.latent_steps,
+            threads_per_worker=args.threads_per_worker,
+            wrapper_kwargs=wrapper_kwargs,
+            on_progress=progress.update,
+            fingerprint=fingerprint.key,
+            journal_path=journal.path,
+        )
+
+    result.compiled.extend(resumed)
+    result.compiled.sort(key=lambda e: e.module_id)
+    return _finish(
+        args, fingerprint, result, all_modules, delta, deleted, None, journal, t_start
+    )
+
+
+def _compile_streaming(args, fingerprint, t_start) -> int:
+    """Compile through CompilePipeline: parse, encode and write concurrently.
+
+    Module-type and delta filtering happen inside the scan stage, and the model
+    is only loaded once the first module that needs compiling arrives.
+    """
+    logger.info("Scanning repository: %s", args.repo_root)
+    delta = _load_delta(args, fingerprint) if args.delta else None
+    journal = _open_journal(args, fingerprint)
+
+    all_modules = []
+    resumed = []
+
+    def modules_to_compile():
+        for module in iter_repository(args.repo_root, cache_file=_scan_cache_file(args)):
+            if args.module_type and module.module_type != args.module_type:
+                continue
+            all_modules.append(module)
+            if delta is None or _needs_recompile(delta, module, args):
+                entry = _resume_entry(journal, module, args) if journal.done else None
+                if entry is not None:
+                    resumed.append(entry)
+                else:
+                    yield module
+
+    wrapper_kwargs = {}
+    if args.model_name:
+        wrapper_kwargs["model_name"] = args.model_name
+    wrappers = []
+
+    def make_encoder():
+        profile = get_profile(args.model_name or None)
+        logger.info(
+            "Using model: %s (device=%s, dtype=%s, latent_steps=%d)",
+            profile.model_name,
+            profile.recommended_device,
+            profile.recommended_dtype,
+            args.latent_steps or profile.latent_steps_compile,
+        )
+        wrappers.append(AdaptedModelWrapper(**wrapper_kwargs))
+        return LatentEncoder(wrappers[0])
+
+    pipeline = CompilePipeline(
+        make_encoder,
+        args.output,
+        batch_size=args.batch_size,
+        latent_steps=args.latent_steps,
+        writer_threads=args.writer_threads,
+        queue_size=args.queue_size,
+        fingerprint=fingerprint.key,
+        journal=journal,
+    )
+    with tqdm(desc="Compiling", unit="module") as progress:
+        result = pipeline.run(modules_to_compile(), on_progress=progress.update)
+    pipeline.log_report()
+
+    all_modules.sort(key=lambda m: m.module_id)
+    n_compiled = pipeline.stats["scan"].items
+    if args.module_type:
+        logger.info("Filtered to %d %s modules", len(all_modules), args.module_type)
+
+    if resumed:
+        logger.info("Resumed: %d modules were already compiled", len(resumed))
+
+    deleted = []
+    if delta:
+        deleted = delta.get_deleted_modules(all_modules)
+        n_changed = n_compiled + len(resumed)
+        logger.info(
+            "Delta analysis: %d changed, %d deleted, %d unchanged",
+            n_changed,
+            len(deleted),
+            len(all_modules) - n_changed,
+        )
+        for module_id in deleted:
+            delete_module(args.output, module_id)
+
+    if not n_compiled and not resumed:
+        logger.info("Nothing to compile (all modules up to date)")
+        # Still rebuild index in case of deletions
+        if deleted and not _update_index(
+            [], deleted, args.output, args.index_dir, fingerprint.key, args.index_backend
+        ):
+            _rebuild_index(args.output, args.index_dir, fingerprint.key, args.index_backend)
+        _build_source_indexes(args, all_modules)
+        if delta:
+            delta.save_hashes()
+        journal.remove()
+        _maybe_pack(args)
+        return 0
+
+    # Keep the index layout independent of write completion order
+    result.compiled.extend(resumed)
+    result.compiled.sort(key=lambda e: e.module_id)
+    wrapper = wrappers[0] if wrappers else None
+    return _finish(
+        args, fingerprint, result, all_modules, delta, deleted, wrapper, journal, t_start
+    )
+
+
+def _scan_cache_file(args) -> str | None:
+    return None if args.no_scan_cache else f"{args.cache_dir}/scan_cache.json"
+
+
+def _load_delta(args, fingerprint) -> DeltaCompiler:
+    """Load the delta cache and swap in the fingerprint's stashed artifacts."""
+    delta = DeltaCompiler(
+        hash_file=f"{args.cache_dir}/content_hashes.json", fingerprint=fingerprint
+    )
+    delta.load_previous_hashes()
+    if not args.dry_run:
+        delta.activate(args.output, args.index_dir)
+    return delta
+
+
+def _needs_recompile(delta, module, args) -> bool:
+    """Delta check against this fingerprint's entry in the hash file.
+
+    Only without such an entry are the stored tensors opened to verify that
+    they carry the fingerprint, so an unchanged tree costs no tensor reads.
+    """
+    stamp = None
+    if (
+        not args.dry_run
+        and not delta.has_profile
+        and delta.old_hashes.get(module.module_id) == module.content_hash
+    ):
         try:
-            encoded = encoder.encode_module(module, latent_steps=args.latent_steps)
-            save_encoded_module(encoded, args.output)
-            compiled.append(encoded)
-        except Exception as e:
-            logger.error("Failed to compile %s: %s", module.module_id, e)
-            failed.append((module.module_id, str(e)))
+            stamp = load_module_metadata(args.output, module.module_id).get(
+                "compile_fingerprint", ""
+            )
+        except Exception:
+            logger.debug("No readable tensors for %s", module.module_id, exc_info=True)
+            stamp = ""  # missing or unreadable tensors: recompile
+    return delta.needs_recompile(module, stamp=stamp)
+
+
+def _open_journal(args, fingerprint) -> CompileJournal:
+    """Load the checkpoint journal for --resume, or start a fresh one."""
+    journal = CompileJournal(f"{args.cache_dir}/compile_journal.jsonl", fingerprint.key)
+    if args.resume:
+        journal.load()
+    else:
+        journal.reset()
+    return journal
+
+
+def _resume_entry(journal, module, args):
+    """Index entry for a module an interrupted run already saved, else None."""
+    if not journal.is_done(module):
+        return None
+    try:
+        return load_index_entry(args.output, module.module_id)
+    except Exception:
+        logger.debug("Journaled module %s is unreadable", module.module_id, exc_info=True)
+        return None  # compile it again
+
 
-    # Step 5: Rebuild index from all compiled modules
-    logger.info("Rebuilding similarity index...")
-    _rebuild_index_from_encoded(compiled, all_modules, args.output, args.index_dir, wrapper)
+def _finish(
+    args, fingerprint, result, all_modules, delta, deleted, wrapper, journal, t_start
+) -> int:
+    """Report compile stats, rebuild the index, save hashes and clean up."""
+    compiled, failed = result.compiled, result.failed
+
+    for size, (n_modules, seconds) in sorted(result.batch_stats.items()):
+        logger.info(
+            "Batch size %d: %d modules in %.1fs (%.2f modules/s)",
+            size,
+            n_modules,
+            seconds,
+            n_modules / seconds if seconds > 0 else 0.0,
+        )
+
+    # Step 5: Patch the index with changed modules (delta), or rebuild it
+    if not (delta and _update_index(
+        compiled, deleted, args.output, args.index_dir, fingerprint.key, args.index_backend
+    )):
+        logger.info("Rebuilding similarity index...")
+        _rebuild_index_from_encoded(
+            compiled,
+            all_modules,
+            args.output,
+            args.index_dir,
+            wrapper,
+            args.index_backend,
+            fingerprint=fingerprint.key,
+        )
+    _build_source_indexes(args, all_modules)
 
     # Step 6: Save delta hashes
     if delta:
         delta.save_hashes()
 
-    # Step 7: Cleanup
-    wrapper.cleanup()
+    # Step 7: Refresh the packed store
+    _maybe_pack(args)
+
+    # Step 8: Cleanup; the journal is only kept if some modules failed
+    if wrapper is not None:
+        wrapper.cleanup()
+    if failed:
+        journal.close()
+    else:
+        journal.remove()
 
     elapsed = time.time() - t_start
     logger.info(
@@ -195,13 +500,75 @@ def main(argv: list[str] | None = None) -> int:
     return 0
 
 
+def _build_source_indexes(args, all_modules) -> None:
+    """Refresh the BM25 index and content pack used by retrieval-only serving."""
+    if args.module_type:
+        # A filtered scan only sees part of the corpus; keep the full index
+        logger.info("Keyword index and content pack not rebuilt for a --module-type compile")
+        return
+    if build_bm25_index(all_modules, args.index_dir):
+        logger.info("Keyword index written to %s", args.index_dir)
+    if write_content_pack(all_modules, args.index_dir):
+        logger.info("Content pack written to %s", args.index_dir)
+
+
+def _maybe_pack(args) -> None:
+    """Pack the tensor directory if asked to, or if it already holds a pack."""
+    if args.pack or has_pack(args.output):
+        count = pack_tensor_dir(args.output)
+        logger.info("Packed %d modules into %s", count, args.output)
+
+
+def _update_index(
+    newly_compiled, deleted, tensor_dir, index_dir, fingerprint="", backend="exact"
+) -> bool:
+    """Apply changed and deleted modules to the saved index in place.
+
+    Returns:
+        False if there is no usable saved index, if it was built with another
+        compile fingerprint, or if the patched index does not cover exactly
+        the modules in tensor_dir; the caller then rebuilds.
+    """
+    from .persistence import list_compiled_modules
+
+    index = NumpyIndex(backend=backend)
+    index.load(index_dir)
+    if index.embeddings is None or len(index.embeddings) != len(index.entries):
+        return False
+    if index.compile_fingerprint != fingerprint:
+        logger.info("Saved index was built with another compile fingerprint")
+        return False
+
+    try:
+        for module_id in deleted:
+            index.remove(module_id)
+        for encoded in newly_compiled:
+            index.upsert(encoded)
+    except ValueError as e:  # e.g. embedding dim changed with the model
+        logger.info("Saved index cannot be patched (%s)", e)
+        return False
+
+    if {e.module_id for e in index.entries} != set(list_compiled_modules(tensor_dir)):
+        logger.info("Saved index is out of sync with %s", tensor_dir)
+        return False
+
+    logger.info(
+        "Patching similarity index: %d upserted, %d removed",
+        len(newly_compiled),
+        len(deleted),
+    )
+    index.save_delta(index_dir)
+    return True
+
+
 def _rebuild_index_from_encoded(
-    newly_compiled, all_modules, tensor_dir, index_dir, wrapper
+    newly_compiled, all_modules, tensor_dir, index_dir, wrapper, backend="exact", fingerprint=""
 ):
     """Rebuild the full index incorporating newly compiled and existing modules."""
-    from .persistence import load_module_metadata, load_module_tensor, list_compiled_modules
+    from .persistence import list_compiled_modules, load_index_entry
 
-    index = NumpyIndex()
+    index = NumpyIndex(backend=backend)
+    index.compile_fingerprint = fingerprint
     all_encoded = []
 
     # Use newly compiled modules directly
@@ -213,24 +580,7 @@ def _rebuild_index_from_encoded(
     for module_id in existing_ids:
         if module_id not in compiled_ids:
             try:
-                mean_emb = load_module_tensor(tensor_dir, module_id, "mean_embedding")
-                meta = load_module_metadata(tensor_dir, module_id)
-                # Create a minimal EncodedModule for indexing
-                from ..shared.types import EncodedModule
-                import torch
-
-                encoded = EncodedModule(
-                    module_id=module_id,
-                    module_type=meta.get("module_type", "unknown"),
-                    name=meta.get("name", module_id),
-                    description=meta.get("description", ""),
-                    mean_embedding=mean_emb,
-                    layer_states=torch.zeros(1),  # Not needed for index
-                    latent_trajectory=torch.zeros(1),  # Not needed for index
-                    content_hash=meta.get("content_hash", ""),
-                    token_count=int(meta.get("token_count", "0")),
-                )
-                all_encoded.append(encoded)
+                all_encoded.append(load_index_entry(tensor_dir, module_id))
             except Exception as e:
                 logger.warning("Failed to load existing module %s: %s", module_id, e)
 
@@ -238,31 +588,17 @@ def _rebuild_index_from_encoded(
     index.save(index_dir)
 
 
-def _rebuild_index(tensor_dir, index_dir):
+def _rebuild_index(tensor_dir, index_dir, fingerprint="", backend="exact"):
     """Rebuild index entirely from disk (for deletion-only updates)."""
-    from .persistence import list_compiled_modules, load_module_metadata, load_module_tensor
-    from ..shared.types import EncodedModule
-    import torch
+    from .persistence import list_compiled_modules, load_index_entry
 
-    index = NumpyIndex()
+    index = NumpyIndex(backend=backend)
+    index.compile_fingerprint = fingerprint
     all_encoded = []
 
     for module_id in list_compiled_modules(tensor_dir):
         try:
-            mean_emb = load_module_tensor(tensor_dir, module_id, "mean_embedding")
-            meta = load_module_metadata(tensor_dir, module_id)
-            encoded = EncodedModule(
-                module_id=module_id,
-                module_type=meta.get("module_type", "unknown"),
-                name=meta.get("name", module_id),
-                description=meta.get("description", ""),
-                mean_embedding=mean_emb,
-                layer_states=torch.zeros(1),
-                latent_trajectory=torch.zeros(1),
-                content_hash=meta.get("content_hash", ""),
-                token_count=int(meta.get("token_count", "0")),
-            )
-            all_encoded.append(encoded)
+            all_encoded.append(load_index_entry(tensor_dir, module_id))
         except Exception as e:
             logger.warning("Failed to load %s: %s", module_id, e)
 
@@ -0,0 +1,166 @@
+"""Content pack: every module's source markdown in one compressed, mapped file.
+
+Retrieval-only servers return module markdown, which used to mean scanning
+(and shipping) the whole vendor repository at startup. The compiler now also
+writes content.pack beside the index:
+
+    b"ACCPACK1"  magic
+    uint64       header length
+    JSON header  count, corpus hash, and dtype / offset / length per column
+    columns      raw arrays, each 64-byte aligned
+
+Columns are the sorted module ids ("\\0"-separated UTF-8 plus int64 offsets)
+and the zlib-compressed bodies (concatenated, plus int64 offsets). Opening a
+pack maps the file and parses only the header; get() binary-searches the ids
+and decompresses one body.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from ..shared.types import ParsedModule
+from .bm25 import corpus_hash
+
+logger = logging.getLogger(__name__)
+
+CONTENT_PACK = "content.pack"
+CONTENT_PACK_VERSION = 1
+_MAGIC = b"ACCPACK1"
+_ALIGN = 64
+
+
+def write_content_pack(modules: list[ParsedModule], index_dir: str, level: int = 6) -> bool:
+    """Write content.pack for modules into index_dir, atomically.
+
+    Returns:
+        False if the existing pack already holds exactly this corpus.
+    """
+    digest = corpus_hash(modules)
+    path = os.path.join(index_dir, CONTENT_PACK)
+    existing = ContentPack.open(path)
+    if existing is not None and existing.corpus_hash == digest:
+        return False
+
+    modules = sorted(modules, key=lambda m: m.module_id)
+    ids = [m.module_id.replace("\0", "").encode("utf-8") for m in modules]
+    bodies = [zlib.compress(m.content.encode("utf-8"), level) for m in modules]
+    arrays = {
+        "ids.data": np.frombuffer(b"\0".join(ids), dtype=np.uint8),
+        "ids.offsets": _offsets([len(i) + 1 for i in ids]),
+        "bodies.data": np.frombuffer(b"".join(bodies), dtype=np.uint8),
+        "bodies.offsets": _offsets([len(b) for b in bodies]),
+    }
+
+    columns = {}
+    offset = 0
+    for name, array in arrays.items():
+        columns[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        "version": CONTENT_PACK_VERSION,
+        "count": len(modules),
+        "corpus_hash": digest,
+        "compression": "zlib",
+        "columns": columns,
+    }).encode("utf-8")
+    prefix = len(_MAGIC) + 8
+    header += b" " * (-(prefix + len(header)) % _ALIGN)
+
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for array in arrays.values():
+            data = array.tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % _ALIGN))
+    os.replace(tmp_path, path)
+    logger.info(
+        "Built content pack: %d modules, %.1f KB compressed",
+        len(modules),
+        arrays["bodies.data"].nbytes / 1024,
+    )
+    return True
+
+
+class ContentPack:
+    """Read-only module_id → markdown lookup over a mapped content.pack."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a content pack")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+        if header.get("version") != CONTENT_PACK_VERSION:
+            raise ValueError(f"{path}: unsupported content pack version")
+        data_start = len(_MAGIC) + 8 + header_length
+
+        self.count: int = header["count"]
+        self.corpus_hash: str = header["corpus_hash"]
+        data = (
+            np.memmap(path, dtype=np.uint8, mode="r")
+            if os.path.getsize(path) > data_start
+            else np.zeros(data_start, dtype=np.uint8)
+        )
+        self._columns = {}
+        for name, spec in header["columns"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = data_start + spec["offset"]
+            self._columns[name] = data[start:start + spec["length"] * dtype.itemsize].view(dtype)
+
+    @classmethod
+    def open(cls, path: str) -> ContentPack | None:
+        """The pack at path, or None if it is missing or unreadable."""
+        if not os.path.exists(path):
+            return None
+        try:
+            return cls(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("Ignoring content pack %s: %s", path, e)
+            return None
+
+    def get(self, module_id: str) -> str | None:
+        """Decompressed markdown of module_id, or None if not packed."""
+        row = self._row(module_id)
+        if row is None:
+            return None
+        offsets = self._columns["bodies.offsets"]
+        body = self._columns["bodies.data"][int(offsets[row]):int(offsets[row + 1])]
+        return zlib.decompress(body.tobytes()).decode("utf-8")
+
+    def module_ids(self) -> list[str]:
+        if not self.count:
+            return []
+        return self._columns["ids.data"].tobytes().decode("utf-8").split("\0")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, module_id: str) -> bool:
+        return self._row(module_id) is not None
+
+    def _row(self, module_id: str) -> int | None:
+        row = bisect.bisect_left(range(self.count), module_id, key=self._id)
+        if row < self.count and self._id(row) == module_id:
+            return row
+        return None
+
+    def _id(self, row: int) -> str:
+        offsets = self._columns["ids.offsets"]
+        start, end = int(offsets[row]), int(offsets[row + 1]) - 1
+        return self._columns["ids.data"][start:end].tobytes().decode("utf-8")
+
+
+def _offsets(lengths: list[int]) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)]).astype(np.int64)
@@ -1,26 +1,82 @@
 """Delta compilation: only recompile modules whose content has changed.
 
 Uses SHA-256 content hashes to detect changes. Stores hashes in a JSON cache file.
+
+Hashes are grouped by compile fingerprint (model, hidden size, latent steps
+and a hash of the encoding prompt template), so changing any of those
+recompiles everything while content edits only recompile what changed.
+Several fingerprints are kept side by side: when the active fingerprint
+changes, the current tensors and index are stashed under the cache directory
+and the new fingerprint's stash (if any) is restored, so switching back to a
+previous model reuses its artifacts.
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
 import os
+import shutil
+from dataclasses import asdict, dataclass
 
+from ..adapter.chat_template import build_rule_encoding_prompt
 from ..shared.types import ParsedModule
 
 logger = logging.getLogger(__name__)
 
 DEFAULT_HASH_FILE = "data/cache/content_hashes.json"
+HASH_FILE_VERSION = 2
+# Hashes written without a fingerprint (and v1 hash files) live under this key
+LEGACY_PROFILE = "default"
+
+
+def encoding_template_hash() -> str:
+    """Hash of the module encoding prompt, rendered with placeholder fields."""
+    messages = build_rule_encoding_prompt(
+        module_type="{module_type}", module_name="{module_name}", content="{content}"
+    )
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CompileFingerprint:
+    """Everything besides module content that determines compiled tensors."""
+
+    model_name: str
+    hidden_size: int
+    latent_steps: int
+    template_hash: str
+
+    @classmethod
+    def from_profile(cls, profile, latent_steps: int | None = None) -> CompileFingerprint:
+        return cls(
+            model_name=profile.model_name,
+            hidden_size=profile.hidden_size,
+            latent_steps=latent_steps or profile.latent_steps_compile,
+            template_hash=encoding_template_hash(),
+        )
+
+    @property
+    def key(self) -> str:
+        """Short stable identifier, stamped into compiled tensor metadata."""
+        payload = json.dumps(asdict(self), sort_keys=True).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
 
 
 class DeltaCompiler:
     """Track content hashes for incremental recompilation."""
 
-    def __init__(self, hash_file: str = DEFAULT_HASH_FILE):
+    def __init__(
+        self,
+        hash_file: str = DEFAULT_HASH_FILE,
+        fingerprint: CompileFingerprint | None = None,
+    ):
         self.hash_file = hash_file
+        self.fingerprint = fingerprint
+        self.profile_key = fingerprint.key if fingerprint else LEGACY_PROFILE
+        self.previous_profile: str | None = None
+        self.profiles: dict[str, dict] = {}
         self.old_hashes: dict[str, str] = {}
         self.new_hashes: dict[str, str] = {}
 
@@ -29,20 +85,80 @@ class DeltaCompiler:
         if os.path.exists(self.hash_file):
             try:
                 with open(self.hash_file, "r", encoding="utf-8") as f:
-                    self.old_hashes = json.load(f)
+                    data = json.load(f)
+                if data.get("version") == HASH_FILE_VERSION:
+                    self.profiles = data.get("profiles", {})
+                    self.previous_profile = data.get("active")
+                else:  # v1: flat module_id → hash map
+                    self.profiles = {LEGACY_PROFILE: {"fingerprint": {}, "modules": data}}
+                    self.previous_profile = LEGACY_PROFILE
+                self.old_hashes = dict(
+                    self.profiles.get(self.profile_key, {}).get("modules", {})
+                )
                 logger.info("Loaded %d previous hashes", len(self.old_hashes))
             except Exception as e:
                 logger.warning("Failed to load hash file: %s", e)
+                self.profiles = {}
                 self.old_hashes = {}
 
-    def needs_recompile(self, module: ParsedModule) -> bool:
+    def activate(self, tensor_dir: str, index_dir: str) -> bool:
+        """Swap in this fingerprint's artifacts if another one was active.
+
+        The outgoing fingerprint's tensor and index directories are moved to
+        <cache>/profiles/<key>/ and this fingerprint's stash, if present, is
+        moved back. Legacy (un-fingerprinted) artifacts are left in place.
+
+        Returns:
+            True if a stash was restored.
+        """
+        previous = self.previous_profile
+        if previous is None or previous == self.profile_key:
+            return False
+
+        stash_root = os.path.join(os.path.dirname(self.hash_file) or ".", "profiles")
+        if previous != LEGACY_PROFILE:
+            for src, name in ((tensor_dir, "tensors"), (index_dir, "index")):
+                if os.path.exists(src):
+                    _move_replacing(src, os.path.join(stash_root, previous, name))
+            logger.info("Stashed artifacts for fingerprint %s", previous)
+
+        own_stash = os.path.join(stash_root, self.profile_key)
+        restored = os.path.isdir(own_stash)
+        if restored:
+            for dest, name in ((tensor_dir, "tensors"), (index_dir, "index")):
+                src = os.path.join(own_stash, name)
+                if os.path.exists(src):
+                    _move_replacing(src, dest)
+            shutil.rmtree(own_stash, ignore_errors=True)
+            logger.info("Restored artifacts for fingerprint %s", self.profile_key)
+
+        # Record the swap now: a compile that crashes after this point must be
+        # resumed as this fingerprint, not stashed again under the previous one
+        self.previous_profile = self.profile_key
+        self._write_hash_file()
+        return restored
+
+    @property
+    def has_profile(self) -> bool:
+        """True if the hash file holds hashes recorded under this fingerprint."""
+        return self.profile_key in self.profiles
+
+    def needs_recompile(self, module: ParsedModule, stamp: str | None = None) -> bool:
         """Check if a module needs recompilation based on content hash.
 
         Also records the current hash for later saving.
+
+        Args:
+            module: The scanned module
+            stamp: Fingerprint key stored with the module's compiled tensors,
+                if known; a mismatch with the active fingerprint forces a
+                recompile even when the hash file says the content is unchanged.
         """
         current_hash = module.content_hash
         self.new_hashes[module.module_id] = current_hash
         old_hash = self.old_hashes.get(module.module_id)
+        if stamp is not None and self.fingerprint is not None and stamp != self.profile_key:
+            return True
         return old_hash != current_hash
 
     def get_deleted_modules(self, current_modules: list[ParsedModule]) -> list[str]:
@@ -52,7 +168,35 @@ class DeltaCompiler:
 
     def save_hashes(self) -> None:
         """Persist current hashes after successful compilation."""
-        os.makedirs(os.path.dirname(self.hash_file), exist_ok=True)
-        with open(self.hash_file, "w", encoding="utf-8") as f:
-            json.dump(self.new_hashes, f, indent=2)
+        self.profiles[self.profile_key] = {
+            "fingerprint": asdict(self.fingerprint) if self.fingerprint else {},
+            "modules": self.new_hashes,
+        }
+        self._write_hash_file()
         logger.info("Saved %d content hashes", len(self.new_hashes))
+
+    def _write_hash_file(self) -> None:
+        """Write the profiles with this fingerprint as active, atomically."""
+        os.makedirs(os.path.dirname(self.hash_file) or ".", exist_ok=True)
+        data = {
+            "version": HASH_FILE_VERSION,
+            "active": self.profile_key,
+            "profiles": self.profiles,
+        }
+        tmp_path = f"{self.hash_file}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.hash_file)
+
+
+def _move_replacing(src: str, dest: str) -> None:
+    """Move src to dest, deleting an existing dest only once src is in place."""
+    incoming = dest + ".incoming"
+    if os.path.exists(incoming):
+        # Left by an interrupted move; src still holds the real artifacts
+        shutil.rmtree(incoming)
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    shutil.move(src, incoming)
+    if os.path.exists(dest):
+        shutil.rmtree(dest)
+    os.replace(incoming, dest)
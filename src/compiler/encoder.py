@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import gc
 import logging
+from collections.abc import Callable
 
 from ..adapter.chat_template import build_rule_encoding_prompt
 from ..adapter.model_wrapper import AdaptedModelWrapper
@@ -18,6 +19,9 @@ from ..shared.types import EncodedModule, ParsedModule
 
 logger = logging.getLogger(__name__)
 
+# Modules are bucketed this many batches' worth at a time (see windowed_batches)
+BUCKET_WINDOW_BATCHES = 4
+
 
 class LatentEncoder:
     """Encodes parsed markdown modules into latent tensor representations."""
@@ -57,18 +61,8 @@ class LatentEncoder:
             )
         )
 
-        # Detach and move to CPU for storage
-        encoded = EncodedModule(
-            module_id=module.module_id,
-            module_type=module.module_type,
-            name=module.name,
-            description=module.description,
-            mean_embedding=mean_embedding.detach().cpu(),
-            layer_states=layer_states.detach().cpu(),
-            latent_trajectory=latent_trajectory.detach().cpu(),
-            content_hash=module.content_hash,
-            token_count=token_count,
-            metadata=module.metadata,
+        encoded = self._to_encoded(
+            module, token_count, mean_embedding, layer_states, latent_trajectory
         )
 
         # Free intermediate tensors
@@ -84,3 +78,104 @@ class LatentEncoder:
         )
 
         return encoded
+
+    def encode_modules(
+        self, batch: list[ParsedModule], latent_steps: int | None = None
+    ) -> list[EncodedModule]:
+        """Encode several modules with one batched forward pass per latent step.
+
+        Prompts are left-padded to the longest module in the batch, so callers
+        should group modules of similar token length (see bucket_by_length).
+
+        Args:
+            batch: Parsed modules to encode together
+            latent_steps: Number of latent reasoning steps
+
+        Returns:
+            EncodedModule list in the same order as batch
+        """
+        if len(batch) == 1:
+            return [self.encode_module(batch[0], latent_steps=latent_steps)]
+
+        logger.debug("Encoding batch of %d modules", len(batch))
+
+        token_counts = [self.wrapper.get_token_count(m.content) for m in batch]
+        messages_batch = [
+            build_rule_encoding_prompt(
+                module_type=m.module_type,
+                module_name=m.name,
+                content=m.content,
+            )
+            for m in batch
+        ]
+
+        results = self.wrapper.generate_latent_steps_batch(
+            messages_batch=messages_batch,
+            n_steps=latent_steps,
+        )
+
+        encoded = [
+            self._to_encoded(module, token_count, *tensors)
+            for module, token_count, tensors in zip(batch, token_counts, results)
+        ]
+
+        gc.collect()
+        return encoded
+
+    def _to_encoded(
+        self,
+        module: ParsedModule,
+        token_count: int,
+        mean_embedding,
+        layer_states,
+        latent_trajectory,
+    ) -> EncodedModule:
+        """Detach tensors, move them to CPU and wrap them in an EncodedModule."""
+        # .clone() drops the reference to the batched parent storage
+        return EncodedModule(
+            module_id=module.module_id,
+            module_type=module.module_type,
+            name=module.name,
+            description=module.description,
+            mean_embedding=mean_embedding.detach().cpu().clone(),
+            layer_states=layer_states.detach().cpu().clone(),
+            latent_trajectory=latent_trajectory.detach().cpu().clone(),
+            content_hash=module.content_hash,
+            token_count=token_count,
+            metadata=module.metadata,
+        )
+
+
+def bucket_by_length(
+    modules: list[ParsedModule],
+    batch_size: int,
+    length_fn: Callable[[ParsedModule], int],
+) -> list[list[ParsedModule]]:
+    """Group modules into batches of similar length to keep padding waste low.
+
+    Modules are sorted by length_fn and cut into consecutive chunks of
+    batch_size, so every batch pads to a length close to its own members.
+    """
+    if batch_size <= 1:
+        return [[m] for m in modules]
+    ordered = sorted(modules, key=length_fn)
+    return [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+
+
+def windowed_batches(
+    modules: list[ParsedModule],
+    batch_size: int,
+    length_fn: Callable[[ParsedModule], int],
+) -> list[list[ParsedModule]]:
+    """bucket_by_length over consecutive windows of BUCKET_WINDOW_BATCHES batches.
+
+    A streaming compile can only bucket the modules it has seen so far, so every
+    compile path forms its batches this way: given the same module order, the
+    streaming, in-process and sharded builds encode identical batches.
+    """
+    window = max(1, batch_size) * BUCKET_WINDOW_BATCHES
+    return [
+        batch
+        for start in range(0, len(modules), window)
+        for batch in bucket_by_length(modules[start:start + window], batch_size, length_fn)
+    ]
@@ -3,6 +3,39 @@
 Builds a NumPy-based cosine similarity index from compiled module embeddings.
 For ~100 modules, NumPy is sufficient (no FAISS needed). Dimension varies by model
 (Qwen3-4B: 2560, Qwen3-14B: 5120, Qwen2.5-1.5B: 1536).
+
+Delta compiles patch a saved index instead of rebuilding it: upsert() and
+remove() edit the in-memory arrays, and save_delta() replaces
+embeddings.npy (never rewriting it in place, since servers may have it
+mapped) and appends only the entry changes to manifest.log.jsonl. The log
+is replayed on load and folded back into manifest.json once it grows large.
+
+Storage modes: "float32" (default) keeps the full matrix in memory. "float16"
+and "int8" (symmetric, one scale per row) keep only a quantized copy in
+memory and memory-map embeddings.npy: a query scores the quantized matrix,
+then rescores the best candidates exactly in float32 from the mapped file.
+The quantized copy is saved next to embeddings.npy and rebuilt on load when
+it is missing or older than embeddings.npy.
+
+Loading: with mmap=True a float32 index memory-maps embeddings.npy read-only
+as well, so server workers share one copy in the page cache. save() writes
+manifest.bin (see manifest.py) next to manifest.json; load() prefers it when
+it is current, mapping the entry columns instead of parsing JSON, and only
+builds IndexEntry objects for rows that are accessed. The per-row lookups
+(module_id → row, keyword postings, type layout) are built on first use, so
+a load does no per-entry work.
+
+Rows are stored grouped by module_type: build() orders them that way and
+save() regroups rows that upserts appended out of place. A single-type query
+then scores one contiguous block of the matrix (or of its quantized copy), a
+slice rather than a gather. TypeLayout keeps the per-type row masks and
+ranges; a type whose rows are not contiguous (an old index, or delta upserts
+since the last full save) falls back to gathering its rows. Results are
+selected with argpartition instead of a full sort.
+
+Past ~100k entries brute-force scoring gets slow: a search backend (see
+ann.py) can narrow each query to a candidate set first. The "exact" backend
+scores every row and stays the reference.
 """
 
 from __future__ import annotations
@@ -14,10 +47,27 @@ from dataclasses import asdict, dataclass
 
 import numpy as np
 
+try:
+    import torch
+except ImportError:
+    torch = None  # type: ignore[assignment]
+
+from ..shared.tensor_io import save_npy
 from ..shared.types import EncodedModule
+from .ann import make_backend
+from .manifest import BINARY_MANIFEST, BinaryManifest, write_binary_manifest
+from .postings import KeywordPostings
 
 logger = logging.getLogger(__name__)
 
+MANIFEST_LOG = "manifest.log.jsonl"
+STORAGE_MODES = ("float32", "float16", "int8")
+# Quantized queries rescore max(top_k * RESCORE_FACTOR, RESCORE_MIN) candidates
+RESCORE_FACTOR = 8
+RESCORE_MIN = 64
+# Rows converted at a time when quantizing, bounding the float32 working set
+QUANTIZE_BLOCK_ROWS = 8192
+
 
 @dataclass
 class IndexEntry:
@@ -35,12 +85,35 @@ class NumpyIndex:
     """Cosine similarity index backed by NumPy arrays.
 
     Stores L2-normalized embeddings for fast cosine similarity via dot product.
+
+    Args:
+        storage: "float32", "float16" or "int8"; see the module docstring.
+        backend: Search backend name from ann.BACKENDS ("exact" or "ivf").
+        mmap: Memory-map a float32 embeddings.npy instead of reading it
+            (quantized storage modes always map it).
     """
 
-    def __init__(self):
+    def __init__(self, storage: str = "float32", backend: str = "exact", mmap: bool = False):
+        if storage not in STORAGE_MODES:
+            raise ValueError(f"Unknown index storage {storage!r}; expected one of {STORAGE_MODES}")
+        self.storage = storage
+        self.mmap = mmap
+        self.backend = make_backend(backend)
         self.embeddings: np.ndarray | None = None  # [N, hidden_dim], mean-centered + L2-normed
         self._centroid: np.ndarray | None = None    # [hidden_dim], mean vector for centering queries
-        self.entries: list[IndexEntry] = []
+        self.entries: list[IndexEntry] | BinaryManifest = []
+        # Key of the compile fingerprint the indexed tensors were built with
+        self.compile_fingerprint = ""
+        # Derived from the entries on first use, so loading stays O(1) in the entry count
+        self._rows: dict[str, int] | None = None  # module_id → row
+        self._keywords: KeywordPostings | None = None
+        self._types: TypeLayout | None = None
+        # Quantized copy of embeddings for storage != "float32", built lazily
+        self._approx: np.ndarray | None = None
+        self._scales: np.ndarray | None = None  # [N] per-row int8 scales
+        # Incremental save state: directory matching the last save/load, changes since
+        self._synced_dir: str | None = None
+        self._pending_ops: list[dict] = []
 
     def build(self, encoded_modules: list[EncodedModule]) -> None:
         """Build index from a list of encoded modules.
@@ -52,6 +125,9 @@ class NumpyIndex:
             logger.warning("No modules to index")
             return
 
+        # Group rows by type (stable), so a type filter scores one contiguous block
+        encoded_modules = sorted(encoded_modules, key=lambda m: m.module_type)
+
         # Stack embeddings into matrix
         embeddings_list = [m.mean_embedding.numpy() for m in encoded_modules]
         self.embeddings = np.stack(embeddings_list).astype(np.float32)  # [N, H]
@@ -72,6 +148,10 @@ class NumpyIndex:
             )
             for m in encoded_modules
         ]
+        self._reset_rows()
+        self._approx = self._scales = None
+        self.backend.build(self.embeddings)
+        self._synced_dir = None  # nothing on disk matches a fresh build
 
         logger.info(
             "Built index: %d modules, embedding dim=%d",
@@ -108,49 +188,269 @@ class NumpyIndex:
         query_norm = query_embedding / max(np.linalg.norm(query_embedding), 1e-8)
         query_norm = query_norm.astype(np.float32)
 
-        # Cosine similarity via dot product (both vectors are L2-normalized)
-        scores = self.embeddings @ query_norm  # [N]
-
         # Keyword boost: match query words against module_id, name, description
-        if query_text:
-            keywords = set(query_text.lower().split())
-            for i, entry in enumerate(self.entries):
-                match_text = f"{entry.module_id} {entry.name} {entry.description}".lower()
-                hits = sum(1 for kw in keywords if kw in match_text)
-                if hits > 0:
-                    scores[i] += 0.05 * hits  # Small boost per keyword match
-
-        # Apply module type filter (include only)
-        if module_type_filter:
-            mask = np.array([
-                e.module_type == module_type_filter for e in self.entries
-            ])
-            scores = np.where(mask, scores, -1.0)
-
-        # Apply module type exclusion
-        if exclude_types:
-            mask = np.array([
-                e.module_type not in exclude_types for e in self.entries
-            ])
-            scores = np.where(mask, scores, -1.0)
-
-        # Get top-k indices
-        top_indices = np.argsort(scores)[::-1][:top_k]
+        boost = self._keyword_boost(query_text)
+
+        # Module type filter (include only) and exclusion
+        types = self._type_layout()
+        keep = types.keep(module_type_filter, exclude_types)
+
+        # Narrow to the backend's candidates, if it has any (None = all rows)
+        candidates = self.backend.candidates(query_norm, min_rows=top_k)
+        if candidates is not None:
+            return self._query_candidates(
+                query_norm, candidates, boost, keep, top_k, min_score
+            )
+
+        span = types.span(module_type_filter) if module_type_filter else None
+
+        if self.storage != "float32":
+            # Approximate scores against the quantized matrix, then exact rescoring
+            block = span or slice(0, len(self.entries))
+            scores = self._approx_scores(query_norm, block) + boost[block]
+            if keep is not None:
+                scores = np.where(keep[block], scores, -np.inf)
+            return self._rescore(query_norm, scores, boost, keep, top_k, min_score, block.start)
+
+        if span is not None:
+            # Grouped rows: the type is one contiguous block, scored without a copy
+            rows = range(span.start, span.stop)
+            scores = self.embeddings[span] @ query_norm + boost[span]
+            if keep is not None:
+                scores = np.where(keep[span], scores, -np.inf)
+        elif module_type_filter:
+            # The type's rows are scattered: gather them
+            rows = types.rows(module_type_filter)
+            if keep is not None:
+                rows = rows[keep[rows]]
+            scores = self.embeddings[rows] @ query_norm + boost[rows]
+        else:
+            # Cosine similarity via dot product (both vectors are L2-normalized)
+            rows = None
+            scores = self.embeddings @ query_norm + boost  # [N]
+            if keep is not None:
+                scores = np.where(keep, scores, -np.inf)
+
+        return self._select(scores, top_k, min_score, rows)
+
+    def query_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int | list[int] = 3,
+        module_type_filters: list[str | None] | None = None,
+        min_score: float = 0.3,
+        query_texts: list[str | None] | None = None,
+        exclude_types: list[set[str] | None] | None = None,
+    ) -> list[list[tuple[IndexEntry, float]]]:
+        """query() for several query vectors, scored with one [Q, H] @ [H, N] product.
+
+        Per-query arguments are lists aligned with the rows of
+        query_embeddings; None leaves that argument unset for every query.
+        Quantized storage and candidate-selecting backends fall back to one
+        query() per row.
+
+        Returns:
+            One query() result list per query vector, in input order
+        """
+        n_queries = len(query_embeddings)
+        top_ks = top_k if isinstance(top_k, list) else [top_k] * n_queries
+        filters = module_type_filters or [None] * n_queries
+        texts = query_texts or [None] * n_queries
+        excludes = exclude_types or [None] * n_queries
+        if self.embeddings is None or len(self.entries) == 0:
+            return [[] for _ in range(n_queries)]
+        if self.storage != "float32" or self.backend.name != "exact":
+            return [
+                self.query(
+                    query,
+                    top_k=k,
+                    module_type_filter=type_filter,
+                    min_score=min_score,
+                    query_text=text,
+                    exclude_types=exclude,
+                )
+                for query, k, type_filter, text, exclude in zip(
+                    query_embeddings, top_ks, filters, texts, excludes
+                )
+            ]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-8)
+        all_scores = queries @ self.embeddings.T  # [Q, N]
+        types = self._type_layout()
 
         results = []
-        for idx in top_indices:
-            score = float(scores[idx])
-            if score >= min_score:
-                results.append((self.entries[idx], score))
+        for scores, k, type_filter, text, exclude in zip(
+            all_scores, top_ks, filters, texts, excludes
+        ):
+            scores = scores + self._keyword_boost(text)
+            keep = types.keep(type_filter, exclude)
+            if keep is not None:
+                scores = np.where(keep, scores, -np.inf)
+            results.append(self._select(scores, k, min_score))
+        return results
 
+    def _select(
+        self,
+        scores: np.ndarray,
+        top_k: int,
+        min_score: float,
+        rows: np.ndarray | range | None = None,
+    ) -> list[tuple[IndexEntry, float]]:
+        """Top entries of scores at or above min_score; scores[i] is row rows[i]."""
+        results = []
+        for i in top_k_indices(scores, top_k):
+            if scores[i] < min_score:
+                break
+            row = i if rows is None else rows[i]
+            results.append((self.entries[row], float(scores[i])))
         return results
 
+    def _keyword_boost(self, query_text: str | None) -> np.ndarray:
+        """Small boost per query keyword found in an entry's match text [N]."""
+        if not query_text:
+            return np.zeros(len(self.entries), dtype=np.float32)
+        if self._keywords is None:
+            self._keywords = KeywordPostings(self._match_texts())
+        hits = self._keywords.hit_counts(set(query_text.lower().split()))
+        return (0.05 * hits).astype(np.float32)
+
+    def _approx_scores(self, query_norm: np.ndarray, block: slice) -> np.ndarray:
+        """Dot products against a contiguous block of rows of the quantized matrix."""
+        if self._approx is None:
+            self._approx, self._scales = quantize_embeddings(self.embeddings, self.storage)
+        approx = self._approx[block]
+        if self.storage == "float16" and torch is not None:
+            # numpy has no vectorized half-precision kernels; torch does
+            query = torch.from_numpy(query_norm.astype(np.float16))
+            return (torch.from_numpy(approx) @ query).float().numpy()
+        # einsum casts in small buffered chunks, never materializing a float32 copy
+        scores = np.einsum("ij,j->i", approx, query_norm)
+        if self._scales is not None:
+            scores *= self._scales[block]
+        return scores
+
+    def _rescore(
+        self,
+        query_norm: np.ndarray,
+        approx: np.ndarray,
+        boost: np.ndarray,
+        keep: np.ndarray | None,
+        top_k: int,
+        min_score: float,
+        offset: int = 0,
+    ) -> list[tuple[IndexEntry, float]]:
+        """Exact float32 scores for the best approximate candidates.
+
+        approx[i] is the approximate score of row offset + i.
+        """
+        n_candidates = max(top_k * RESCORE_FACTOR, RESCORE_MIN)
+        # Sorted: sequential mapped reads
+        candidates = np.sort(top_k_indices(approx, n_candidates)) + offset
+        scores = np.asarray(self.embeddings[candidates], dtype=np.float32) @ query_norm
+        scores += boost[candidates]
+        if keep is not None:
+            scores = np.where(keep[candidates], scores, -np.inf)
+
+        return [
+            (self.entries[candidates[i]], float(scores[i]))
+            for i in top_k_indices(scores, top_k)
+            if scores[i] >= min_score
+        ]
+
+    def _query_candidates(
+        self,
+        query_norm: np.ndarray,
+        candidates: np.ndarray,
+        boost: np.ndarray,
+        keep: np.ndarray | None,
+        top_k: int,
+        min_score: float,
+    ) -> list[tuple[IndexEntry, float]]:
+        """Exact scores over the backend's candidate rows plus keyword-boosted rows."""
+        boosted = np.flatnonzero(boost)
+        while True:
+            rows = np.union1d(candidates, boosted) if len(boosted) else candidates
+            if keep is not None:
+                rows = rows[keep[rows]]
+            # Filters can leave too few rows: probe more lists until top_k fit
+            if len(rows) >= top_k or len(candidates) >= len(self.entries):
+                break
+            wider = self.backend.candidates(query_norm, min_rows=2 * max(len(candidates), 1))
+            if wider is None or len(wider) <= len(candidates):
+                break
+            candidates = wider
+
+        scores = np.asarray(self.embeddings[rows], dtype=np.float32) @ query_norm
+        scores += boost[rows]
+        return [
+            (self.entries[rows[i]], float(scores[i]))
+            for i in top_k_indices(scores, top_k)
+            if scores[i] >= min_score
+        ]
+
     def get_by_id(self, module_id: str) -> IndexEntry | None:
         """Look up a module by ID."""
-        for entry in self.entries:
-            if entry.module_id == module_id:
-                return entry
-        return None
+        row = self._row_map().get(module_id)
+        return self.entries[row] if row is not None else None
+
+    def upsert(self, encoded: EncodedModule) -> None:
+        """Insert a module, or replace its row if it is already indexed."""
+        vector = encoded.mean_embedding.float().numpy().astype(np.float32)
+        vector = vector / max(np.linalg.norm(vector), 1e-8)
+        entry = IndexEntry(
+            module_id=encoded.module_id,
+            name=encoded.name,
+            module_type=encoded.module_type,
+            description=encoded.description[:200],
+            token_count=encoded.token_count,
+            content_hash=encoded.content_hash,
+        )
+        self._ensure_writable()
+        self._invalidate_derived()
+        if self.embeddings is not None and self.embeddings.shape[1] != vector.shape[0]:
+            raise ValueError(
+                f"Embedding dim {vector.shape[0]} does not match index dim {self.embeddings.shape[1]}"
+            )
+
+        rows = self._row_map()
+        row = rows.get(encoded.module_id)
+        if row is None:
+            row = len(self.entries)
+            self.embeddings = (
+                vector[None, :]
+                if self.embeddings is None
+                else np.concatenate([self.embeddings, vector[None, :]])
+            )
+            self.entries.append(entry)
+            rows[entry.module_id] = row
+        else:
+            self.embeddings[row] = vector
+            self.entries[row] = entry
+
+        self._pending_ops.append({"op": "upsert", "row": row, "entry": asdict(entry)})
+
+    def remove(self, module_id: str) -> bool:
+        """Remove a module; the last row is moved into its slot.
+
+        Returns:
+            True if the module was indexed.
+        """
+        rows = self._row_map()
+        row = rows.pop(module_id, None)
+        if row is None:
+            return False
+        self._ensure_writable()
+        self._invalidate_derived()
+        last = len(self.entries) - 1
+        if row != last:
+            self.embeddings[row] = self.embeddings[last]
+            self.entries[row] = self.entries[last]
+            rows[self.entries[row].module_id] = row
+        self.embeddings = self.embeddings[:last]
+        self.entries.pop()
+        self._pending_ops.append({"op": "remove", "row": row})
+        return True
 
     def save(self, index_dir: str) -> None:
         """Persist index to disk.
@@ -162,21 +462,73 @@ class NumpyIndex:
         os.makedirs(index_dir, exist_ok=True)
 
         if self.embeddings is not None:
-            np.save(os.path.join(index_dir, "embeddings.npy"), self.embeddings)
+            self._ensure_writable()  # never overwrite the file we have mapped
+            self._group_rows_by_type()
+            # Replace rather than rewrite: other processes may have the old file mapped
+            save_npy(os.path.join(index_dir, "embeddings.npy"), self.embeddings)
+            self._save_quantized(index_dir)
+            self._save_backend(index_dir)
         if self._centroid is not None:
-            np.save(os.path.join(index_dir, "centroid.npy"), self._centroid)
+            save_npy(os.path.join(index_dir, "centroid.npy"), self._centroid)
 
         manifest = {
             "version": 1,
             "count": len(self.entries),
             "embedding_dim": self.embeddings.shape[1] if self.embeddings is not None else 0,
+            "compile_fingerprint": self.compile_fingerprint,
             "entries": [asdict(e) for e in self.entries],
         }
         with open(os.path.join(index_dir, "manifest.json"), "w", encoding="utf-8") as f:
             json.dump(manifest, f, indent=2, ensure_ascii=False)
+        write_binary_manifest(
+            os.path.join(index_dir, BINARY_MANIFEST),
+            self.entries,
+            manifest["embedding_dim"],
+            self.compile_fingerprint,
+        )
+
+        log_path = os.path.join(index_dir, MANIFEST_LOG)
+        if os.path.exists(log_path):
+            os.remove(log_path)
+        self._mark_synced(index_dir)
 
         logger.info("Saved index: %d entries → %s", len(self.entries), index_dir)
 
+    def save_delta(self, index_dir: str) -> None:
+        """Persist the changes since the last save() / load() of index_dir.
+
+        embeddings.npy is replaced as a whole; only the manifest is patched,
+        through manifest.log.jsonl. Falls back to a full save() when
+        index_dir is not the directory this index was loaded from.
+        """
+        if self._synced_dir != os.path.abspath(index_dir) or self.embeddings is None:
+            self.save(index_dir)
+            return
+        if not self._pending_ops:
+            return
+
+        self._ensure_writable()
+        save_npy(os.path.join(index_dir, "embeddings.npy"), self.embeddings)
+        self._save_quantized(index_dir)
+        self._save_backend(index_dir)
+
+        log_path = os.path.join(index_dir, MANIFEST_LOG)
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(op, ensure_ascii=False) + "\n" for op in self._pending_ops)
+        n_ops = len(self._pending_ops)
+        self._pending_ops.clear()
+
+        # Fold a long log back into manifest.json so loads stay fast
+        with open(log_path, "r", encoding="utf-8") as f:
+            log_length = sum(1 for _ in f)
+        if log_length > max(64, len(self.entries) // 4):
+            self.save(index_dir)
+            return
+
+        logger.info(
+            "Updated index: %d changes, %d entries → %s", n_ops, len(self.entries), index_dir
+        )
+
     def load(self, index_dir: str) -> None:
         """Load index from disk."""
         embeddings_path = os.path.join(index_dir, "embeddings.npy")
@@ -186,21 +538,292 @@ class NumpyIndex:
             logger.warning("Index files not found in %s", index_dir)
             return
 
-        self.embeddings = np.load(embeddings_path)
+        self._approx = self._scales = None
+        if self.storage == "float32" and not self.mmap:
+            self.embeddings = np.load(embeddings_path)
+        else:
+            self.embeddings = np.load(embeddings_path, mmap_mode="r")
+            if self.storage != "float32":
+                self._load_quantized(index_dir)
 
         centroid_path = os.path.join(index_dir, "centroid.npy")
         if os.path.exists(centroid_path):
             self._centroid = np.load(centroid_path)
 
-        with open(manifest_path, "r", encoding="utf-8") as f:
-            manifest = json.load(f)
-
-        self.entries = [
-            IndexEntry(**entry) for entry in manifest["entries"]
-        ]
+        log_path = os.path.join(index_dir, MANIFEST_LOG)
+        binary_path = os.path.join(index_dir, BINARY_MANIFEST)
+        if (
+            not os.path.exists(log_path)
+            and os.path.exists(binary_path)
+            and os.stat(binary_path).st_mtime_ns >= os.stat(manifest_path).st_mtime_ns
+        ):
+            self.entries = BinaryManifest(binary_path, IndexEntry)
+            self.compile_fingerprint = self.entries.compile_fingerprint
+        else:
+            # No binary manifest yet, or a delta log that only the JSON path replays
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+
+            self.entries = [
+                IndexEntry(**entry) for entry in manifest["entries"]
+            ]
+            self.compile_fingerprint = manifest.get("compile_fingerprint", "")
+
+            if os.path.exists(log_path):
+                with open(log_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            _replay(self.entries, json.loads(line))
+        if len(self.entries) != len(self.embeddings):
+            logger.warning(
+                "Index manifest has %d entries but %d embeddings; rebuild the index",
+                len(self.entries),
+                len(self.embeddings),
+            )
+        elif len(self.embeddings):
+            self.backend.load(index_dir, self.embeddings)
+        self._reset_rows()
+        self._mark_synced(index_dir)
 
         logger.info(
             "Loaded index: %d entries, dim=%d",
             len(self.entries),
             self.embeddings.shape[1] if self.embeddings is not None else 0,
         )
+
+    def _group_rows_by_type(self) -> None:
+        """Reorder rows into type groups, as build() lays them out (before a full save)."""
+        types = self._type_layout()
+        if types.grouped:
+            return
+        order = types.order
+        self.embeddings = self.embeddings[order]
+        self.entries = [self.entries[i] for i in order]
+        self._invalidate_derived()
+        self._reset_rows()
+
+    def _invalidate_derived(self) -> None:
+        """Drop the quantized copy and mark the backend stale after a row change."""
+        self._approx = self._scales = None
+        self._keywords = None
+        self._types = None
+        self.backend.invalidate()
+
+    def _ensure_writable(self) -> None:
+        """Swap mapped embeddings and entries for in-memory copies before mutating them."""
+        if isinstance(self.embeddings, np.memmap):
+            self.embeddings = np.array(self.embeddings)
+        if not isinstance(self.entries, list):
+            self.entries = list(self.entries)
+
+    def _save_backend(self, index_dir: str) -> None:
+        if self.backend.stale:
+            self.backend.update(self.embeddings)  # rows changed since build/load
+        self.backend.save(index_dir)
+
+    def _save_quantized(self, index_dir: str) -> None:
+        if self.storage == "float32" or self.embeddings is None:
+            return
+        if self._approx is None:
+            self._approx, self._scales = quantize_embeddings(self.embeddings, self.storage)
+        save_npy(os.path.join(index_dir, _quantized_filename(self.storage)), self._approx)
+        if self._scales is not None:
+            save_npy(os.path.join(index_dir, "embeddings.i8.scale.npy"), self._scales)
+
+    def _load_quantized(self, index_dir: str) -> None:
+        """Load the quantized copy, rebuilding it if missing or stale."""
+        embeddings_path = os.path.join(index_dir, "embeddings.npy")
+        approx_path = os.path.join(index_dir, _quantized_filename(self.storage))
+        scale_path = os.path.join(index_dir, "embeddings.i8.scale.npy")
+        paths = [approx_path] + ([scale_path] if self.storage == "int8" else [])
+        if all(os.path.exists(p) for p in paths) and min(
+            os.stat(p).st_mtime_ns for p in paths
+        ) >= os.stat(embeddings_path).st_mtime_ns:
+            approx = np.load(approx_path)
+            scales = np.load(scale_path) if self.storage == "int8" else None
+            if approx.shape == self.embeddings.shape:
+                self._approx, self._scales = approx, scales
+                return
+
+        logger.info("Quantizing index embeddings to %s", self.storage)
+        self._approx, self._scales = quantize_embeddings(self.embeddings, self.storage)
+        try:
+            self._save_quantized(index_dir)
+        except OSError as e:
+            logger.warning("Failed to save quantized embeddings: %s", e)
+
+    def _reset_rows(self) -> None:
+        """Forget the row lookups; each is rebuilt from the entries when next needed."""
+        self._rows = None
+        self._keywords = None
+        self._types = None
+
+    def _row_map(self) -> dict[str, int]:
+        if self._rows is None:
+            self._rows = {module_id: i for i, module_id in enumerate(self._column("module_id"))}
+        return self._rows
+
+    def _type_layout(self) -> TypeLayout:
+        if self._types is None:
+            if isinstance(self.entries, BinaryManifest):
+                # Straight from the mapped type-code column, no strings decoded
+                self._types = TypeLayout.from_codes(
+                    self.entries.type_codes(), self.entries.type_names
+                )
+            else:
+                self._types = TypeLayout(self._column("module_type"))
+        return self._types
+
+    def _column(self, field: str) -> list:
+        """One field of every entry, read column-wise from a binary manifest."""
+        if isinstance(self.entries, BinaryManifest):
+            return self.entries.column(field)
+        return [getattr(e, field) for e in self.entries]
+
+    def _match_texts(self) -> list[str]:
+        if isinstance(self.entries, BinaryManifest):
+            columns = zip(
+                self._column("module_id"), self._column("name"), self._column("description")
+            )
+            return [f"{m} {n} {d}".lower() for m, n, d in columns]
+        return [_match_text(e) for e in self.entries]
+
+    def _mark_synced(self, index_dir: str) -> None:
+        self._synced_dir = os.path.abspath(index_dir)
+        self._pending_ops.clear()
+
+
+class TypeLayout:
+    """Per-type row masks, row ranges and a type-grouped row order for one set of rows.
+
+    Args:
+        module_types: module_type of each row, in row order
+    """
+
+    def __init__(self, module_types: list[str]):
+        names = sorted(set(module_types))
+        lookup = {name: i for i, name in enumerate(names)}
+        self._setup(np.array([lookup[t] for t in module_types], dtype=np.int32), names)
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, names: list[str]) -> TypeLayout:
+        """Layout from integer type codes, where row i has type names[codes[i]]."""
+        used = sorted(names[code] for code in np.unique(codes))
+        remap = np.zeros(len(names), dtype=np.int32)
+        for i, name in enumerate(used):
+            remap[names.index(name)] = i
+        layout = cls.__new__(cls)
+        layout._setup(remap[codes], used)
+        return layout
+
+    def _setup(self, codes: np.ndarray, names: list[str]) -> None:
+        """codes[i] indexes names, which are sorted and all present."""
+        self._codes = {name: i for i, name in enumerate(names)}
+        # Rows grouped by type, ascending within a type: type i is
+        # order[offsets[i]:offsets[i + 1]]
+        self.order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=len(names))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.masks = {name: codes == i for i, name in enumerate(names)}
+        self._n_rows = len(codes)
+        # Types whose rows are one contiguous run, scored as a slice
+        self._spans: dict[str, slice] = {}
+        for name, i in self._codes.items():
+            rows = self.order[self.offsets[i]:self.offsets[i + 1]]
+            if rows[-1] - rows[0] + 1 == len(rows):
+                self._spans[name] = slice(int(rows[0]), int(rows[-1]) + 1)
+        # Rows already in type order, as build() and save() lay them out
+        self.grouped = len(self._spans) == len(names) and all(
+            self._spans[name].start == self.offsets[i] for name, i in self._codes.items()
+        )
+        self._keep_cache: dict[tuple, np.ndarray | None] = {}
+
+    def rows(self, module_type: str) -> np.ndarray:
+        """Ascending row ids of one type (a view into the type order)."""
+        code = self._codes.get(module_type)
+        if code is None:
+            return self.order[:0]
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def span(self, module_type: str) -> slice | None:
+        """Row range of one type, or None if its rows are not contiguous (or absent)."""
+        return self._spans.get(module_type)
+
+    def keep(
+        self, module_type_filter: str | None, exclude_types: set[str] | None
+    ) -> np.ndarray | None:
+        """Boolean row mask for the filters [N], or None when nothing is filtered."""
+        if module_type_filter and module_type_filter not in self.masks:
+            return np.zeros(self._n_rows, dtype=bool)
+        # Unknown excluded types change nothing, which also bounds the cache
+        key = (
+            module_type_filter or None,
+            frozenset(t for t in exclude_types or () if t in self.masks),
+        )
+        if key in self._keep_cache:
+            return self._keep_cache[key]
+
+        keep = self.masks[module_type_filter] if module_type_filter else None
+        excluded = [self.masks[t] for t in key[1]]
+        if excluded:
+            mask = ~np.logical_or.reduce(excluded)
+            keep = mask if keep is None else keep & mask
+        self._keep_cache[key] = keep
+        return keep
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first (ties by ascending index)."""
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        part = np.argpartition(-scores, k - 1)[:k]
+        part.sort()
+    else:
+        part = np.arange(len(scores))
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def _match_text(entry: IndexEntry) -> str:
+    """Lowercased text that query keywords are matched against."""
+    return f"{entry.module_id} {entry.name} {entry.description}".lower()
+
+
+def _quantized_filename(storage: str) -> str:
+    return "embeddings.f16.npy" if storage == "float16" else "embeddings.i8.npy"
+
+
+def quantize_embeddings(
+    matrix: np.ndarray, storage: str
+) -> tuple[np.ndarray, np.ndarray | None]:
+    """Quantize an [N, H] float32 matrix for approximate scoring.
+
+    Returns:
+        (float16 matrix, None) for "float16", or (int8 matrix, float32
+        per-row scales) for "int8", where row ≈ int8_row * scale.
+    """
+    if storage == "float16":
+        return np.asarray(matrix, dtype=np.float16), None
+    quantized = np.empty(matrix.shape, dtype=np.int8)
+    scales = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), QUANTIZE_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + QUANTIZE_BLOCK_ROWS], dtype=np.float32)
+        block_scales = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+        quantized[start:start + len(block)] = np.round(block / block_scales[:, None])
+        scales[start:start + len(block)] = block_scales
+    return quantized, scales
+
+
+def _replay(entries: list[IndexEntry], op: dict) -> None:
+    """Apply one manifest log operation, mirroring upsert() / remove()."""
+    row = op["row"]
+    if op["op"] == "upsert":
+        entry = IndexEntry(**op["entry"])
+        if row == len(entries):
+            entries.append(entry)
+        else:
+            entries[row] = entry
+    elif op["op"] == "remove":
+        last = entries.pop()
+        if row < len(entries):
+            entries[row] = last
@@ -0,0 +1,108 @@
+"""Append-only journal of modules whose tensors are safely on disk.
+
+Each line records one module saved during the current compile run:
+    {"module_id": ..., "content_hash": ..., "fingerprint": ...}
+
+A line is written (and flushed) only after save_encoded_module has renamed
+the finished .safetensors file into place, so every journaled module is
+complete even if the process is killed right after. `--resume` reads the
+journal and skips modules whose content hash and compile fingerprint still
+match. The journal is removed once a run finishes without failures.
+
+Each line is one write() to a file opened with O_APPEND, so several worker
+processes can share one journal file. A torn last line is cut off when the
+journal is loaded, so later records never merge into it.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+
+from ..shared.types import EncodedModule, ParsedModule
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOURNAL_FILE = "data/cache/compile_journal.jsonl"
+
+
+class CompileJournal:
+    """Record and query per-module compile checkpoints."""
+
+    def __init__(self, path: str = DEFAULT_JOURNAL_FILE, fingerprint: str = ""):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done: dict[str, str] = {}  # module_id → content_hash
+        self._fd: int | None = None
+        self._lock = threading.Lock()
+
+    def load(self) -> int:
+        """Read checkpoints left by a previous run for this fingerprint.
+
+        A torn last line (the process died mid-write) is ignored and truncated
+        away, so the next record starts on a line of its own.
+
+        Returns:
+            Number of completed modules found.
+        """
+        self.done = {}
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            if complete < len(data):
+                f.truncate(complete)
+        for line in data[:complete].decode("utf-8", errors="replace").splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("fingerprint") == self.fingerprint:
+                self.done[record["module_id"]] = record["content_hash"]
+        logger.info("Journal: %d modules already compiled", len(self.done))
+        return len(self.done)
+
+    def is_done(self, module: ParsedModule) -> bool:
+        return self.done.get(module.module_id) == module.content_hash
+
+    def reset(self) -> None:
+        """Start a fresh journal, discarding checkpoints from earlier runs."""
+        self.close()
+        self.done = {}
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def record(self, encoded: EncodedModule) -> None:
+        """Append a checkpoint for a module whose tensors were just saved."""
+        line = json.dumps({
+            "module_id": encoded.module_id,
+            "content_hash": encoded.content_hash,
+            "fingerprint": self.fingerprint,
+        }) + "\n"
+        with self._lock:
+            if self._fd is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            os.write(self._fd, line.encode("utf-8"))
+            self.done[encoded.module_id] = encoded.content_hash
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def remove(self) -> None:
+        """Delete the journal after a run that completed without failures."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
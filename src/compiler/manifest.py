@@ -0,0 +1,150 @@
+"""Columnar binary manifest for NumpyIndex: lazy, memory-mapped entry metadata.
+
+manifest.bin holds the same entries as manifest.json, column by column:
+
+    b"ACMANIF1"  magic
+    uint64       header length
+    JSON header  count, module type names, and dtype / offset / length per column
+    columns      raw arrays, each 64-byte aligned
+
+String fields are stored as one UTF-8 blob of "\\0"-separated values plus an
+int64 byte offset per value, so a single value is one slice and decode, and a
+whole column is one decode and split. module_type is an int16 code into the
+header's type names. Loading maps the file and parses only the header;
+IndexEntry objects are created on first access to each row.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+BINARY_MANIFEST = "manifest.bin"
+_MAGIC = b"ACMANIF1"
+_ALIGN = 64
+_STRING_FIELDS = ("module_id", "name", "description", "content_hash")
+
+
+def write_binary_manifest(
+    path: str, entries: Sequence, embedding_dim: int, compile_fingerprint: str = ""
+) -> None:
+    """Write entries (IndexEntry-like objects) to path atomically."""
+    type_names = sorted({e.module_type for e in entries})
+    type_codes = {name: i for i, name in enumerate(type_names)}
+    arrays: dict[str, np.ndarray] = {
+        "module_type": np.array([type_codes[e.module_type] for e in entries], dtype=np.int16),
+        "token_count": np.array([e.token_count for e in entries], dtype=np.int64),
+    }
+    for field in _STRING_FIELDS:
+        # NUL separates values, so it cannot occur inside one
+        encoded = [getattr(e, field).replace("\0", "").encode("utf-8") for e in entries]
+        lengths = np.array([len(b) + 1 for b in encoded], dtype=np.int64)
+        arrays[f"{field}.data"] = np.frombuffer(b"\0".join(encoded), dtype=np.uint8)
+        arrays[f"{field}.offsets"] = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+    columns = {}
+    offset = 0
+    for name, array in arrays.items():
+        columns[name] = {"dtype": array.dtype.str, "offset": offset, "length": len(array)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        "version": 1,
+        "count": len(entries),
+        "embedding_dim": embedding_dim,
+        "compile_fingerprint": compile_fingerprint,
+        "types": type_names,
+        "columns": columns,
+    }).encode("utf-8")
+    # Pad so the first column starts aligned
+    prefix = len(_MAGIC) + 8
+    header += b" " * (-(prefix + len(header)) % _ALIGN)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            data = array.tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % _ALIGN))
+    os.replace(tmp_path, path)
+
+
+class BinaryManifest(Sequence):
+    """Read-only entry sequence backed by a mapped manifest.bin.
+
+    Args:
+        path: manifest.bin path
+        entry_type: Class built from each row (IndexEntry)
+    """
+
+    def __init__(self, path: str, entry_type: type):
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a binary index manifest")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+        data_start = len(_MAGIC) + 8 + header_length
+
+        self._entry_type = entry_type
+        self.count: int = header["count"]
+        self.embedding_dim: int = header["embedding_dim"]
+        self.compile_fingerprint: str = header.get("compile_fingerprint", "")
+        self.type_names: list[str] = header["types"]
+        data = (
+            np.memmap(path, dtype=np.uint8, mode="r")
+            if os.path.getsize(path) > data_start
+            else np.zeros(data_start, dtype=np.uint8)
+        )
+        self._columns = {}
+        for name, spec in header["columns"].items():
+            dtype = np.dtype(spec["dtype"])
+            start = data_start + spec["offset"]
+            end = start + spec["length"] * dtype.itemsize
+            self._columns[name] = data[start:end].view(dtype)
+        self._cache: dict[int, object] = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(self.count))]
+        if row < 0:
+            row += self.count
+        if not 0 <= row < self.count:
+            raise IndexError(row)
+        entry = self._cache.get(row)
+        if entry is None:
+            fields = {field: self._string(field, row) for field in _STRING_FIELDS}
+            entry = self._entry_type(
+                module_type=self.type_names[self._columns["module_type"][row]],
+                token_count=int(self._columns["token_count"][row]),
+                **fields,
+            )
+            self._cache[row] = entry
+        return entry
+
+    def column(self, field: str) -> list:
+        """All values of one field, in row order, without building entries."""
+        if field == "module_type":
+            return [self.type_names[code] for code in self._columns["module_type"].tolist()]
+        if field == "token_count":
+            return self._columns["token_count"].tolist()
+        if not self.count:
+            return []
+        return self._columns[f"{field}.data"].tobytes().decode("utf-8").split("\0")
+
+    def type_codes(self) -> np.ndarray:
+        """module_type of every row as an index into type_names (a mapped view)."""
+        return self._columns["module_type"]
+
+    def _string(self, field: str, row: int) -> str:
+        offsets = self._columns[f"{field}.offsets"]
+        start, end = int(offsets[row]), int(offsets[row + 1]) - 1
+        return self._columns[f"{field}.data"][start:end].tobytes().decode("utf-8")
@@ -7,19 +7,34 @@ Each module gets its own .safetensors file containing:
 
 Metadata stored as safetensors string metadata:
 - module_id, module_type, name, description, content_hash, token_count
+- compile_fingerprint (optional): see delta.CompileFingerprint
+
+A tensor directory may also hold a packed store (see shared.tensor_pack).
+A module's .safetensors file, when present, takes precedence over its pack
+entry: writes never touch the offset table (which would cost a table rewrite
+per module and race between compile worker processes), so a stale packed
+copy simply loses to the newer file. Packed modules without a file are
+served from the memory map. Deleting a module drops it from the table.
+pack_tensor_dir() / unpack_tensor_dir() convert between the two layouts.
 """
 
 from __future__ import annotations
 
 import logging
 import os
+import threading
 from pathlib import Path
 
+from ..shared import tensor_pack
 from ..shared.tensor_io import load_all_tensors, load_metadata, load_tensor, save_tensors
 from ..shared.types import EncodedModule
 
 logger = logging.getLogger(__name__)
 
+# base_dir → (table stat signature, store); reopened when the table changes
+_pack_cache: dict[str, tuple[tuple[int, int, int], tensor_pack.PackedTensorStore]] = {}
+_pack_lock = threading.RLock()
+
 
 def _sanitize_filename(module_id: str) -> str:
     """Sanitize module_id for use as a filename on all platforms.
@@ -31,12 +46,15 @@ def _sanitize_filename(module_id: str) -> str:
     return module_id
 
 
-def save_encoded_module(encoded: EncodedModule, base_dir: str) -> str:
+def save_encoded_module(
+    encoded: EncodedModule, base_dir: str, fingerprint: str | None = None
+) -> str:
     """Save an encoded module to a .safetensors file.
 
     Args:
         encoded: The encoded module with tensors
         base_dir: Base directory for tensor storage (e.g., 'data/tensors')
+        fingerprint: Compile fingerprint key to stamp into the metadata
 
     Returns:
         The file path where the module was saved
@@ -55,6 +73,8 @@ def save_encoded_module(encoded: EncodedModule, base_dir: str) -> str:
         "content_hash": encoded.content_hash,
         "token_count": str(encoded.token_count),
     }
+    if fingerprint:
+        metadata["compile_fingerprint"] = fingerprint
 
     # Build file path: base_dir/{type}s/{id}.safetensors
     # module_id like "agents/architect" → "agents/architect.safetensors"
@@ -63,6 +83,7 @@ def save_encoded_module(encoded: EncodedModule, base_dir: str) -> str:
     filename = safe_id.replace("/", os.sep) + ".safetensors"
     filepath = os.path.join(base_dir, filename)
 
+    # A packed entry for this module is now shadowed by the file (see _packed)
     save_tensors(tensors, filepath, metadata=metadata)
 
     logger.info("Saved %s → %s", encoded.module_id, filepath)
@@ -70,7 +91,10 @@ def save_encoded_module(encoded: EncodedModule, base_dir: str) -> str:
 
 
 def load_module_tensor(base_dir: str, module_id: str, tensor_name: str):
-    """Load a single tensor from a module's safetensors file via mmap.
+    """Load a single tensor from a module.
+
+    Packed modules without a newer file return a zero-copy slice of the
+    pack's memory map; otherwise the module's safetensors file is read via mmap.
 
     Args:
         base_dir: Base directory for tensor storage
@@ -80,38 +104,81 @@ def load_module_tensor(base_dir: str, module_id: str, tensor_name: str):
     Returns:
         The loaded tensor
     """
+    store = _packed(base_dir, module_id)
+    if store is not None:
+        return store.get_tensor(module_id, tensor_name)
     filepath = _module_filepath(base_dir, module_id)
     return load_tensor(filepath, tensor_name)
 
 
+def load_module_tensors(base_dir: str, module_id: str, tensor_names: list[str]) -> list:
+    """Load several tensors of one module, opening its file at most once."""
+    store = _packed(base_dir, module_id)
+    if store is not None:
+        return [store.get_tensor(module_id, name) for name in tensor_names]
+    tensors = load_all_tensors(_module_filepath(base_dir, module_id))
+    return [tensors[name] for name in tensor_names]
+
+
 def load_module_all(base_dir: str, module_id: str):
-    """Load all tensors from a module's safetensors file.
+    """Load all tensors from a module.
 
     Returns:
         Dict of tensor_name -> tensor
     """
+    store = _packed(base_dir, module_id)
+    if store is not None:
+        return store.get_all(module_id)
     filepath = _module_filepath(base_dir, module_id)
     return load_all_tensors(filepath)
 
 
 def load_module_metadata(base_dir: str, module_id: str) -> dict[str, str]:
-    """Load metadata from a module's safetensors file without loading tensors."""
+    """Load metadata from a module without loading tensors."""
+    store = _packed(base_dir, module_id)
+    if store is not None:
+        return store.get_metadata(module_id)
     filepath = _module_filepath(base_dir, module_id)
     return load_metadata(filepath)
 
 
+def load_index_entry(base_dir: str, module_id: str) -> EncodedModule:
+    """Load a module's mean embedding and metadata as a minimal EncodedModule.
+
+    layer_states and latent_trajectory are placeholders; only the index
+    inputs are read.
+    """
+    import torch
+
+    meta = load_module_metadata(base_dir, module_id)
+    return EncodedModule(
+        module_id=module_id,
+        module_type=meta.get("module_type", "unknown"),
+        name=meta.get("name", module_id),
+        description=meta.get("description", ""),
+        mean_embedding=load_module_tensor(base_dir, module_id, "mean_embedding"),
+        layer_states=torch.zeros(1),  # Not needed for index
+        latent_trajectory=torch.zeros(1),  # Not needed for index
+        content_hash=meta.get("content_hash", ""),
+        token_count=int(meta.get("token_count", "0")),
+    )
+
+
 def delete_module(base_dir: str, module_id: str) -> bool:
-    """Delete a module's safetensors file.
+    """Delete a module's safetensors file and its packed entry.
 
     Returns:
-        True if the file was deleted, False if it didn't exist.
+        True if the module was deleted, False if it didn't exist.
     """
+    deleted = _drop_from_pack(base_dir, module_id)
     filepath = _module_filepath(base_dir, module_id)
     if os.path.exists(filepath):
         os.remove(filepath)
         logger.info("Deleted %s", filepath)
         return True
-    return False
+    if deleted:
+        logger.info("Deleted %s from packed store", module_id)
+    return deleted
 
 
 def list_compiled_modules(base_dir: str) -> list[str]:
@@ -124,16 +191,125 @@ def list_compiled_modules(base_dir: str) -> list[str]:
     if not base.exists():
         return []
 
-    module_ids = []
+    module_ids = set()
     for safetensor_file in base.rglob("*.safetensors"):
         # Convert path back to module_id
         relative = safetensor_file.relative_to(base)
         module_id = str(relative.with_suffix("")).replace(os.sep, "/")
-        module_ids.append(module_id)
+        module_ids.add(module_id)
+
+    store = open_pack(base_dir)
+    if store is not None:
+        module_ids.update(store.module_ids())
 
     return sorted(module_ids)
 
 
+def open_pack(base_dir: str) -> tensor_pack.PackedTensorStore | None:
+    """Return the packed store for base_dir, or None if it has none.
+
+    Stores are cached per directory and reopened when the table changes.
+    """
+    table_path = os.path.join(base_dir, tensor_pack.TABLE_FILENAME)
+    try:
+        st = os.stat(table_path)
+    except FileNotFoundError:
+        _pack_cache.pop(base_dir, None)
+        return None
+    signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+    with _pack_lock:
+        cached = _pack_cache.get(base_dir)
+        if cached is None or cached[0] != signature:
+            cached = (signature, tensor_pack.PackedTensorStore(base_dir))
+            _pack_cache[base_dir] = cached
+    return cached[1]
+
+
+def pack_tensor_dir(base_dir: str, remove_files: bool = True) -> int:
+    """Fold every module in base_dir into a new packed store.
+
+    Per-file modules take precedence over entries already in the pack.
+
+    Args:
+        base_dir: Tensor directory to pack
+        remove_files: Delete the .safetensors files once they are packed
+
+    Returns:
+        Number of modules in the new pack.
+    """
+    module_ids = list_compiled_modules(base_dir)
+
+    def items():
+        for module_id in module_ids:
+            filepath = _module_filepath(base_dir, module_id)
+            if os.path.exists(filepath):
+                yield module_id, load_all_tensors(filepath), load_metadata(filepath)
+            else:
+                store = open_pack(base_dir)
+                yield module_id, store.get_all(module_id), store.get_metadata(module_id)
+
+    with _pack_lock:
+        count = tensor_pack.write_pack(base_dir, items())
+
+    if remove_files:
+        for module_id in module_ids:
+            filepath = _module_filepath(base_dir, module_id)
+            if os.path.exists(filepath):
+                os.remove(filepath)
+        _remove_empty_dirs(base_dir)
+    return count
+
+
+def unpack_tensor_dir(base_dir: str) -> int:
+    """Write every packed module back to its own .safetensors file.
+
+    The packed store is removed afterwards.
+
+    Returns:
+        Number of modules unpacked.
+    """
+    store = open_pack(base_dir)
+    if store is None:
+        return 0
+    count = 0
+    for module_id in store.module_ids():
+        filepath = _module_filepath(base_dir, module_id)
+        if not os.path.exists(filepath):
+            tensors = {k: v.clone() for k, v in store.get_all(module_id).items()}
+            save_tensors(tensors, filepath, metadata=store.get_metadata(module_id))
+            count += 1
+    with _pack_lock:
+        tensor_pack.remove_pack(base_dir)
+        _pack_cache.pop(base_dir, None)
+    logger.info("Unpacked %d modules in %s", count, base_dir)
+    return count
+
+
+def _packed(base_dir: str, module_id: str) -> tensor_pack.PackedTensorStore | None:
+    """The pack serving module_id, or None if it is unpacked or has a newer file."""
+    store = open_pack(base_dir)
+    if store is None or module_id not in store:
+        return None
+    if os.path.exists(_module_filepath(base_dir, module_id)):
+        return None
+    return store
+
+
+def _drop_from_pack(base_dir: str, module_id: str) -> bool:
+    """Remove a module from base_dir's offset table if it is there."""
+    store = open_pack(base_dir)
+    if store is None or module_id not in store:
+        return False
+    with _pack_lock:
+        return tensor_pack.drop_from_pack(base_dir, [module_id]) > 0
+
+
+def _remove_empty_dirs(base_dir: str) -> None:
+    for dirpath, _, _ in sorted(os.walk(base_dir), key=lambda w: -len(w[0])):
+        if dirpath != base_dir and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
+
 def _module_filepath(base_dir: str, module_id: str) -> str:
     """Convert module_id to filesystem path."""
     safe_id = _sanitize_filename(module_id)
@@ -0,0 +1,292 @@
+"""Streaming scan → encode → persist compile pipeline.
+
+Three stages connected by bounded queues:
+
+1. scan: a producer thread pulls ParsedModules from a (lazy) source such as
+   iter_repository(), so frontmatter parsing overlaps with the model.
+2. encode: the calling thread collects modules into length-bucketed batches
+   and runs the model. The model is only loaded once the first module arrives,
+   so a delta run with nothing to compile never pays for it.
+3. write: a small thread pool calls save_encoded_module, so disk I/O never
+   blocks the next forward pass.
+
+The bounded queues provide backpressure: a fast scanner cannot race ahead of
+the model, and a slow disk eventually stalls the encoder instead of piling up
+tensors in memory. Each stage records busy / blocked time so the CLI can report
+which stage is the bottleneck.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from ..shared.types import EncodedModule, ParsedModule
+from .encoder import BUCKET_WINDOW_BATCHES, LatentEncoder, bucket_by_length
+from .journal import CompileJournal
+from .persistence import save_encoded_module
+from .runner import CompileResult, encode_batch
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # end-of-stream sentinel
+
+
+@dataclass
+class StageStats:
+    """Timing for one pipeline stage."""
+
+    name: str
+    threads: int = 1
+    items: int = 0
+    busy_seconds: float = 0.0  # doing the stage's own work
+    starved_seconds: float = 0.0  # waiting on the upstream queue
+    blocked_seconds: float = 0.0  # waiting for room in the downstream queue
+
+    def utilisation(self, wall_seconds: float) -> float:
+        """Fraction of the stage's thread time spent working."""
+        if wall_seconds <= 0:
+            return 0.0
+        return self.busy_seconds / (wall_seconds * self.threads)
+
+
+class CompilePipeline:
+    """Overlap module parsing, model encoding and tensor writes."""
+
+    def __init__(
+        self,
+        encoder_factory: Callable[[], LatentEncoder],
+        output_dir: str,
+        batch_size: int = 1,
+        latent_steps: int | None = None,
+        writer_threads: int = 2,
+        queue_size: int = 16,
+        fingerprint: str | None = None,
+        journal: CompileJournal | None = None,
+    ):
+        self.encoder_factory = encoder_factory
+        self.encoder: LatentEncoder | None = None
+        self.output_dir = output_dir
+        self.batch_size = max(1, batch_size)
+        self.latent_steps = latent_steps
+        self.writer_threads = max(1, writer_threads)
+        self.queue_size = max(1, queue_size)
+        self.fingerprint = fingerprint
+        self.journal = journal
+
+        self.stats = {
+            "scan": StageStats("scan"),
+            "encode": StageStats("encode"),
+            "write": StageStats("write", threads=self.writer_threads),
+        }
+        self.model_load_seconds = 0.0
+        self.wall_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def run(
+        self,
+        source: Iterable[ParsedModule],
+        on_progress: Callable[[int], None] | None = None,
+    ) -> CompileResult:
+        """Compile every module produced by source.
+
+        Returns:
+            CompileResult with compiled modules in completion order.
+        """
+        result = CompileResult()
+        parsed_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        encoded_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        scan_error: list[BaseException] = []
+        stop = threading.Event()
+
+        t_start = time.perf_counter()
+        scanner = threading.Thread(
+            target=self._scan_stage, args=(source, parsed_q, scan_error, stop),
+            name="compile-scan", daemon=True,
+        )
+        writers = [
+            threading.Thread(
+                target=self._write_stage, args=(encoded_q, result, on_progress),
+                name=f"compile-write-{i}", daemon=True,
+            )
+            for i in range(self.writer_threads)
+        ]
+        scanner.start()
+        for writer in writers:
+            writer.start()
+
+        try:
+            self._encode_stage(parsed_q, encoded_q, result, on_progress)
+        finally:
+            for _ in writers:
+                encoded_q.put(_DONE)
+            for writer in writers:
+                writer.join()
+            # If encoding failed, the scanner may be blocked on a full queue
+            stop.set()
+            while scanner.is_alive():
+                try:
+                    parsed_q.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+            scanner.join()
+            self.wall_seconds = time.perf_counter() - t_start
+
+        if scan_error:
+            raise scan_error[0]
+        return result
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+
+    def _scan_stage(
+        self,
+        source: Iterable[ParsedModule],
+        parsed_q: queue.Queue,
+        scan_error: list[BaseException],
+        stop: threading.Event,
+    ) -> None:
+        stats = self.stats["scan"]
+        try:
+            iterator = iter(source)
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    module = next(iterator)
+                except StopIteration:
+                    stats.busy_seconds += time.perf_counter() - t0
+                    break
+                t1 = time.perf_counter()
+                parsed_q.put(module)
+                stats.busy_seconds += t1 - t0
+                stats.blocked_seconds += time.perf_counter() - t1
+                stats.items += 1
+        except BaseException as e:  # surfaced to the caller by run()
+            logger.exception("Scan stage failed")
+            scan_error.append(e)
+        finally:
+            parsed_q.put(_DONE)
+
+    def _encode_stage(
+        self,
+        parsed_q: queue.Queue,
+        encoded_q: queue.Queue,
+        result: CompileResult,
+        on_progress: Callable[[int], None] | None,
+    ) -> None:
+        stats = self.stats["encode"]
+        window_size = self.batch_size * BUCKET_WINDOW_BATCHES
+        finished = False
+
+        while not finished:
+            # Collect a window of modules, then bucket it by token length, exactly
+            # as windowed_batches() does for the in-process and sharded loops
+            window: list[ParsedModule] = []
+            while len(window) < window_size:
+                t0 = time.perf_counter()
+                item = parsed_q.get()
+                stats.starved_seconds += time.perf_counter() - t0
+                if item is _DONE:
+                    finished = True
+                    break
+                window.append(item)
+            if not window:
+                break
+
+            encoder = self._ensure_encoder()
+            t0 = time.perf_counter()
+            batches = bucket_by_length(
+                window,
+                self.batch_size,
+                lambda m, encoder=encoder: encoder.wrapper.get_token_count(m.content),
+            )
+            stats.busy_seconds += time.perf_counter() - t0
+
+            for batch in batches:
+                t0 = time.perf_counter()
+                failed: list[tuple[str, str]] = []
+                encoded_batch = encode_batch(encoder, batch, self.latent_steps, failed)
+                elapsed = time.perf_counter() - t0
+                stats.busy_seconds += elapsed
+                stats.items += len(batch)
+
+                with self._lock:
+                    result.failed.extend(failed)
+                    batch_stats = result.batch_stats.setdefault(len(batch), [0, 0.0])
+                    batch_stats[0] += len(batch)
+                    batch_stats[1] += elapsed
+                if on_progress and failed:
+                    on_progress(len(failed))
+
+                for encoded in encoded_batch:
+                    t0 = time.perf_counter()
+                    encoded_q.put(encoded)
+                    stats.blocked_seconds += time.perf_counter() - t0
+
+    def _write_stage(
+        self,
+        encoded_q: queue.Queue,
+        result: CompileResult,
+        on_progress: Callable[[int], None] | None,
+    ) -> None:
+        stats = self.stats["write"]
+        while True:
+            t0 = time.perf_counter()
+            encoded: EncodedModule = encoded_q.get()
+            t1 = time.perf_counter()
+            if encoded is _DONE:
+                with self._lock:
+                    stats.starved_seconds += t1 - t0
+                return
+            try:
+                save_encoded_module(encoded, self.output_dir, fingerprint=self.fingerprint)
+                if self.journal is not None:
+                    self.journal.record(encoded)
+                error = None
+            except Exception as e:
+                logger.exception("Failed to save %s", encoded.module_id)
+                error = str(e)
+            t2 = time.perf_counter()
+
+            with self._lock:
+                stats.starved_seconds += t1 - t0
+                stats.busy_seconds += t2 - t1
+                stats.items += 1
+                if error is None:
+                    result.compiled.append(encoded)
+                else:
+                    result.failed.append((encoded.module_id, error))
+            if on_progress:
+                on_progress(1)
+
+    def _ensure_encoder(self) -> LatentEncoder:
+        """Build the encoder (and load the model) on first use."""
+        if self.encoder is None:
+            t0 = time.perf_counter()
+            self.encoder = self.encoder_factory()
+            self.model_load_seconds = time.perf_counter() - t0
+        return self.encoder
+
+    def log_report(self) -> None:
+        """Log per-stage utilisation; the busiest stage is the bottleneck."""
+        wall = self.wall_seconds
+        if self.model_load_seconds:
+            logger.info("Model load: %.1fs (inside the encode stage)", self.model_load_seconds)
+        for stage in self.stats.values():
+            logger.info(
+                "Stage %-6s x%d: %d items, busy %.1fs (%.0f%%), starved %.1fs, blocked %.1fs",
+                stage.name,
+                stage.threads,
+                stage.items,
+                stage.busy_seconds,
+                100 * stage.utilisation(wall),
+                stage.starved_seconds,
+                stage.blocked_seconds,
+            )
+        bottleneck = max(self.stats.values(), key=lambda st: st.utilisation(wall))
+        logger.info("Pipeline wall time %.1fs, bottleneck: %s", wall, bottleneck.name)
@@ -0,0 +1,91 @@
+"""Keyword postings for NumpyIndex's query-text boost.
+
+The boost counts, per entry, how many query keywords occur as substrings of
+"{module_id} {name} {description}" (lowercased). A keyword has no whitespace,
+so it occurs in a text exactly when it occurs in one of the text's
+whitespace-separated tokens. The postings therefore map each distinct token
+to the entries containing it. A keyword is resolved by searching one string
+that joins all distinct tokens, which is much smaller than the corpus, and
+taking the union of the postings of the tokens it hits.
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections import OrderedDict
+from itertools import chain
+
+import numpy as np
+
+# Resolved keywords kept per index (queries repeat the same words)
+KEYWORD_CACHE_SIZE = 4096
+
+
+class KeywordPostings:
+    """Token → entry-id postings over a list of match texts.
+
+    Args:
+        texts: One lowercased match text per entry, in row order
+    """
+
+    def __init__(self, texts: list[str]):
+        self.n_entries = len(texts)
+        # One (token, entry) pair per distinct token of each text; the loops
+        # run inside dict/map/chain so loading a large index stays fast
+        token_sets = [set(text.split()) for text in texts]
+        pair_tokens = list(chain.from_iterable(token_sets))
+        token_ids = {token: i for i, token in enumerate(dict.fromkeys(pair_tokens))}
+        tokens = np.fromiter(
+            map(token_ids.__getitem__, pair_tokens), dtype=np.int64, count=len(pair_tokens)
+        )
+        entries = np.repeat(
+            np.arange(len(texts), dtype=np.int64), [len(t) for t in token_sets]
+        )
+        order = np.lexsort((entries, tokens))
+        # CSR postings: entries of token t are entries[offsets[t]:offsets[t + 1]]
+        self.entries = entries[order]
+        counts = np.bincount(tokens, minlength=len(token_ids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        # All distinct tokens joined by "\n", with the start offset of each
+        vocabulary = list(token_ids)
+        self._blob = "\n".join(vocabulary)
+        self._starts = []
+        position = 0
+        for token in vocabulary:
+            self._starts.append(position)
+            position += len(token) + 1
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def matching_entries(self, keyword: str) -> np.ndarray:
+        """Sorted ids of entries whose text contains keyword as a substring."""
+        cached = self._cache.get(keyword)
+        if cached is not None:
+            self._cache.move_to_end(keyword)
+            return cached
+
+        postings = []
+        position = self._blob.find(keyword)
+        while position != -1:
+            token = bisect.bisect_right(self._starts, position) - 1
+            postings.append(self.entries[self.offsets[token]:self.offsets[token + 1]])
+            # Skip the rest of this token: one hit per token is enough
+            next_start = (
+                self._starts[token + 1] if token + 1 < len(self._starts) else len(self._blob)
+            )
+            position = self._blob.find(keyword, next_start)
+        matched = (
+            np.unique(np.concatenate(postings)) if postings else np.empty(0, dtype=np.int64)
+        )
+
+        self._cache[keyword] = matched
+        if len(self._cache) > KEYWORD_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return matched
+
+    def hit_counts(self, keywords: set[str]) -> np.ndarray:
+        """Number of keywords contained in each entry's text [n_entries]."""
+        matched = [self.matching_entries(kw) for kw in keywords]
+        if not matched:
+            return np.zeros(self.n_entries, dtype=np.int64)
+        return np.bincount(np.concatenate(matched), minlength=self.n_entries)
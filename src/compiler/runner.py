@@ -0,0 +1,284 @@
+"""Compile loops: encode modules and persist them, in-process or sharded.
+
+compile_modules() runs in the calling process with an already loaded model.
+compile_sharded() runs compile_modules() in separate worker processes, each with
+its own model and torch thread budget. Every worker batches the full module list
+the same way (windowed_batches) and keeps every N-th batch. The CLI's streaming
+single-process build (CompilePipeline) forms its batches with the same windows,
+so for the same module order all three produce identical batches, and
+therefore byte-identical tensors. Workers write .safetensors files themselves
+and only send metadata plus the mean embedding back, which is all the parent
+needs to rebuild the index.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from ..shared.types import EncodedModule, ParsedModule
+from .encoder import LatentEncoder, windowed_batches
+from .journal import CompileJournal
+from .persistence import save_encoded_module
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CompileResult:
+    """Outcome of compiling a list of modules."""
+
+    compiled: list[EncodedModule] = field(default_factory=list)
+    failed: list[tuple[str, str]] = field(default_factory=list)  # (module_id, error)
+    batch_stats: dict[int, list[float]] = field(default_factory=dict)  # size → [modules, seconds]
+
+    def merge(self, other: CompileResult) -> None:
+        """Fold another result (e.g. from a worker shard) into this one."""
+        self.compiled.extend(other.compiled)
+        self.failed.extend(other.failed)
+        for size, (n_modules, seconds) in other.batch_stats.items():
+            stats = self.batch_stats.setdefault(size, [0, 0.0])
+            stats[0] += n_modules
+            stats[1] += seconds
+
+
+def compile_modules(
+    encoder: LatentEncoder,
+    modules: list[ParsedModule],
+    output_dir: str,
+    batch_size: int = 1,
+    latent_steps: int | None = None,
+    on_progress: Callable[[int], None] | None = None,
+    shard: tuple[int, int] | None = None,
+    fingerprint: str | None = None,
+    journal: CompileJournal | None = None,
+) -> CompileResult:
+    """Encode modules in length-bucketed batches and save each to output_dir.
+
+    A failed batch is retried one module at a time so a single bad module
+    does not sink its neighbours.
+
+    Args:
+        shard: Optional (shard_index, num_shards); only every num_shards-th
+            batch starting at shard_index is compiled.
+        fingerprint: Compile fingerprint key stamped into each saved file
+        journal: Checkpoint journal; each saved module is recorded in it
+    """
+    result = CompileResult()
+    batches = windowed_batches(
+        modules, batch_size, lambda m: encoder.wrapper.get_token_count(m.content)
+    )
+    if shard is not None:
+        shard_index, num_shards = shard
+        batches = batches[shard_index::num_shards]
+
+    for batch in batches:
+        t_batch = time.perf_counter()
+        encoded_batch = encode_batch(encoder, batch, latent_steps, result.failed)
+        stats = result.batch_stats.setdefault(len(batch), [0, 0.0])
+        stats[0] += len(batch)
+        stats[1] += time.perf_counter() - t_batch
+
+        for encoded in encoded_batch:
+            try:
+                save_encoded_module(encoded, output_dir, fingerprint=fingerprint)
+                result.compiled.append(encoded)
+                if journal is not None:
+                    journal.record(encoded)
+            except Exception as e:
+                logger.exception("Failed to save %s", encoded.module_id)
+                result.failed.append((encoded.module_id, str(e)))
+        if on_progress:
+            on_progress(len(batch))
+
+    return result
+
+
+def encode_batch(
+    encoder: LatentEncoder,
+    batch: list[ParsedModule],
+    latent_steps: int | None,
+    failed: list[tuple[str, str]],
+) -> list[EncodedModule]:
+    """Encode one batch, falling back to one-by-one encoding if it fails.
+
+    Modules that still fail are appended to failed as (module_id, error).
+    """
+    try:
+        return encoder.encode_modules(batch, latent_steps=latent_steps)
+    except Exception as e:
+        if len(batch) == 1:
+            logger.exception("Failed to compile %s", batch[0].module_id)
+            failed.append((batch[0].module_id, str(e)))
+            return []
+        logger.warning(
+            "Batch of %d failed (%s), retrying individually", len(batch), e, exc_info=True
+        )
+
+    encoded = []
+    for module in batch:
+        try:
+            encoded.append(encoder.encode_module(module, latent_steps=latent_steps))
+        except Exception as e:
+            logger.exception("Failed to compile %s", module.module_id)
+            failed.append((module.module_id, str(e)))
+    return encoded
+
+
+@dataclass
+class _ShardTask:
+    """Everything a worker process needs to compile one shard (must pickle)."""
+
+    modules: list[ParsedModule]
+    shard_index: int
+    num_shards: int
+    output_dir: str
+    batch_size: int
+    latent_steps: int | None
+    num_threads: int
+    wrapper_factory: Callable[..., Any]
+    wrapper_kwargs: dict[str, Any]
+    fingerprint: str | None = None
+    journal_path: str | None = None
+
+
+def _compile_shard(task: _ShardTask) -> CompileResult:
+    """Worker entry point: load a private model and compile one shard."""
+    import torch
+
+    torch.set_num_threads(task.num_threads)
+    wrapper = task.wrapper_factory(**task.wrapper_kwargs)
+    journal = (
+        CompileJournal(task.journal_path, task.fingerprint or "")
+        if task.journal_path
+        else None
+    )
+    try:
+        result = compile_modules(
+            LatentEncoder(wrapper),
+            task.modules,
+            task.output_dir,
+            batch_size=task.batch_size,
+            latent_steps=task.latent_steps,
+            shard=(task.shard_index, task.num_shards),
+            fingerprint=task.fingerprint,
+            journal=journal,
+        )
+    finally:
+        wrapper.cleanup()
+        if journal is not None:
+            journal.close()
+
+    # Tensors are already on disk; only the index inputs travel back
+    result.compiled = [
+        replace(e, layer_states=torch.zeros(1), latent_trajectory=torch.zeros(1))
+        for e in result.compiled
+    ]
+    return result
+
+
+def compile_sharded(
+    modules: list[ParsedModule],
+    output_dir: str,
+    workers: int,
+    batch_size: int = 1,
+    latent_steps: int | None = None,
+    threads_per_worker: int | None = None,
+    wrapper_factory: Callable[..., Any] | None = None,
+    wrapper_kwargs: dict[str, Any] | None = None,
+    on_progress: Callable[[int], None] | None = None,
+    fingerprint: str | None = None,
+    journal_path: str | None = None,
+) -> CompileResult:
+    """Compile modules across worker processes, one model per worker.
+
+    Args:
+        modules: Modules to compile
+        output_dir: Tensor output directory (written by the workers)
+        workers: Number of worker processes
+        batch_size: Per-worker encode batch size
+        latent_steps: Number of latent reasoning steps
+        threads_per_worker: torch intra-op threads per worker
+            (default: cpu_count // workers)
+        wrapper_factory: Picklable callable that builds the model wrapper
+            (default: AdaptedModelWrapper)
+        wrapper_kwargs: Keyword arguments for wrapper_factory
+        on_progress: Called with the module count of each finished shard
+        fingerprint: Compile fingerprint key stamped into each saved file
+        journal_path: Checkpoint journal the workers append saved modules to
+
+    Modules that no worker reports back (e.g. a worker crashed) are listed
+    as failed.
+
+    Returns:
+        CompileResult with compiled modules in the same order as modules.
+        Compiled entries carry mean_embedding and metadata only.
+    """
+    if wrapper_factory is None:
+        from ..adapter.model_wrapper import AdaptedModelWrapper
+
+        wrapper_factory = AdaptedModelWrapper
+    if threads_per_worker is None:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+
+    num_shards = max(1, min(workers, len(modules)))
+    logger.info(
+        "Compiling %d modules in %d shards (%d torch threads per worker)",
+        len(modules),
+        num_shards,
+        threads_per_worker,
+    )
+
+    merged = CompileResult()
+    # spawn: forking a process that already initialised torch threads can deadlock
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=num_shards, mp_context=context) as pool:
+        futures = [
+            pool.submit(
+                _compile_shard,
+                _ShardTask(
+                    modules=modules,
+                    shard_index=shard_index,
+                    num_shards=num_shards,
+                    output_dir=output_dir,
+                    batch_size=batch_size,
+                    latent_steps=latent_steps,
+                    num_threads=threads_per_worker,
+                    wrapper_factory=wrapper_factory,
+                    wrapper_kwargs=wrapper_kwargs or {},
+                    fingerprint=fingerprint,
+                    journal_path=journal_path,
+                ),
+            )
+            for shard_index in range(num_shards)
+        ]
+        errors = []
+        for future in as_completed(futures):
+            try:
+                shard_result = future.result()
+            except Exception as e:
+                logger.exception("Compile worker failed")
+                errors.append(str(e))
+                continue
+            merged.merge(shard_result)
+            if on_progress:
+                on_progress(len(shard_result.compiled) + len(shard_result.failed))
+
+    reported = {e.module_id for e in merged.compiled} | {mid for mid, _ in merged.failed}
+    lost = [m.module_id for m in modules if m.module_id not in reported]
+    if lost:
+        reason = "; ".join(errors) or "not reported by any worker"
+        merged.failed.extend((mid, reason) for mid in lost)
+        if on_progress:
+            on_progress(len(lost))
+
+    # Restore input order so the index is laid out exactly as in a serial run
+    order = {m.module_id: i for i, m in enumerate(modules)}
+    merged.compiled.sort(key=lambda e: order[e.module_id])
+    return merged
@@ -0,0 +1,269 @@
+"""Stat-based scan cache: only re-parse source files that changed.
+
+The cache is a JSON file mapping each source file (relative to the repository
+root) to its mtime_ns, size and the ParsedModules it produced. A scan lists
+the source files, stats them, reuses the cached modules for every file whose
+(mtime_ns, size) is unchanged and parses the rest, in a process pool when
+there are enough of them to amortise its start-up. With nothing changed a
+scan costs one directory walk, one stat per file and one JSON load.
+iter_scan() does the same walk as a stream, for the compile pipeline, with a
+bounded number of files parsed ahead of the consumer.
+
+Frontmatter values YAML parses into non-JSON types (dates, for instance) are
+converted to strings when a file is parsed, so a module reads the same whether
+it was just parsed or loaded from the cache.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing
+import os
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from ..shared.types import ParsedModule
+from .scanner import discover_sources, parse_source
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCAN_CACHE = "data/cache/scan_cache.json"
+SCAN_CACHE_VERSION = 1
+# Frontmatter parsing is pure Python and holds the GIL, so threads do not
+# help; a process pool pays off only past this many changed files
+PROCESS_POOL_MIN_FILES = 256
+# iter_scan() holds at most this many files, parsed or in flight, ahead of its consumer
+READAHEAD_FILES = 1024
+
+
+class ScanCache:
+    """Incremental repository scanner backed by a JSON cache file."""
+
+    def __init__(self, cache_file: str = DEFAULT_SCAN_CACHE, max_workers: int | None = None):
+        self.cache_file = cache_file
+        self.max_workers = max_workers
+        self.files: dict[str, dict] = {}
+        self.stats = {"reused": 0, "parsed": 0, "removed": 0}
+        self._root: str | None = None
+
+    def load(self) -> None:
+        """Load the cache file; a missing or unreadable cache starts empty."""
+        self.files = {}
+        self._root = None
+        if not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == SCAN_CACHE_VERSION:
+                self.files = data.get("files", {})
+                self._root = data.get("root")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning("Failed to load scan cache: %s", e)
+
+    def save(self) -> bool:
+        """Write the cache file atomically.
+
+        Returns:
+            False if it could not be written; the scan result is still valid.
+        """
+        data = {"version": SCAN_CACHE_VERSION, "root": self._root, "files": self.files}
+        # Per-process temp name: several server workers may save at once
+        tmp_path = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            logger.warning("Failed to save scan cache %s: %s", self.cache_file, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return False
+        return True
+
+    def scan(self, repo_root: str | Path) -> list[ParsedModule]:
+        """Return all modules in repo_root, sorted by module_id.
+
+        Raises:
+            FileNotFoundError: If repo_root does not exist.
+        """
+        root = self._begin(repo_root)
+        files: dict[str, dict] = {}
+        changed: list[tuple[str, Path, str, os.stat_result]] = []
+        for rel, path, module_type, st, cached in self._sources(root):
+            if cached is not None:
+                files[rel] = cached
+                self.stats["reused"] += 1
+            else:
+                changed.append((rel, path, module_type, st))
+
+        if changed:
+            items = [(p, t) for _, p, t, _ in changed]
+            workers = self.max_workers or os.cpu_count() or 1
+            if len(changed) >= PROCESS_POOL_MIN_FILES and workers > 1:
+                with ProcessPoolExecutor(
+                    max_workers=workers, mp_context=multiprocessing.get_context()
+                ) as pool:
+                    parsed = list(pool.map(_parse_file, items, chunksize=64))
+            else:
+                parsed = [_parse_file(item) for item in items]
+            for (rel, _, module_type, st), modules in zip(changed, parsed):
+                files[rel] = _file_entry(st, module_type, modules)
+            self.stats["parsed"] = len(changed)
+
+        self._finish(files)
+        modules = [
+            ParsedModule(**fields)
+            for entry in files.values()
+            for fields in entry["modules"]
+        ]
+        modules.sort(key=lambda m: m.module_id)
+        self._log(len(modules))
+        return modules
+
+    def iter_scan(self, repo_root: str | Path) -> Iterator[ParsedModule]:
+        """Stream modules in discovery order, like scanner.iter_repository().
+
+        Unchanged files come straight from the cache. Changed files are parsed
+        in a process pool (past PROCESS_POOL_MIN_FILES of them) up to
+        READAHEAD_FILES ahead of the consumer, so it can start work before the
+        walk ends. The cache is saved once the walk completes.
+
+        Raises:
+            FileNotFoundError: If repo_root does not exist.
+        """
+        root = self._begin(repo_root)
+        sources = list(self._sources(root))
+        n_changed = sum(1 for *_, cached in sources if cached is None)
+        workers = self.max_workers or os.cpu_count() or 1
+        pool = None
+        if n_changed >= PROCESS_POOL_MIN_FILES and workers > 1:
+            # spawn: the compile pipeline runs this beside a thread using torch
+            pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+        files: dict[str, dict] = {}
+        # (rel, stat, module_type, cache entry | parse future | (path, module_type))
+        pending: deque[tuple[str, os.stat_result, str, Any]] = deque()
+        try:
+            for rel, path, module_type, st, cached in sources:
+                if cached is not None:
+                    source: Any = cached
+                elif pool is not None:
+                    source = pool.submit(_parse_file, (path, module_type))
+                else:
+                    source = (path, module_type)
+                pending.append((rel, st, module_type, source))
+                # Hand over every file that is ready; wait only once the readahead is full
+                while pending and (
+                    len(pending) >= READAHEAD_FILES
+                    or not isinstance(pending[0][3], Future)
+                    or pending[0][3].done()
+                ):
+                    yield from self._emit(*pending.popleft(), files)
+            while pending:
+                yield from self._emit(*pending.popleft(), files)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        self._finish(files)
+        self._log(sum(len(entry["modules"]) for entry in files.values()))
+
+    def _emit(
+        self, rel: str, st: os.stat_result, module_type: str, source: Any, files: dict
+    ) -> Iterator[ParsedModule]:
+        """Yield one iter_scan() file's modules, waiting for or running its parse."""
+        if isinstance(source, dict):
+            entry = source
+            self.stats["reused"] += 1
+        else:
+            modules = source.result() if isinstance(source, Future) else _parse_file(source)
+            entry = _file_entry(st, module_type, modules)
+            self.stats["parsed"] += 1
+        files[rel] = entry
+        for fields in entry["modules"]:
+            yield ParsedModule(**fields)
+
+    def _begin(self, repo_root: str | Path) -> Path:
+        root = Path(repo_root)
+        if not root.exists():
+            raise FileNotFoundError(f"Repository root not found: {root}")
+        self.load()
+        root_key = str(root.resolve())
+        if self._root != root_key:
+            self.files = {}
+            self._root = root_key
+        self.stats = {"reused": 0, "parsed": 0, "removed": 0}
+        return root
+
+    def _sources(self, root: Path) -> Iterator[tuple[str, Path, str, os.stat_result, dict | None]]:
+        """(relative path, path, module_type, stat, cache entry if unchanged) per source."""
+        prefix_len = len(str(root)) + 1
+        for path, module_type in discover_sources(root):
+            rel = str(path)[prefix_len:].replace(os.sep, "/")
+            st = os.stat(path)
+            cached = self.files.get(rel)
+            if (
+                cached is None
+                or cached["mtime_ns"] != st.st_mtime_ns
+                or cached["size"] != st.st_size
+                or cached["module_type"] != module_type
+            ):
+                cached = None
+            yield rel, path, module_type, st, cached
+
+    def _finish(self, files: dict[str, dict]) -> None:
+        """Adopt this walk's file entries and save them if anything changed."""
+        self.stats["removed"] = len(set(self.files) - set(files))
+        dirty = bool(self.stats["parsed"]) or bool(self.stats["removed"])
+        self.files = files
+        if dirty:
+            self.save()
+
+    def _log(self, n_modules: int) -> None:
+        logger.info(
+            "Scanned %d modules (%d files reused, %d parsed, %d removed)",
+            n_modules,
+            self.stats["reused"],
+            self.stats["parsed"],
+            self.stats["removed"],
+        )
+
+
+def _file_entry(st: os.stat_result, module_type: str, modules: list[dict]) -> dict:
+    return {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "module_type": module_type,
+        "modules": modules,
+    }
+
+
+def _parse_file(item: tuple[Path, str]) -> list[dict]:
+    """Worker: parse one source file into JSON-ready module dicts."""
+    path, module_type = item
+    modules = []
+    for m in parse_source(path, module_type):
+        fields = dict(vars(m))
+        fields["metadata"] = _json_value(m.metadata)
+        modules.append(fields)
+    return modules
+
+
+def _json_value(value: Any) -> Any:
+    """value with anything JSON cannot hold (dates, sets, ...) as strings."""
+    if isinstance(value, dict):
+        return {str(k): _json_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
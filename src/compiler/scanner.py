@@ -12,6 +12,7 @@ Traverses the repository structure and discovers all compilable modules:
 from __future__ import annotations
 
 import logging
+from collections.abc import Iterator
 from pathlib import Path
 
 from ..shared.markdown_parser import parse_hooks_json, parse_markdown_file
@@ -20,80 +21,112 @@ from ..shared.types import ParsedModule
 logger = logging.getLogger(__name__)
 
 
-def scan_repository(repo_root: str | Path) -> list[ParsedModule]:
+def scan_repository(
+    repo_root: str | Path, cache_file: str | None = None
+) -> list[ParsedModule]:
     """Traverse everything-claude-code and return all compilable modules.
 
     Args:
         repo_root: Path to the everything-claude-code repository root
+        cache_file: Optional scan cache (see scan_cache.ScanCache); only files
+            whose mtime or size changed since the last scan are re-parsed
 
     Returns:
         List of ParsedModule sorted by module_id for deterministic compilation order.
     """
+    if cache_file:
+        from .scan_cache import ScanCache
+
+        return ScanCache(cache_file).scan(repo_root)
+
+    modules = list(iter_repository(repo_root))
+
+    for module_type in ("agent", "skill", "rule", "hook", "command", "context"):
+        count = sum(1 for m in modules if m.module_type == module_type)
+        if count:
+            logger.info("Scanned %d %ss", count, module_type)
+
+    # Sort by module_id for deterministic order
+    modules.sort(key=lambda m: m.module_id)
+    logger.info("Total modules scanned: %d", len(modules))
+
+    return modules
+
+
+def iter_repository(
+    repo_root: str | Path, cache_file: str | None = None
+) -> Iterator[ParsedModule]:
+    """Stream modules from the repository as each source file is parsed.
+
+    Yields modules in discovery order (agents, skills, rules, hooks, commands,
+    contexts; sorted by path within each group) so consumers can start work
+    before the whole tree has been parsed. With a scan cache file, unchanged
+    files are read from the cache instead (see scan_cache.ScanCache.iter_scan).
+    """
+    if cache_file:
+        from .scan_cache import ScanCache
+
+        yield from ScanCache(cache_file).iter_scan(repo_root)
+        return
+
     root = Path(repo_root)
     if not root.exists():
         raise FileNotFoundError(f"Repository root not found: {root}")
 
-    modules: list[ParsedModule] = []
+    for path, module_type in discover_sources(root):
+        yield from parse_source(path, module_type)
+
+
+def discover_sources(root: Path) -> list[tuple[Path, str]]:
+    """List (source file, module_type) pairs without parsing any file."""
+    sources: list[tuple[Path, str]] = []
 
     # 1. Agents: agents/*.md
     agents_dir = root / "agents"
     if agents_dir.exists():
-        for md_file in sorted(agents_dir.glob("*.md")):
-            module = parse_markdown_file(md_file, "agent")
-            if module:
-                modules.append(module)
-        logger.info("Scanned %d agents", sum(1 for m in modules if m.module_type == "agent"))
+        sources.extend((f, "agent") for f in _sorted_md(agents_dir))
 
     # 2. Skills: skills/*/SKILL.md
     skills_dir = root / "skills"
     if skills_dir.exists():
         for skill_dir in sorted(skills_dir.iterdir()):
-            if skill_dir.is_dir():
-                skill_file = skill_dir / "SKILL.md"
-                if skill_file.exists():
-                    module = parse_markdown_file(skill_file, "skill")
-                    if module:
-                        modules.append(module)
-        logger.info("Scanned %d skills", sum(1 for m in modules if m.module_type == "skill"))
+            skill_file = skill_dir / "SKILL.md"
+            if skill_dir.is_dir() and skill_file.exists():
+                sources.append((skill_file, "skill"))
 
     # 3. Rules: rules/{common,typescript,python,golang}/*.md
     rules_dir = root / "rules"
     if rules_dir.exists():
         for lang_dir in sorted(rules_dir.iterdir()):
             if lang_dir.is_dir():
-                for md_file in sorted(lang_dir.glob("*.md")):
-                    module = parse_markdown_file(md_file, "rule")
-                    if module:
-                        modules.append(module)
-        logger.info("Scanned %d rules", sum(1 for m in modules if m.module_type == "rule"))
+                sources.extend((f, "rule") for f in _sorted_md(lang_dir))
 
-    # 4. Hooks: hooks/hooks.json
+    # 4. Hooks: hooks/hooks.json (one file, many modules)
     hooks_file = root / "hooks" / "hooks.json"
     if hooks_file.exists():
-        hook_modules = parse_hooks_json(hooks_file)
-        modules.extend(hook_modules)
-        logger.info("Scanned %d hooks", len(hook_modules))
+        sources.append((hooks_file, "hook"))
 
     # 5. Commands: commands/*.md
     commands_dir = root / "commands"
     if commands_dir.exists():
-        for md_file in sorted(commands_dir.glob("*.md")):
-            module = parse_markdown_file(md_file, "command")
-            if module:
-                modules.append(module)
-        logger.info("Scanned %d commands", sum(1 for m in modules if m.module_type == "command"))
+        sources.extend((f, "command") for f in _sorted_md(commands_dir))
 
     # 6. Contexts: contexts/*.md
     contexts_dir = root / "contexts"
     if contexts_dir.exists():
-        for md_file in sorted(contexts_dir.glob("*.md")):
-            module = parse_markdown_file(md_file, "context")
-            if module:
-                modules.append(module)
-        logger.info("Scanned %d contexts", sum(1 for m in modules if m.module_type == "context"))
+        sources.extend((f, "context") for f in _sorted_md(contexts_dir))
 
-    # Sort by module_id for deterministic order
-    modules.sort(key=lambda m: m.module_id)
-    logger.info("Total modules scanned: %d", len(modules))
+    return sources
 
-    return modules
+
+def _sorted_md(directory: Path) -> list[Path]:
+    # Sorting by string is much cheaper than Path.__lt__ on large directories
+    return sorted(directory.glob("*.md"), key=str)
+
+
+def parse_source(path: Path, module_type: str) -> list[ParsedModule]:
+    """Parse one source file into its modules (hooks.json yields several)."""
+    if module_type == "hook":
+        return parse_hooks_json(path)
+    module = parse_markdown_file(path, module_type)
+    return [module] if module else []
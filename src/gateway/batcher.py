@@ -0,0 +1,189 @@
+"""Micro-batching of concurrent intent encodings.
+
+Each /v1/latent/query used to run its own forward pass, so concurrent
+requests queued behind one another. EncodeBatcher sits in front of
+IntentEncoder: the first request of a batch waits up to window_ms for others
+(or until max_batch_size are queued), then the whole batch is encoded in one
+padded forward pass on a worker thread and every caller gets its own vector.
+While a batch runs, new requests queue up and form the next one, so batches
+grow with load. Cached intents skip the queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+from typing import Any
+
+import numpy as np
+
+from .inference import InferenceExecutor
+from .intent_encoder import IntentEncoder
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_MS = 5.0
+DEFAULT_MAX_BATCH_SIZE = 16
+# Recent batches kept for the wait / encode time percentiles
+STATS_WINDOW = 1024
+
+
+class BatcherStats:
+    """Counters and recent timings of an EncodeBatcher."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.requests = 0
+        self.cache_hits = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.encoded = 0
+        self.encode_seconds = 0.0
+        self.batch_sizes: Counter[int] = Counter()
+        self.queue_wait_ms: deque[float] = deque(maxlen=STATS_WINDOW)
+        self.encode_ms: deque[float] = deque(maxlen=STATS_WINDOW)
+
+    def record_batch(self, waits_ms: list[float], encode_seconds: float) -> None:
+        self.batches += 1
+        self.encoded += len(waits_ms)
+        self.encode_seconds += encode_seconds
+        self.batch_sizes[len(waits_ms)] += 1
+        self.queue_wait_ms.extend(waits_ms)
+        self.encode_ms.append(encode_seconds * 1000)
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-ready summary for /v1/metrics."""
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "mean_batch_size": round(self.encoded / self.batches, 2) if self.batches else 0.0,
+            "batch_sizes": {str(size): n for size, n in sorted(self.batch_sizes.items())},
+            "queue_wait_ms": _percentiles(self.queue_wait_ms),
+            "encode_ms": _percentiles(self.encode_ms),
+            # Intents per second of forward-pass time, and over the whole uptime
+            "encoded_per_sec": (
+                round(self.encoded / self.encode_seconds, 1) if self.encode_seconds else 0.0
+            ),
+            "requests_per_sec": round(self.requests / (time.monotonic() - self.started), 2),
+        }
+
+
+class EncodeBatcher:
+    """Async micro-batcher for IntentEncoder.
+
+    Args:
+        encoder: Encoder whose encode_batch() runs the batched forward pass
+        window_ms: How long the first queued request waits for more
+        max_batch_size: Run the batch as soon as this many are queued
+        executor: Inference slots to run batches in (default: asyncio's thread pool)
+    """
+
+    def __init__(
+        self,
+        encoder: IntentEncoder,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        executor: InferenceExecutor | None = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.encoder = encoder
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.executor = executor
+        self.stats = BatcherStats()
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def encode(self, intent: str) -> np.ndarray:
+        """Encode one intent, batched with whatever else arrives meanwhile.
+
+        Returns:
+            L2-normalized query vector [hidden_dim], as IntentEncoder.encode()
+        """
+        self.stats.requests += 1
+        cached = self.encoder.cached(intent)
+        if cached is not None:
+            self.stats.cache_hits += 1
+            return cached
+
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._worker.get_loop() is not loop:
+            # First use, or the previous event loop is gone (e.g. a new TestClient)
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+        future = loop.create_future()
+        await self._queue.put((intent, future, time.perf_counter()))
+        return await future
+
+    async def close(self) -> None:
+        """Stop the worker; queued requests are cancelled."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while self._queue is not None and not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            future.cancel()
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window_ms / 1000
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            t_start = time.perf_counter()
+            waits_ms = [(t_start - queued) * 1000 for _, _, queued in batch]
+            try:
+                # Off the event loop, which keeps accepting (and queueing) requests
+                intents = [intent for intent, _, _ in batch]
+                if self.executor:
+                    vectors = await self.executor.run(self.encoder.encode_batch, intents)
+                else:
+                    vectors = await asyncio.to_thread(self.encoder.encode_batch, intents)
+            except Exception as e:
+                logger.warning(
+                    "Batched intent encoding failed (%d intents): %s",
+                    len(batch),
+                    e,
+                    exc_info=True,
+                )
+                self.stats.failed_batches += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats.record_batch(waits_ms, time.perf_counter() - t_start)
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+
+def _percentiles(values) -> dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    array = np.asarray(values)
+    return {
+        "p50": round(float(np.percentile(array, 50)), 3),
+        "p95": round(float(np.percentile(array, 95)), 3),
+        "max": round(float(array.max()), 3),
+    }
@@ -4,6 +4,10 @@ In retrieval-only mode (no LLM decoder), the dense_prompt needs to contain
 the actual module content instead of just metadata. This store reads the
 original markdown files from the vendor directory at startup and provides
 them by module_id at query time.
+
+When the compiler has written a content pack (see compiler.content_pack), the
+store maps that file instead: startup skips the repository scan, and bodies
+stay compressed on disk until a query asks for them.
 """
 
 from __future__ import annotations
@@ -11,6 +15,8 @@ from __future__ import annotations
 import logging
 from pathlib import Path
 
+from ..compiler.content_pack import ContentPack
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,12 +25,26 @@ class SourceContentStore:
 
     def __init__(self):
         self._content: dict[str, str] = {}
+        self._pack: ContentPack | None = None
+
+    def load_from_pack(self, path: str | Path) -> int:
+        """Map a prebuilt content pack; bodies are decompressed on demand.
+
+        Returns:
+            Number of modules in the pack (0 if it is missing or unreadable)
+        """
+        pack = ContentPack.open(str(path))
+        if pack is None:
+            return 0
+        self._pack = pack
+        logger.info("Mapped source content for %d modules from %s", len(pack), path)
+        return len(pack)
 
-    def load_from_repo(self, repo_root: str | Path) -> int:
+    def load_from_repo(self, repo_root: str | Path, cache_file: str | None = None) -> int:
         """Scan the vendor repository and cache all module content.
 
         Uses the same scanner logic as the compiler to ensure module_id
-        consistency.
+        consistency. With a scan cache file, unchanged files are not re-parsed.
 
         Returns:
             Number of modules loaded
@@ -37,7 +57,7 @@ class SourceContentStore:
             return 0
 
         try:
-            modules = scan_repository(root)
+            modules = scan_repository(root, cache_file=cache_file)
         except Exception as e:
             logger.error("Failed to scan repository: %s", e)
             return 0
@@ -50,10 +70,15 @@ class SourceContentStore:
 
     def get(self, module_id: str) -> str | None:
         """Get the original markdown content for a module."""
-        return self._content.get(module_id)
+        content = self._content.get(module_id)
+        if content is None and self._pack is not None:
+            content = self._pack.get(module_id)
+        return content
 
     def __len__(self) -> int:
+        if self._pack is not None:
+            return len(self._pack) + sum(1 for m in self._content if m not in self._pack)
         return len(self._content)
 
     def __contains__(self, module_id: str) -> bool:
-        return module_id in self._content
+        return module_id in self._content or (self._pack is not None and module_id in self._pack)
@@ -0,0 +1,135 @@
+"""Persistent, content-addressed cache of decoded dense prompts.
+
+LatentDecoder's in-process LRU is lost on every restart and duplicated per
+worker. DecodeCache keeps decoded text in one SQLite file (by default
+data/cache/decode_cache.sqlite3) shared by all workers and processes:
+
+- Keys hash the tool name, the sorted content hashes and compile fingerprints
+  of the decoded modules, the model name and the decode parameters, so a
+  module with new content, or recompiled with other settings (e.g.
+  --latent-steps), or a new model misses instead of serving stale text.
+- WAL mode and a busy timeout let several processes read and write at once.
+- At most max_entries rows are kept; the least recently used go first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DECODE_CACHE = "data/cache/decode_cache.sqlite3"
+DEFAULT_MAX_ENTRIES = 10000
+# Seconds a writer waits for another process's lock before giving up
+BUSY_TIMEOUT = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS decodes (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS decodes_accessed ON decodes (accessed);
+"""
+
+
+def decode_cache_key(
+    tool_name: str,
+    content_hashes: Sequence[str],
+    model_name: str,
+    max_tokens: int,
+    temperature: float,
+    top_p: float,
+    compile_fingerprints: Sequence[str] = (),
+) -> str:
+    """Content-addressed key of one decode; module order does not matter."""
+    payload = json.dumps([
+        tool_name,
+        sorted(content_hashes),
+        model_name,
+        max_tokens,
+        temperature,
+        top_p,
+        sorted(set(compile_fingerprints)),
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DecodeCache:
+    """SQLite-backed LRU of decoded text, safe across threads and processes.
+
+    Args:
+        path: SQLite file (parent directories are created)
+        max_entries: Rows kept; least recently used are evicted beyond this
+    """
+
+    def __init__(self, path: str = DEFAULT_DECODE_CACHE, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # One connection shared by this process's inference threads
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._conn.commit()
+
+    def get(self, key: str) -> str | None:
+        """Cached text for key (marking it recently used), or None."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT text FROM decodes WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE decodes SET accessed = ? WHERE key = ?", (time.time(), key)
+                )
+                self._conn.commit()
+                return row[0]
+        except sqlite3.Error as e:
+            # A busy or broken cache must not fail the query; decode instead
+            logger.warning("Decode cache read failed: %s", e)
+            return None
+
+    def put(self, key: str, text: str) -> None:
+        """Store text under key, evicting the least recently used beyond max_entries."""
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO decodes (key, text, accessed) VALUES (?, ?, ?)",
+                    (key, text, time.time()),
+                )
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM decodes").fetchone()
+                if count > self.max_entries:
+                    self._conn.execute(
+                        "DELETE FROM decodes WHERE key IN "
+                        "(SELECT key FROM decodes ORDER BY accessed LIMIT ?)",
+                        (count - self.max_entries,),
+                    )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Decode cache write failed: %s", e)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM decodes")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM decodes").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
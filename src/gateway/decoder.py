@@ -9,31 +9,43 @@ from __future__ import annotations
 
 import logging
 from collections import OrderedDict
+from collections.abc import Generator
 
 import torch
 
 from ..adapter.chat_template import build_compliance_decode_prompt, build_decode_prompt
-from ..adapter.config import MAX_DECODE_TOKENS
+from ..adapter.config import DECODE_TEMPERATURE, DECODE_TOP_P, MAX_DECODE_TOKENS
 from ..adapter.model_wrapper import AdaptedModelWrapper
 from ..shared.types import RetrievedModule
+from .decode_cache import DecodeCache, decode_cache_key
 
 logger = logging.getLogger(__name__)
 
 
 class LatentDecoder:
-    """Decode latent tensors into dense text instructions."""
+    """Decode latent tensors into dense text instructions.
+
+    Args:
+        model_wrapper: Model used for decoding
+        max_tokens: Generation limit per decode
+        cache_size: Entries of the in-process LRU
+        store: Optional persistent cache behind the LRU, shared across
+            restarts and workers
+    """
 
     def __init__(
         self,
         model_wrapper: AdaptedModelWrapper,
         max_tokens: int = MAX_DECODE_TOKENS,
         cache_size: int = 256,
+        store: DecodeCache | None = None,
     ):
         self.wrapper = model_wrapper
         self.max_tokens = max_tokens
-        # LRU cache: frozenset(module_ids) + tool_name → decoded text
+        # LRU cache: content-addressed key (see _make_cache_key) → decoded text
         self._cache: OrderedDict[str, str] = OrderedDict()
         self._cache_size = cache_size
+        self.store = store
 
     def decode(
         self,
@@ -54,13 +66,59 @@ class LatentDecoder:
 
         # Check cache
         cache_key = self._make_cache_key(retrieved_modules, tool_name)
-        if cache_key in self._cache:
-            self._cache.move_to_end(cache_key)
-            logger.debug("Decode cache hit")
-            return self._cache[cache_key]
+        cached = self._cached(cache_key)
+        if cached is not None:
+            return cached
+
+        # Decode: insert latent embeddings and generate text
+        combined_latent, messages = self._decode_inputs(retrieved_modules, tool_name)
+        dense_text = self.wrapper.decode_from_latent(
+            latent_embeddings=combined_latent,
+            decode_messages=messages,
+            max_new_tokens=self.max_tokens,
+        )
+        self._remember(cache_key, dense_text, len(retrieved_modules))
+        return dense_text
+
+    def decode_stream(
+        self,
+        retrieved_modules: list[RetrievedModule],
+        tool_name: str = "architect_consult",
+    ) -> Generator[str, None, str]:
+        """decode(), yielding text pieces as they are generated.
+
+        A cache hit yields the whole text at once. The cache is filled only
+        when the stream runs to completion, not when it is closed early.
+
+        Returns:
+            The text decode() would return (StopIteration.value)
+        """
+        if not retrieved_modules:
+            text = "No relevant rules or patterns found for this query."
+            yield text
+            return text
+
+        cache_key = self._make_cache_key(retrieved_modules, tool_name)
+        cached = self._cached(cache_key)
+        if cached is not None:
+            yield cached
+            return cached
+
+        combined_latent, messages = self._decode_inputs(retrieved_modules, tool_name)
+        dense_text = yield from self.wrapper.decode_from_latent_stream(
+            latent_embeddings=combined_latent,
+            decode_messages=messages,
+            max_new_tokens=self.max_tokens,
+        )
+        self._remember(cache_key, dense_text, len(retrieved_modules))
+        return dense_text
 
+    def _decode_inputs(
+        self, modules: list[RetrievedModule], tool_name: str
+    ) -> tuple[torch.Tensor, list[dict[str, str]]]:
+        """Concatenated latent trajectories and the decode prompt for tool_name."""
         # Concatenate latent trajectories from all retrieved modules
-        trajectories = [m.latent_trajectory for m in retrieved_modules]
+        trajectories = [m.latent_trajectory for m in modules]
         combined_latent = torch.cat(trajectories, dim=0)  # [total_steps, H]
 
         # Build decode prompt based on tool type
@@ -68,37 +126,62 @@ class LatentDecoder:
             messages = build_compliance_decode_prompt()
         else:
             # For architect_consult and skill_injector
-            module_names = ", ".join(m.name for m in retrieved_modules)
-            module_type = retrieved_modules[0].module_type
+            module_names = ", ".join(m.name for m in modules)
+            module_type = modules[0].module_type
             messages = build_decode_prompt(module_type, module_names)
+        return combined_latent, messages
 
-        # Decode: insert latent embeddings and generate text
-        dense_text = self.wrapper.decode_from_latent(
-            latent_embeddings=combined_latent,
-            decode_messages=messages,
-            max_new_tokens=self.max_tokens,
-        )
-
-        # Update cache
-        self._cache[cache_key] = dense_text
-        if len(self._cache) > self._cache_size:
-            self._cache.popitem(last=False)
+    def _cached(self, cache_key: str) -> str | None:
+        """Text from the in-process LRU, else from the persistent store."""
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            logger.debug("Decode cache hit")
+            return self._cache[cache_key]
+        if self.store is None:
+            return None
+        text = self.store.get(cache_key)
+        if text is not None:
+            logger.debug("Persistent decode cache hit")
+            self._remember_local(cache_key, text)
+        return text
+
+    def _remember(self, cache_key: str, dense_text: str, n_modules: int) -> None:
+        self._remember_local(cache_key, dense_text)
+        if self.store is not None:
+            self.store.put(cache_key, dense_text)
 
         logger.debug(
             "Decoded %d modules → %d chars",
-            len(retrieved_modules),
+            n_modules,
             len(dense_text),
         )
 
-        return dense_text
+    def _remember_local(self, cache_key: str, dense_text: str) -> None:
+        self._cache[cache_key] = dense_text
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
 
     def _make_cache_key(
         self, modules: list[RetrievedModule], tool_name: str
     ) -> str:
-        """Create a cache key from module IDs and tool name."""
-        ids = sorted(m.module_id for m in modules)
-        return f"{tool_name}::{','.join(ids)}"
+        """Cache key from tool name, module contents, model and decode settings.
+
+        Keyed by content hash and compile fingerprint, so modules with new
+        content or recompiled with other settings miss; module IDs stand in
+        for modules without a content hash.
+        """
+        return decode_cache_key(
+            tool_name,
+            [m.content_hash or m.module_id for m in modules],
+            getattr(self.wrapper, "model_name", ""),
+            self.max_tokens,
+            DECODE_TEMPERATURE,
+            DECODE_TOP_P,
+            [m.compile_fingerprint for m in modules],
+        )
 
     def clear_cache(self) -> None:
-        """Clear the decode cache."""
+        """Clear the decode cache, including the persistent store."""
         self._cache.clear()
+        if self.store is not None:
+            self.store.clear()
@@ -0,0 +1,74 @@
+"""Dedicated executor for model-bound work.
+
+Intent encoding and latent decoding are synchronous torch calls that can take
+seconds. Run on the event loop they stall every other request, including
+/v1/health. InferenceExecutor runs them on a fixed number of worker threads
+("inference slots"); jobs beyond that wait in its queue without occupying the
+event loop or the default thread pool. The shared model wrapper serializes its
+own calls (see LazyModelWrapper), so a slot never touches the model while
+another is mid-forward.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_SLOTS = 1
+
+
+class InferenceExecutor:
+    """Fixed-size thread pool for model-bound calls, awaitable from routes.
+
+    Args:
+        slots: Worker threads, i.e. model-bound jobs in flight at once
+    """
+
+    def __init__(self, slots: int = DEFAULT_SLOTS):
+        if slots < 1:
+            raise ValueError("slots must be at least 1")
+        self.slots = slots
+        self._pool = ThreadPoolExecutor(max_workers=slots, thread_name_prefix="inference")
+        self._counts_lock = threading.Lock()
+        self._submitted = 0
+        self._running = 0
+        self._completed = 0
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run fn(*args, **kwargs) in an inference slot and await its result."""
+        with self._counts_lock:
+            self._submitted += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool, functools.partial(self._call, fn, *args, **kwargs)
+        )
+
+    def _call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        with self._counts_lock:
+            self._running += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._counts_lock:
+                self._running -= 1
+                self._completed += 1
+
+    def stats(self) -> dict[str, int]:
+        """Slot usage for /v1/metrics."""
+        with self._counts_lock:
+            return {
+                "slots": self.slots,
+                "running": self._running,
+                "waiting": self._submitted - self._completed - self._running,
+                "completed": self._completed,
+            }
+
+    def shutdown(self) -> None:
+        """Finish running jobs, drop queued ones."""
+        self._pool.shutdown(wait=True, cancel_futures=True)
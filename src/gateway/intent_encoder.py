@@ -48,21 +48,61 @@ class IntentEncoder:
         # Single forward pass to get mean-pooled hidden state
         mean_embedding, _ = self.wrapper.encode_text(messages)
 
-        # Convert to numpy and L2 normalize
-        vec = mean_embedding.numpy().astype(np.float32)
-        norm = np.linalg.norm(vec)
-        if norm > 1e-8:
-            vec = vec / norm
+        vec = _normalize(mean_embedding)
+        self._remember(cache_key, vec)
+        return vec
+
+    def cached(self, intent: str) -> np.ndarray | None:
+        """The cached vector for intent, or None without encoding it."""
+        return self._cache.get(intent.strip())
+
+    def encode_batch(self, intents: list[str]) -> np.ndarray:
+        """Encode several intents; uncached distinct ones share one forward pass.
 
+        Args:
+            intents: Intent strings, possibly repeated
+
+        Returns:
+            L2-normalized query vectors [len(intents), hidden_dim], in input order
+        """
+        # Cache key → first intent with that key, which is what encode() would embed
+        firsts: dict[str, str] = {}
+        for intent in intents:
+            firsts.setdefault(intent.strip(), intent)
+        missing = [key for key in firsts if key not in self._cache]
+        if len(missing) == 1:
+            self.encode(firsts[missing[0]])
+        elif missing:
+            results = self.wrapper.encode_text_batch(
+                [build_intent_query_prompt(firsts[key]) for key in missing]
+            )
+            for key, (mean_embedding, _) in zip(missing, results):
+                self._remember(key, _normalize(mean_embedding))
+
+        vectors = {key: self._cache[key] for key in firsts if key in self._cache}
+        # A batch larger than the cache may have evicted some of its own entries
+        for key, intent in firsts.items():
+            if key not in vectors:
+                vectors[key] = self.encode(intent)
+        return np.stack([vectors[intent.strip()] for intent in intents])
+
+    def _remember(self, key: str, vec: np.ndarray) -> None:
         # Update cache (simple LRU via dict ordering)
-        self._cache[cache_key] = vec
+        self._cache[key] = vec
         if len(self._cache) > self._cache_size:
             # Remove oldest entry
             oldest_key = next(iter(self._cache))
             del self._cache[oldest_key]
 
-        return vec
-
     def clear_cache(self) -> None:
         """Clear the intent encoding cache."""
         self._cache.clear()
+
+
+def _normalize(mean_embedding) -> np.ndarray:
+    """Convert to numpy and L2 normalize."""
+    vec = mean_embedding.float().numpy().astype(np.float32)
+    norm = np.linalg.norm(vec)
+    if norm > 1e-8:
+        vec = vec / norm
+    return vec
@@ -1,8 +1,13 @@
 """Latent tensor retriever: find and load relevant modules from the compiled store.
 
 Two retrieval modes:
-1. Similarity-based: encode intent → cosine search → load top-K tensors
+1. Similarity-based: encode intent → cosine search → top-K modules
+   (retrieve_batch() does the same for several intents at once)
 2. Direct lookup: retrieve a specific module by ID (for skill_injector)
+
+Retrieved modules carry lazy tensor handles: a tensor is read from disk only
+when first used (e.g. by the decoder, on a decode cache miss) and is then
+kept in a shared, byte-bounded TensorCache.
 """
 
 from __future__ import annotations
@@ -12,19 +17,38 @@ from pathlib import Path
 
 import numpy as np
 
-from ..compiler.indexer import NumpyIndex
-from ..compiler.persistence import load_module_metadata, load_module_tensor
-from ..shared.types import RetrievedModule
+from ..compiler.bm25 import BM25Index
+from ..compiler.indexer import IndexEntry, NumpyIndex
+from ..compiler.persistence import load_module_tensor
+from ..shared.types import LazyTensor, RetrievedModule
+from .tensor_cache import TensorCache
 
 logger = logging.getLogger(__name__)
 
 
 class LatentRetriever:
-    """Retrieve relevant latent tensors from the compiled store."""
+    """Retrieve relevant latent tensors from the compiled store.
+
+    Args:
+        index: Loaded embedding index
+        tensor_dir: Directory of per-module tensor files
+        keyword_index: BM25 index for retrieve_by_keywords(); without it,
+            keyword retrieval falls back to a metadata substring scan
+        tensor_cache: Loaded tensors shared across requests (default: a new
+            TensorCache of the default size)
+    """
 
-    def __init__(self, index: NumpyIndex, tensor_dir: str):
+    def __init__(
+        self,
+        index: NumpyIndex,
+        tensor_dir: str,
+        keyword_index: BM25Index | None = None,
+        tensor_cache: TensorCache | None = None,
+    ):
         self.index = index
         self.tensor_dir = tensor_dir
+        self.keyword_index = keyword_index
+        self.tensor_cache = tensor_cache if tensor_cache is not None else TensorCache()
 
     def retrieve(
         self,
@@ -46,7 +70,7 @@ class LatentRetriever:
             exclude_types: Module types to exclude from results
 
         Returns:
-            List of RetrievedModule with loaded tensors, sorted by score
+            List of RetrievedModule with lazy tensors, sorted by score
         """
         results = self.index.query(
             query_embedding,
@@ -56,33 +80,37 @@ class LatentRetriever:
             query_text=query_text,
             exclude_types=exclude_types,
         )
+        return [self._module(entry, score) for entry, score in results]
 
-        retrieved = []
-        for entry, score in results:
-            try:
-                layer_states = load_module_tensor(
-                    self.tensor_dir, entry.module_id, "layer_states"
-                )
-                latent_trajectory = load_module_tensor(
-                    self.tensor_dir, entry.module_id, "latent_trajectory"
-                )
-
-                retrieved.append(RetrievedModule(
-                    module_id=entry.module_id,
-                    name=entry.name,
-                    module_type=entry.module_type,
-                    description=entry.description,
-                    score=score,
-                    layer_states=layer_states,
-                    latent_trajectory=latent_trajectory,
-                    original_token_count=entry.token_count,
-                ))
-            except Exception as e:
-                logger.warning(
-                    "Failed to load tensors for %s: %s", entry.module_id, e
-                )
+    def retrieve_batch(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int | list[int] = 3,
+        module_type_filters: list[str | None] | None = None,
+        min_score: float = 0.3,
+        query_texts: list[str | None] | None = None,
+        exclude_types: list[set[str] | None] | None = None,
+    ) -> list[list[RetrievedModule]]:
+        """retrieve() for several queries.
+
+        Args:
+            query_embeddings: L2-normalized query vectors [Q, hidden_dim]
+            top_k, module_type_filters, min_score, query_texts, exclude_types:
+                As NumpyIndex.query_batch()
+
+        Returns:
+            One list of RetrievedModule per query, sorted by score
+        """
+        results = self.index.query_batch(
+            query_embeddings,
+            top_k=top_k,
+            module_type_filters=module_type_filters,
+            min_score=min_score,
+            query_texts=query_texts,
+            exclude_types=exclude_types,
+        )
 
-        return retrieved
+        return [[self._module(entry, score) for entry, score in matches] for matches in results]
 
     def retrieve_by_id(self, module_id: str) -> RetrievedModule | None:
         """Retrieve a specific module by its ID.
@@ -107,27 +135,34 @@ class LatentRetriever:
             logger.warning("Module not found: %s", module_id)
             return None
 
-        try:
-            layer_states = load_module_tensor(
-                self.tensor_dir, entry.module_id, "layer_states"
-            )
-            latent_trajectory = load_module_tensor(
-                self.tensor_dir, entry.module_id, "latent_trajectory"
-            )
+        return self._module(entry, 1.0)  # Direct lookup = perfect match
 
-            return RetrievedModule(
-                module_id=entry.module_id,
-                name=entry.name,
-                module_type=entry.module_type,
-                description=entry.description,
-                score=1.0,  # Direct lookup = perfect match
-                layer_states=layer_states,
-                latent_trajectory=latent_trajectory,
-                original_token_count=entry.token_count,
-            )
-        except Exception as e:
-            logger.error("Failed to load tensors for %s: %s", module_id, e)
-            return None
+    def _module(self, entry: IndexEntry, score: float) -> RetrievedModule:
+        return RetrievedModule(
+            module_id=entry.module_id,
+            name=entry.name,
+            module_type=entry.module_type,
+            description=entry.description,
+            score=score,
+            layer_states=self._lazy_tensor(entry, "layer_states"),
+            latent_trajectory=self._lazy_tensor(entry, "latent_trajectory"),
+            original_token_count=entry.token_count,
+            content_hash=entry.content_hash,
+            compile_fingerprint=self.index.compile_fingerprint,
+        )
+
+    def _lazy_tensor(self, entry: IndexEntry, name: str) -> LazyTensor:
+        # Keyed by content and compile fingerprint: a recompile never gets stale tensors
+        key = (entry.module_id, name, entry.content_hash, self.index.compile_fingerprint)
+
+        def load():
+            try:
+                return load_module_tensor(self.tensor_dir, entry.module_id, name)
+            except Exception as e:
+                logger.error("Failed to load %s for %s: %s", name, entry.module_id, e)
+                raise
+
+        return LazyTensor(lambda: self.tensor_cache.get(key, load))
 
     def retrieve_by_keywords(
         self,
@@ -138,9 +173,48 @@ class LatentRetriever:
     ) -> list[RetrievedModule]:
         """Keyword-based retrieval without embeddings (retrieval-only mode).
 
-        Scores modules by keyword overlap with query text. Used when no LLM
-        model is loaded (cloud retrieval-only deployment).
+        Ranks modules by BM25 over their full content when a keyword index
+        is loaded, otherwise by keyword overlap with the index metadata.
+        Used when no LLM model is loaded (cloud retrieval-only deployment).
         """
+        if self.keyword_index is not None:
+            scored = []
+            for module_id, score in self.keyword_index.query(
+                query_text,
+                top_k=top_k,
+                module_type_filter=module_type_filter,
+                exclude_types=exclude_types,
+            ):
+                entry = self.index.get_by_id(module_id)
+                if entry is not None:
+                    scored.append((entry, score))
+        else:
+            scored = self._scan_keywords(query_text, module_type_filter, exclude_types)
+
+        # In keyword mode (retrieval-only), skip tensor loading — only metadata needed
+        return [
+            RetrievedModule(
+                module_id=entry.module_id,
+                name=entry.name,
+                module_type=entry.module_type,
+                description=entry.description,
+                score=score,
+                layer_states=None,
+                latent_trajectory=None,
+                original_token_count=entry.token_count,
+                content_hash=entry.content_hash,
+                compile_fingerprint=self.index.compile_fingerprint,
+            )
+            for entry, score in scored[:top_k]
+        ]
+
+    def _scan_keywords(
+        self,
+        query_text: str,
+        module_type_filter: str | None,
+        exclude_types: set[str] | None,
+    ) -> list[tuple[IndexEntry, float]]:
+        """Substring keyword overlap against id, name and description of every entry."""
         # Extract meaningful keywords (skip very short tokens and code punctuation)
         raw_tokens = query_text.lower().replace("'", " ").replace('"', " ").split()
         keywords = {t for t in raw_tokens if len(t) >= 3 and t.isalpha()}
@@ -161,21 +235,7 @@ class LatentRetriever:
                 scored.append((entry, score))
 
         scored.sort(key=lambda x: x[1], reverse=True)
-
-        # In keyword mode (retrieval-only), skip tensor loading — only metadata needed
-        return [
-            RetrievedModule(
-                module_id=entry.module_id,
-                name=entry.name,
-                module_type=entry.module_type,
-                description=entry.description,
-                score=score,
-                layer_states=None,
-                latent_trajectory=None,
-                original_token_count=entry.token_count,
-            )
-            for entry, score in scored[:top_k]
-        ]
+        return scored
 
     def list_modules(
         self, module_type_filter: str | None = None
@@ -0,0 +1,192 @@
+"""Second-tier intent cache for near-duplicate intents.
+
+IntentEncoder only reuses vectors for exactly repeated intents, and
+agent-written intents rarely repeat word for word. SemanticIntentCache keeps
+recent (intent → query vector) pairs together with two cheap fingerprints of
+each intent: its keyword-retrieval candidate set (BM25, no model) and its bag
+of words. A new intent whose candidate set overlaps a cached one by at least
+overlap_threshold (Jaccard) and whose bag of words is within cosine_threshold
+reuses that entry's query vector, skipping the transformer forward pass.
+Retrieval itself still runs with the request's own filters and top_k.
+
+The trade-off is measured, not assumed: a sample of hits (audit_rate) is
+encoded anyway and compared with the reused vector, and a reuse counts as
+false when the dense top results differ. See stats().
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from collections import Counter, OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+from ..compiler.bm25 import tokenize
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_OVERLAP_THRESHOLD = 0.8
+DEFAULT_COSINE_THRESHOLD = 0.9
+DEFAULT_AUDIT_RATE = 0.05
+# Keyword candidates fingerprinting an intent
+DEFAULT_CANDIDATES = 20
+# Recent audit cosines kept for stats
+AUDIT_WINDOW = 256
+# An audited reuse is correct when it yields the same dense top-k module set
+AUDIT_TOP_K = 5
+
+
+@dataclass
+class _Entry:
+    candidates: frozenset[str]
+    terms: Counter
+    norm: float
+    vector: np.ndarray
+
+
+@dataclass
+class SemanticHit:
+    """A reused query vector and how close the match was."""
+
+    intent: str  # The cached intent whose vector is reused
+    vector: np.ndarray
+    overlap: float
+    cosine: float
+
+
+class SemanticIntentCache:
+    """LRU of intent query vectors, matched by keyword candidates and wording.
+
+    Args:
+        max_entries: Cached intents kept (least recently used evicted)
+        overlap_threshold: Minimum Jaccard overlap of keyword candidate sets
+        cosine_threshold: Minimum bag-of-words cosine between the intents
+        audit_rate: Fraction of hits to re-encode and check
+        candidates: Keyword candidates per intent
+        seed: Seed of the audit sampling
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        overlap_threshold: float = DEFAULT_OVERLAP_THRESHOLD,
+        cosine_threshold: float = DEFAULT_COSINE_THRESHOLD,
+        audit_rate: float = DEFAULT_AUDIT_RATE,
+        candidates: int = DEFAULT_CANDIDATES,
+        seed: int | None = None,
+    ):
+        self.max_entries = max_entries
+        self.overlap_threshold = overlap_threshold
+        self.cosine_threshold = cosine_threshold
+        self.audit_rate = audit_rate
+        self.candidates = candidates
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        # module_id → cached intents listing it, so lookups skip unrelated entries
+        self._by_candidate: dict[str, set[str]] = {}
+        self._rng = random.Random(seed)
+        self.lookups = 0
+        self.hits = 0
+        self.audits = 0
+        self.false_reuses = 0
+        self._audit_cosines: deque[float] = deque(maxlen=AUDIT_WINDOW)
+
+    def lookup(self, intent: str, candidates: list[str]) -> SemanticHit | None:
+        """Best cached entry passing both thresholds, or None.
+
+        Args:
+            intent: The new intent text
+            candidates: Its keyword-retrieval module ids (model-free)
+        """
+        self.lookups += 1
+        if not candidates:
+            return None
+        candidate_set = frozenset(candidates)
+        terms = Counter(tokenize(intent))
+        norm = _norm(terms)
+
+        related = set().union(*(self._by_candidate.get(c, ()) for c in candidate_set))
+        best: SemanticHit | None = None
+        for key in related:
+            entry = self._entries[key]
+            overlap = len(candidate_set & entry.candidates) / len(candidate_set | entry.candidates)
+            if overlap < self.overlap_threshold:
+                continue
+            cosine = _cosine(terms, norm, entry.terms, entry.norm)
+            if cosine < self.cosine_threshold:
+                continue
+            if best is None or (overlap, cosine) > (best.overlap, best.cosine):
+                best = SemanticHit(key, entry.vector, overlap, cosine)
+
+        if best is not None:
+            self.hits += 1
+            self._entries.move_to_end(best.intent)
+        return best
+
+    def add(self, intent: str, candidates: list[str], vector: np.ndarray) -> None:
+        """Remember an encoded intent (no-op without keyword candidates)."""
+        if not candidates:
+            return
+        if intent in self._entries:
+            self._forget(intent)
+        terms = Counter(tokenize(intent))
+        entry = _Entry(frozenset(candidates), terms, _norm(terms), vector)
+        self._entries[intent] = entry
+        for module_id in entry.candidates:
+            self._by_candidate.setdefault(module_id, set()).add(intent)
+        while len(self._entries) > self.max_entries:
+            self._forget(next(iter(self._entries)))
+
+    def should_audit(self) -> bool:
+        """Whether to verify the hit just returned (sampled at audit_rate)."""
+        return self._rng.random() < self.audit_rate
+
+    def record_audit(self, reused: np.ndarray, encoded: np.ndarray, same_results: bool) -> None:
+        """Record one audited hit: the reused vs. the real vector and results."""
+        self.audits += 1
+        self._audit_cosines.append(float(np.dot(reused, encoded)))
+        if not same_results:
+            self.false_reuses += 1
+
+    def stats(self) -> dict[str, Any]:
+        """JSON-ready summary for /v1/metrics."""
+        cosines = np.asarray(self._audit_cosines)
+        return {
+            "entries": len(self._entries),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "overlap_threshold": self.overlap_threshold,
+            "cosine_threshold": self.cosine_threshold,
+            "audit_rate": self.audit_rate,
+            "audits": self.audits,
+            "false_reuses": self.false_reuses,
+            "false_reuse_rate": round(self.false_reuses / self.audits, 4) if self.audits else 0.0,
+            "audit_vector_cosine_min": round(float(cosines.min()), 4) if len(cosines) else None,
+            "audit_vector_cosine_mean": round(float(cosines.mean()), 4) if len(cosines) else None,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _forget(self, intent: str) -> None:
+        entry = self._entries.pop(intent)
+        for module_id in entry.candidates:
+            intents = self._by_candidate.get(module_id)
+            if intents is not None:
+                intents.discard(intent)
+                if not intents:
+                    del self._by_candidate[module_id]
+
+
+def _norm(terms: Counter) -> float:
+    return math.sqrt(sum(n * n for n in terms.values()))
+
+
+def _cosine(a: Counter, a_norm: float, b: Counter, b_norm: float) -> float:
+    if not a_norm or not b_norm:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(n * b[t] for t, n in a.items() if t in b) / (a_norm * b_norm)
@@ -0,0 +1,83 @@
+"""Byte-bounded LRU of module tensors shared across requests.
+
+LatentRetriever hands out LazyTensor handles; the first read of a handle goes
+through TensorCache.get(), so a module's tensors are read from disk once and
+then served from memory until evicted. Keys include the module's content
+hash, so a recompiled module is loaded afresh.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class TensorCache:
+    """Thread-safe LRU of loaded tensors, bounded by their total size.
+
+    Args:
+        max_bytes: Bytes of tensor data kept; least recently used go first.
+            Tensors larger than this are returned but not cached.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """Cached value for key, or load() it (outside the lock) and cache it."""
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return item[0]
+            self.misses += 1
+
+        value = load()
+        size = _nbytes(value)
+        with self._lock:
+            if key not in self._items and size <= self.max_bytes:
+                self._items[key] = (value, size)
+                self.bytes += size
+                while self.bytes > self.max_bytes:
+                    _, (_, evicted) = self._items.popitem(last=False)
+                    self.bytes -= evicted
+                    self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict[str, Any]:
+        """JSON-ready summary for /v1/metrics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._items),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+def _nbytes(value: Any) -> int:
+    # torch.Tensor and np.ndarray both report nbytes
+    return int(getattr(value, "nbytes", 0))
@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import os
+import struct
+import threading
 from typing import Any
 
 try:
     import torch
-    from safetensors.torch import save_file
+    from safetensors.torch import save
     _HAS_TORCH = True
 except ImportError:
     torch = None  # type: ignore[assignment]
@@ -26,14 +29,62 @@ def save_tensors(
     filepath: str,
     metadata: dict[str, str] | None = None,
 ) -> None:
-    """Save tensors to a safetensors file with optional metadata."""
+    """Save tensors to a safetensors file with optional metadata.
+
+    The header is re-serialized with sorted keys so identical inputs always
+    produce byte-identical files (safetensors itself emits metadata in hash
+    map order, which changes from process to process).
+
+    The file is written under a temporary name and renamed into place, so a
+    crash mid-write never leaves a truncated .safetensors file behind.
+    """
     if not _HAS_TORCH:
         raise RuntimeError("torch is required for save_tensors")
     os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    save_file(tensors, filepath, metadata=metadata)
+    data = _canonicalize_header(save(tensors, metadata=metadata))
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     logger.debug("Saved tensors to %s (%d tensors)", filepath, len(tensors))
 
 
+def save_npy(filepath: str, array: Any) -> None:
+    """np.save() to a temporary name, then rename over filepath.
+
+    Readers that have the old file memory-mapped keep seeing its contents;
+    writing in place would change (or, when shrinking, truncate) their pages.
+    """
+    import numpy as np
+
+    tmp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _canonicalize_header(data: bytes) -> bytes:
+    """Rewrite a serialized safetensors blob with a deterministic JSON header."""
+    (header_len,) = struct.unpack("<Q", data[:8])
+    header = json.loads(data[8:8 + header_len])
+    encoded = json.dumps(
+        header, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+    # Data must start on an 8-byte boundary; safetensors pads with spaces
+    encoded += b" " * (-len(encoded) % 8)
+    return struct.pack("<Q", len(encoded)) + encoded + data[8 + header_len:]
+
+
 def load_tensor(filepath: str, tensor_name: str) -> Any:
     """Load a single tensor from a safetensors file using mmap."""
     with safe_open(filepath, framework=_FRAMEWORK, device="cpu") as f:
@@ -0,0 +1,205 @@
+"""Packed tensor store: many modules' tensors in one memory-mapped file.
+
+Layout inside a tensor directory:
+- modules-<generation>.pack: raw tensor bytes, each tensor 64-byte aligned
+- modules.pack.json: offset table mapping module_id to its metadata and, for
+  each tensor, dtype / shape / byte offset / byte length
+
+The pack is mapped once; get_tensor() returns a zero-copy view into the map,
+so a lookup costs no syscalls and no header parsing. Rewrites go to a new
+generation file and the table is swapped in atomically, so readers holding
+the old map keep working.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Iterable
+from typing import Any
+
+import numpy as np
+
+try:
+    import torch
+    _HAS_TORCH = True
+except ImportError:
+    torch = None  # type: ignore[assignment]
+    _HAS_TORCH = False
+
+logger = logging.getLogger(__name__)
+
+TABLE_FILENAME = "modules.pack.json"
+PACK_VERSION = 1
+_ALIGN = 64
+
+# safetensors dtype names, so tables read the same as safetensors headers
+_NUMPY_DTYPES = {
+    "F64": np.float64,
+    "F32": np.float32,
+    "F16": np.float16,
+    "I64": np.int64,
+    "I32": np.int32,
+    "U8": np.uint8,
+}
+if _HAS_TORCH:
+    _TORCH_DTYPES = {
+        "F64": torch.float64,
+        "F32": torch.float32,
+        "F16": torch.float16,
+        "BF16": torch.bfloat16,
+        "I64": torch.int64,
+        "I32": torch.int32,
+        "U8": torch.uint8,
+    }
+    _DTYPE_NAMES = {v: k for k, v in _TORCH_DTYPES.items()}
+
+
+class PackedTensorStore:
+    """Read-only view of a packed tensor directory."""
+
+    def __init__(self, base_dir: str):
+        self.base_dir = base_dir
+        with open(os.path.join(base_dir, TABLE_FILENAME), "r", encoding="utf-8") as f:
+            table = json.load(f)
+        if table.get("version") != PACK_VERSION:
+            raise ValueError(f"Unsupported pack version: {table.get('version')}")
+        self.pack_file = table["pack"]
+        self.modules: dict[str, dict[str, Any]] = table["modules"]
+
+        pack_path = os.path.join(base_dir, self.pack_file)
+        # Copy-on-write: tensors are writable views, but writes never reach the file
+        self._data = (
+            np.memmap(pack_path, dtype=np.uint8, mode="c")
+            if os.path.getsize(pack_path) > 0
+            else np.zeros(0, dtype=np.uint8)
+        )
+
+    def __contains__(self, module_id: str) -> bool:
+        return module_id in self.modules
+
+    def module_ids(self) -> list[str]:
+        return sorted(self.modules)
+
+    def get_tensor(self, module_id: str, tensor_name: str) -> Any:
+        """Return a zero-copy view of one tensor.
+
+        Raises:
+            KeyError: If the module or tensor is not in the pack.
+        """
+        spec = self.modules[module_id]["tensors"][tensor_name]
+        raw = self._data[spec["offset"]:spec["offset"] + spec["nbytes"]]
+        if _HAS_TORCH:
+            return torch.from_numpy(raw).view(_TORCH_DTYPES[spec["dtype"]]).reshape(spec["shape"])
+        return raw.view(_NUMPY_DTYPES[spec["dtype"]]).reshape(spec["shape"])
+
+    def get_all(self, module_id: str) -> dict[str, Any]:
+        return {name: self.get_tensor(module_id, name) for name in self.modules[module_id]["tensors"]}
+
+    def get_metadata(self, module_id: str) -> dict[str, str]:
+        return dict(self.modules[module_id]["metadata"])
+
+
+def write_pack(
+    base_dir: str,
+    modules: Iterable[tuple[str, dict[str, Any], dict[str, str]]],
+) -> int:
+    """Write (module_id, tensors, metadata) items as a new pack generation.
+
+    The table is replaced atomically once the data file is complete, then
+    the previous generation's data file is removed.
+
+    Returns:
+        Number of modules written.
+    """
+    if not _HAS_TORCH:
+        raise RuntimeError("torch is required for write_pack")
+    os.makedirs(base_dir, exist_ok=True)
+    table_path = os.path.join(base_dir, TABLE_FILENAME)
+    old_pack = None
+    generation = 0
+    if os.path.exists(table_path):
+        with open(table_path, "r", encoding="utf-8") as f:
+            old_pack = json.load(f).get("pack")
+        generation = _generation(old_pack) + 1
+    pack_file = f"modules-{generation}.pack"
+
+    entries: dict[str, dict[str, Any]] = {}
+    offset = 0
+    with open(os.path.join(base_dir, pack_file), "wb") as f:
+        for module_id, tensors, metadata in modules:
+            specs = {}
+            for name in sorted(tensors):
+                tensor = tensors[name].detach().cpu().contiguous()
+                data = tensor.reshape(-1).view(torch.uint8).numpy().tobytes()
+                padding = -offset % _ALIGN
+                f.write(b"\0" * padding)
+                offset += padding
+                specs[name] = {
+                    "dtype": _DTYPE_NAMES[tensor.dtype],
+                    "shape": list(tensor.shape),
+                    "offset": offset,
+                    "nbytes": len(data),
+                }
+                f.write(data)
+                offset += len(data)
+            entries[module_id] = {"metadata": dict(metadata), "tensors": specs}
+
+    _write_table(base_dir, pack_file, entries)
+    if old_pack and old_pack != pack_file:
+        try:
+            os.remove(os.path.join(base_dir, old_pack))
+        except OSError:
+            pass
+    logger.info("Packed %d modules → %s (%d bytes)", len(entries), pack_file, offset)
+    return len(entries)
+
+
+def drop_from_pack(base_dir: str, module_ids: Iterable[str]) -> int:
+    """Remove modules from the offset table, leaving their bytes as dead space.
+
+    Returns:
+        Number of entries removed.
+    """
+    table_path = os.path.join(base_dir, TABLE_FILENAME)
+    with open(table_path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    removed = [mid for mid in module_ids if table["modules"].pop(mid, None) is not None]
+    if removed:
+        _write_table(base_dir, table["pack"], table["modules"])
+    return len(removed)
+
+
+def remove_pack(base_dir: str) -> None:
+    """Delete the offset table and its data file."""
+    table_path = os.path.join(base_dir, TABLE_FILENAME)
+    with open(table_path, "r", encoding="utf-8") as f:
+        pack_file = json.load(f).get("pack")
+    os.remove(table_path)
+    if pack_file:
+        try:
+            os.remove(os.path.join(base_dir, pack_file))
+        except OSError:
+            pass
+
+
+def has_pack(base_dir: str) -> bool:
+    return os.path.exists(os.path.join(base_dir, TABLE_FILENAME))
+
+
+def _write_table(base_dir: str, pack_file: str, entries: dict[str, dict[str, Any]]) -> None:
+    table = {"version": PACK_VERSION, "pack": pack_file, "modules": entries}
+    table_path = os.path.join(base_dir, TABLE_FILENAME)
+    # Per-process temp name: never share a half-written table with another writer
+    tmp_path = f"{table_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(table, f, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, table_path)
+
+
+def _generation(pack_file: str | None) -> int:
+    try:
+        return int(pack_file.rsplit("-", 1)[1].split(".", 1)[0])  # type: ignore[union-attr]
+    except (AttributeError, IndexError, ValueError):
+        return 0
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import hashlib
+from collections.abc import Callable
 from dataclasses import dataclass, field
 from typing import Any
 
@@ -41,15 +42,66 @@ class EncodedModule:
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
+class LazyTensor:
+    """Handle to a tensor that is loaded by load() on first get()."""
+
+    __slots__ = ("_load", "_value")
+
+    def __init__(self, load: Callable[[], Any]):
+        self._load = load
+        self._value = None
+
+    def get(self) -> Any:
+        if self._load is not None:
+            self._value = self._load()
+            self._load = None
+        return self._value
+
+    @property
+    def loaded(self) -> bool:
+        return self._load is None
+
+
+class _TensorField:
+    """Dataclass field that may hold a LazyTensor, resolved on attribute access.
+
+    Declare it with field(default=_TensorField(), repr=False, compare=False),
+    so the generated __repr__ and __eq__ never load a tensor.
+    """
+
+    def __set_name__(self, owner, name):
+        self._attr = f"_{name}"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return None  # The field's default
+        value = obj.__dict__[self._attr]
+        return value.get() if isinstance(value, LazyTensor) else value
+
+    def __set__(self, obj, value):
+        if value is self:  # __init__ passes the field() default itself
+            value = None
+        obj.__dict__[self._attr] = value
+
+
 @dataclass
 class RetrievedModule:
-    """A module retrieved from the tensor store with loaded tensors."""
+    """A module retrieved from the tensor store.
+
+    layer_states and latent_trajectory may be given as LazyTensor handles;
+    they are loaded when first read, so unused tensors are never loaded. They
+    are left out of repr() and ==; dataclasses.asdict() still reads them.
+    """
 
     module_id: str
     name: str
     module_type: str
     description: str
     score: float
-    layer_states: Any  # torch.Tensor [n_layers, hidden_dim]
-    latent_trajectory: Any  # torch.Tensor [latent_steps, hidden_dim]
+    # torch.Tensor [n_layers, hidden_dim]
+    layer_states: Any = field(default=_TensorField(), repr=False, compare=False)
+    # torch.Tensor [latent_steps, hidden_dim]
+    latent_trajectory: Any = field(default=_TensorField(), repr=False, compare=False)
     original_token_count: int = 0
+    content_hash: str = ""
+    compile_fingerprint: str = ""  # Key of the fingerprint the tensors were compiled with
@@ -0,0 +1,110 @@
+"""Tests for the index search backends."""
+
+import os
+
+import numpy as np
+import pytest
+import torch
+
+from src.compiler.ann import IVF_FILENAME, IVFBackend, make_backend
+from src.compiler.indexer import NumpyIndex
+from src.shared.types import EncodedModule
+
+
+def _clustered(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dim)).astype(np.float32) * 3
+    rows = centers[rng.integers(0, 8, n)] + rng.standard_normal((n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _encoded(i: int, row: np.ndarray, module_type: str = "skill") -> EncodedModule:
+    return EncodedModule(
+        module_id=f"skills/m{i}",
+        module_type=module_type,
+        name=f"m{i}",
+        description="test",
+        mean_embedding=torch.from_numpy(row),
+        layer_states=torch.zeros(1),
+        latent_trajectory=torch.zeros(1),
+        content_hash="abc",
+        token_count=1,
+    )
+
+
+def test_ivf_lists_partition_rows():
+    embeddings = _clustered(400)
+    backend = IVFBackend(n_lists=8, nprobe=2)
+    backend.build(embeddings)
+    assert sorted(backend.rows.tolist()) == list(range(400))
+    assert backend.offsets[-1] == 400
+
+    candidates = backend.candidates(embeddings[5])
+    assert 5 in candidates
+    assert len(candidates) < 400
+    assert len(backend.candidates(embeddings[5], min_rows=400)) == 400
+
+
+def test_ivf_query_matches_exact_top_k():
+    embeddings = _clustered(400)
+    modules = [
+        _encoded(i, row, "rule" if i % 10 == 0 else "skill") for i, row in enumerate(embeddings)
+    ]
+    exact = NumpyIndex()
+    exact.build(modules)
+    ivf = NumpyIndex(backend="ivf")
+    ivf.build(modules)
+
+    rng = np.random.default_rng(1)
+    hits = 0
+    for i in rng.integers(0, 400, 20):
+        query = embeddings[i] + 0.1 * rng.standard_normal(16).astype(np.float32)
+        expected = {e.module_id for e, _ in exact.query(query, top_k=5, min_score=-1.0)}
+        actual = {e.module_id for e, _ in ivf.query(query, top_k=5, min_score=-1.0)}
+        hits += len(expected & actual)
+    assert hits / 100 >= 0.9
+
+    # A rare type still fills top_k: the backend probes more lists
+    query = embeddings[3]
+    filtered = ivf.query(query, top_k=5, module_type_filter="rule", min_score=-1.0)
+    expected = exact.query(query, top_k=5, module_type_filter="rule", min_score=-1.0)
+    assert len(filtered) == 5
+    assert all(e.module_type == "rule" for e, _ in filtered)
+    assert filtered[0][0].module_id == expected[0][0].module_id
+
+
+def test_ivf_persisted_and_reloaded(tmp_path):
+    embeddings = _clustered(200)
+    index = NumpyIndex(backend="ivf")
+    index.build([_encoded(i, row) for i, row in enumerate(embeddings)])
+    index.save(str(tmp_path))
+    assert os.path.exists(tmp_path / IVF_FILENAME)
+
+    loaded = NumpyIndex(backend="ivf")
+    loaded.load(str(tmp_path))
+    np.testing.assert_array_equal(loaded.backend.rows, index.backend.rows)
+    np.testing.assert_array_equal(loaded.backend.centroids, index.backend.centroids)
+
+
+def test_ivf_stale_after_upsert_falls_back_to_exact(tmp_path):
+    embeddings = _clustered(200)
+    index = NumpyIndex(backend="ivf")
+    index.build([_encoded(i, row) for i, row in enumerate(embeddings)])
+    index.save(str(tmp_path))
+
+    new_row = -embeddings[0]
+    index.upsert(_encoded(999, new_row))
+    assert index.backend.candidates(new_row) is None
+    assert index.query(new_row, top_k=1)[0][0].module_id == "skills/m999"
+
+    index.save_delta(str(tmp_path))
+    assert not index.backend.stale
+    reloaded = NumpyIndex(backend="ivf")
+    reloaded.load(str(tmp_path))
+    assert len(reloaded.backend.rows) == 201
+    assert reloaded.query(new_row, top_k=1)[0][0].module_id == "skills/m999"
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        make_backend("hnsw")
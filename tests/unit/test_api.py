@@ -28,3 +28,294 @@ def test_modules_list_endpoint(client):
     assert resp.status_code == 200
     data = resp.json()
     assert "modules" in data
+
+
+@pytest.fixture(scope="module")
+def batch_app(tmp_path_factory):
+    """App wired to the tiny model and a small compiled store, without the lifespan."""
+    import torch
+    from fastapi import FastAPI
+
+    from src.api.routes import router
+    from src.benchmarks.tiny_model import build_tiny_wrapper
+    from src.compiler.indexer import NumpyIndex
+    from src.compiler.persistence import save_encoded_module
+    from src.gateway.intent_encoder import IntentEncoder
+    from src.gateway.retriever import LatentRetriever
+    from src.gateway.session import SessionManager
+    from src.shared.types import EncodedModule
+
+    tensor_dir = str(tmp_path_factory.mktemp("tensors"))
+    wrapper = build_tiny_wrapper()
+    intent_encoder = IntentEncoder(wrapper)
+    # Modules scattered around the test intents, so they clear min_score
+    centers = [
+        torch.from_numpy(intent_encoder.encode(intent))
+        for intent in ("python security", "design a cache")
+    ]
+    generator = torch.Generator().manual_seed(0)
+    modules = []
+    for i, module_type in enumerate(["rule", "rule", "rule", "skill", "skill", "hook"]):
+        module = EncodedModule(
+            module_id=f"{module_type}s/m{i}",
+            module_type=module_type,
+            name=f"m{i}",
+            description=f"module {i}",
+            mean_embedding=centers[i % 2] + 0.05 * torch.randn(64, generator=generator),
+            layer_states=torch.randn(2, 64, generator=generator),
+            latent_trajectory=torch.randn(3, 64, generator=generator),
+            content_hash=str(i),
+            token_count=100,
+        )
+        save_encoded_module(module, tensor_dir)
+        modules.append(module)
+    index = NumpyIndex()
+    index.build(modules)
+
+    app = FastAPI()
+    app.include_router(router, prefix="/v1")
+    app.state.retriever = LatentRetriever(index, tensor_dir)
+    app.state.session_manager = SessionManager()
+    app.state.content_store = None
+    app.state.retrieval_only = False
+    app.state.wrapper = wrapper
+    app.state.intent_encoder = intent_encoder
+    app.state.decoder = None
+    return app
+
+
+def test_batch_query_matches_single_queries(batch_app):
+    queries = [
+        {"intent": "python security", "tool_name": "get_rules", "top_k": 2,
+         "module_type_filter": "rule"},
+        {"intent": "python security", "tool_name": "get_rules", "top_k": 3},
+        {"intent": "design a cache", "tool_name": "architect_consult", "top_k": 3},
+        {"tool_name": "skill_injector", "skill_id": "skills/m3"},
+        {"tool_name": "compliance_verify"},
+    ]
+    with TestClient(batch_app) as c:
+        resp = c.post("/v1/latent/query/batch", json={"queries": queries})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data["results"]) == len(queries)
+        assert data["metrics"]["queries"] == 5
+        assert data["metrics"]["distinct_intents"] == 2
+
+        for query, result in zip(queries, data["results"]):
+            single = c.post("/v1/latent/query", json=query).json()
+            assert [m["module_id"] for m in result["matched_modules"]] == [
+                m["module_id"] for m in single["matched_modules"]
+            ]
+            for a, b in zip(result["matched_modules"], single["matched_modules"]):
+                assert a["score"] == pytest.approx(b["score"], abs=1e-3)
+            assert result["dense_prompt"] == single["dense_prompt"]
+
+    rules = data["results"][0]["matched_modules"]
+    assert rules and all(m["module_type"] == "rule" for m in rules)
+    assert "hook" not in {m["module_type"] for m in data["results"][2]["matched_modules"]}
+    assert data["results"][4]["dense_prompt"].startswith("Error")
+
+
+def test_metrics_report_batched_encodings(batch_app):
+    from src.gateway.batcher import EncodeBatcher
+
+    batch_app.state.encode_batcher = EncodeBatcher(
+        batch_app.state.intent_encoder, window_ms=1
+    )
+    try:
+        with TestClient(batch_app) as c:
+            query = {"intent": "metrics probe intent", "tool_name": "get_rules"}
+            assert c.post("/v1/latent/query", json=query).status_code == 200
+            assert c.post("/v1/latent/query", json=query).status_code == 200
+            data = c.get("/v1/metrics").json()
+    finally:
+        batch_app.state.encode_batcher = None
+
+    assert data["uptime_seconds"] >= 0
+    stats = data["intent_batcher"]
+    assert stats["requests"] == 2
+    assert stats["cache_hits"] == 1
+    assert stats["batch_sizes"] == {"1": 1}
+
+
+def _health_latency_during_decodes(app) -> tuple[float, list[int]]:
+    """Worst /v1/health latency while four slow queries are being decoded."""
+    import asyncio
+    import time
+
+    import httpx
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            queries = [
+                c.post("/v1/latent/query", json={"intent": f"design a cache {i}",
+                                                 "tool_name": "architect_consult"})
+                for i in range(4)
+            ]
+            query_tasks = [asyncio.create_task(q) for q in queries]
+            latencies = []
+            while not all(t.done() for t in query_tasks):
+                # Time from "probe due" to response, including any wait for the loop
+                t0 = time.perf_counter()
+                await asyncio.sleep(0.02)
+                assert (await c.get("/v1/health")).status_code == 200
+                latencies.append(time.perf_counter() - t0 - 0.02)
+            statuses = [(await t).status_code for t in query_tasks]
+            return max(latencies, default=0.0), statuses
+
+    return asyncio.run(run())
+
+
+def test_health_stays_responsive_while_decoding(batch_app):
+    import time
+
+    from src.api.app import LazyModelWrapper
+    from src.gateway.decoder import LatentDecoder
+    from src.gateway.inference import InferenceExecutor
+
+    class SlowDecoder(LatentDecoder):
+        """Tiny-model decoder padded to the cost of a real generation."""
+
+        def decode(self, retrieved_modules, tool_name="architect_consult"):
+            time.sleep(0.3)
+            return super().decode(retrieved_modules, tool_name)
+
+    tiny = batch_app.state.wrapper
+    # The lifespan's wrapper (and its lock), already "loaded" with the tiny model
+    wrapper = LazyModelWrapper()
+    wrapper._wrapper = tiny
+    batch_app.state.wrapper = wrapper
+    batch_app.state.decoder = SlowDecoder(wrapper, max_tokens=4)
+    try:
+        # Inline decoding blocks the event loop: health waits for a whole decode
+        stalled, statuses = _health_latency_during_decodes(batch_app)
+        assert statuses == [200] * 4
+        assert stalled >= 0.25
+
+        batch_app.state.inference = InferenceExecutor(slots=1)
+        try:
+            worst, statuses = _health_latency_during_decodes(batch_app)
+            stats = batch_app.state.inference.stats()
+        finally:
+            batch_app.state.inference.shutdown()
+    finally:
+        batch_app.state.wrapper = tiny
+        batch_app.state.decoder = None
+        batch_app.state.inference = None
+
+    assert statuses == [200] * 4
+    assert worst < 0.1
+    assert stats["completed"] >= 8  # 4 encodes + 4 decodes, plus token counts
+    assert stats["running"] == stats["waiting"] == 0
+
+
+def _sse_events(text: str) -> list[tuple[str, dict]]:
+    import json
+
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_query_sends_deltas_then_metrics(batch_app):
+    from src.gateway.decoder import LatentDecoder
+
+    decoder = LatentDecoder(batch_app.state.wrapper, max_tokens=12)
+    batch_app.state.decoder = decoder
+    query = {"intent": "python security", "tool_name": "get_rules", "top_k": 2}
+    try:
+        with TestClient(batch_app) as c:
+            resp = c.post("/v1/latent/query/stream", json=query)
+            assert resp.status_code == 200
+            assert resp.headers["content-type"].startswith("text/event-stream")
+            events = _sse_events(resp.text)
+            # The completed stream filled the decode cache, so /latent/query agrees
+            single = c.post("/v1/latent/query", json=query).json()
+    finally:
+        batch_app.state.decoder = None
+
+    names = [name for name, _ in events]
+    assert names[0] == "modules" and names[-1] == "done"
+    assert set(names[1:-1]) == {"delta"}
+    done = events[-1][1]
+    deltas = "".join(data["text"] for name, data in events if name == "delta")
+    assert deltas.strip() == done["dense_prompt"]
+    assert done["dense_prompt"] == single["dense_prompt"]
+    assert done["metrics"]["modules_matched"] == 2
+    assert [m["module_id"] for m in events[0][1]["matched_modules"]] == [
+        m["module_id"] for m in done["matched_modules"]
+    ]
+
+
+def test_stream_query_without_decoder_and_errors(batch_app):
+    with TestClient(batch_app) as c:
+        events = _sse_events(c.post(
+            "/v1/latent/query/stream",
+            json={"tool_name": "skill_injector", "skill_id": "skills/m3"},
+        ).text)
+        assert [name for name, _ in events] == ["modules", "delta", "done"]
+        assert events[1][1]["text"] == events[2][1]["dense_prompt"]
+
+        events = _sse_events(
+            c.post("/v1/latent/query/stream", json={"tool_name": "compliance_verify"}).text
+        )
+        assert [name for name, _ in events] == ["done"]
+        assert events[0][1]["dense_prompt"].startswith("Error")
+
+
+def test_semantic_cache_skips_encoding_near_duplicates(batch_app, tmp_path):
+    import time
+
+    from src.compiler.bm25 import BM25Index, build_bm25_index
+    from src.gateway.semantic_cache import SemanticIntentCache
+    from src.shared.types import ParsedModule
+
+    retriever = batch_app.state.retriever
+    build_bm25_index([
+        ParsedModule(
+            module_id=e.module_id, module_type=e.module_type, name=e.name,
+            description="", content=f"python security checklist part {i}",
+            source_path=f"/repo/{e.module_id}.md",
+        )
+        for i, e in enumerate(retriever.index.entries)
+    ], str(tmp_path))
+    retriever.keyword_index = BM25Index.load(str(tmp_path))
+    semantic = SemanticIntentCache(overlap_threshold=0.5, cosine_threshold=0.6, audit_rate=1.0)
+    batch_app.state.semantic_cache = semantic
+    encoder = batch_app.state.intent_encoder
+    try:
+        with TestClient(batch_app) as c:
+            first = {"intent": "python security checklist", "tool_name": "get_rules"}
+            near = {"intent": "the python security checklist", "tool_name": "get_rules"}
+            assert c.post("/v1/latent/query", json=first).status_code == 200
+            assert encoder.cached(near["intent"]) is None
+            reused = c.post("/v1/latent/query", json=near).json()
+            original = c.post("/v1/latent/query", json=first).json()
+            # Same vector; scores may differ slightly by each text's keyword boost
+            assert [m["module_id"] for m in reused["matched_modules"]] == [
+                m["module_id"] for m in original["matched_modules"]
+            ]
+
+            # The hit was audited in the background: encoded for real and compared
+            for _ in range(100):
+                stats = c.get("/v1/metrics").json()["semantic_cache"]
+                if stats["audits"]:
+                    break
+                time.sleep(0.05)
+    finally:
+        retriever.keyword_index = None
+        batch_app.state.semantic_cache = None
+
+    assert stats["hits"] == 1
+    assert stats["lookups"] == 2  # the repeated first intent hits the exact cache
+    assert stats["audits"] == 1
+    assert stats["false_reuses"] == 0
+    assert encoder.cached(near["intent"]) is not None
+
+
+def test_batch_query_rejects_empty_batch(batch_app):
+    with TestClient(batch_app) as c:
+        assert c.post("/v1/latent/query/batch", json={"queries": []}).status_code == 422
@@ -0,0 +1,120 @@
+"""Tests for the intent encoding micro-batcher."""
+
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from src.benchmarks.tiny_model import build_tiny_wrapper
+from src.gateway.batcher import EncodeBatcher
+from src.gateway.intent_encoder import IntentEncoder
+
+
+class _CountingEncoder(IntentEncoder):
+    """IntentEncoder that records the size of every batched call."""
+
+    def __init__(self, wrapper):
+        super().__init__(wrapper)
+        self.calls: list[int] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def encode_batch(self, intents):
+        self.gate.wait(5)
+        self.calls.append(len(intents))
+        return super().encode_batch(intents)
+
+
+@pytest.fixture(scope="module")
+def wrapper():
+    return build_tiny_wrapper()
+
+
+def test_concurrent_requests_share_one_forward_pass(wrapper):
+    encoder = _CountingEncoder(wrapper)
+    batcher = EncodeBatcher(encoder, window_ms=50, max_batch_size=16)
+    intents = [f"intent number {i}" for i in range(6)]
+
+    async def run():
+        try:
+            return await asyncio.gather(*(batcher.encode(i) for i in intents))
+        finally:
+            await batcher.close()
+
+    vectors = asyncio.run(run())
+
+    assert encoder.calls == [6]
+    reference = IntentEncoder(wrapper)
+    for intent, vector in zip(intents, vectors):
+        np.testing.assert_allclose(vector, reference.encode(intent), atol=1e-5)
+
+    stats = batcher.stats.snapshot()
+    assert stats["batches"] == 1
+    assert stats["batch_sizes"] == {"6": 1}
+    assert stats["mean_batch_size"] == 6
+    assert stats["encoded_per_sec"] > 0
+
+
+def test_max_batch_size_and_cache_hits(wrapper):
+    encoder = _CountingEncoder(wrapper)
+    batcher = EncodeBatcher(encoder, window_ms=50, max_batch_size=4)
+
+    async def run():
+        try:
+            await asyncio.gather(*(batcher.encode(f"intent {i}") for i in range(10)))
+            # Already cached: answered without queueing
+            await batcher.encode("intent 3")
+        finally:
+            await batcher.close()
+
+    asyncio.run(run())
+
+    assert encoder.calls == [4, 4, 2]
+    stats = batcher.stats.snapshot()
+    assert stats["requests"] == 11
+    assert stats["cache_hits"] == 1
+    assert stats["queue_wait_ms"]["max"] >= stats["queue_wait_ms"]["p50"]
+
+
+def test_requests_queue_while_a_batch_runs(wrapper):
+    encoder = _CountingEncoder(wrapper)
+    batcher = EncodeBatcher(encoder, window_ms=0, max_batch_size=16)
+
+    async def run():
+        encoder.gate.clear()
+        first = asyncio.create_task(batcher.encode("first"))
+        await asyncio.sleep(0.05)
+        # The first batch is blocked in its forward pass; these pile up behind it
+        rest = [asyncio.create_task(batcher.encode(f"later {i}")) for i in range(5)]
+        await asyncio.sleep(0.05)
+        encoder.gate.set()
+        try:
+            await asyncio.gather(first, *rest)
+        finally:
+            await batcher.close()
+
+    asyncio.run(run())
+    assert encoder.calls == [1, 5]
+
+
+def test_failures_reach_every_caller(wrapper):
+    encoder = _CountingEncoder(wrapper)
+    batcher = EncodeBatcher(encoder, window_ms=20)
+
+    def fail(intents):
+        raise RuntimeError("model unavailable")
+
+    encoder.encode_batch = fail
+
+    async def run():
+        try:
+            return await asyncio.gather(
+                batcher.encode("a"), batcher.encode("b"), return_exceptions=True
+            )
+        finally:
+            await batcher.close()
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert batcher.stats.failed_batches == 1
@@ -0,0 +1,61 @@
+"""Tests for the offline compile benchmark."""
+
+import json
+
+from src.benchmarks import index_bench, load_bench, query_bench
+from src.benchmarks.compile_bench import main, run_benchmark, synthetic_corpus
+
+STAGES = {"encode_text", "generate_latent_steps", "encode_module", "decode_from_latent"}
+
+
+def test_synthetic_corpus_is_deterministic():
+    first = synthetic_corpus(5, seed=1)
+    second = synthetic_corpus(5, seed=1)
+    assert [m.content for m in first] == [m.content for m in second]
+    assert len({m.module_id for m in first}) == 5
+
+
+def test_run_benchmark_reports_every_stage():
+    report = run_benchmark(n_modules=3, latent_steps=2, decode_tokens=4)
+    assert set(report["stages"]) == STAGES
+    for stats in report["stages"].values():
+        assert stats["modules"] > 0
+        assert stats["tokens_per_sec"] > 0
+        assert stats["modules_per_sec"] > 0
+        assert 0 < stats["p50_ms"] <= stats["p95_ms"]
+    assert report["model"]["hidden_size"] == 64
+    assert report["peak_rss_mb"] is None or report["peak_rss_mb"] > 0
+    json.dumps(report)
+
+
+def test_main_enforces_throughput_floor(tmp_path, capsys):
+    out = tmp_path / "bench.json"
+    argv = ["--modules", "2", "--decode-tokens", "2", "--output", str(out)]
+    assert main(argv) == 0
+    assert json.loads(out.read_text())["config"]["modules"] == 2
+    assert main(argv + ["--min-modules-per-sec", "1e9"]) == 1
+    capsys.readouterr()
+
+
+def test_index_benchmark_reports_recall_per_mode():
+    report = index_bench.run_benchmark(n_entries=500, dim=32, n_queries=5, top_k=5)
+    assert set(report["modes"]) == {"float32", "float16", "int8", "ivf"}
+    assert report["modes"]["float32"]["recall_at_5"] == 1.0
+    assert report["modes"]["int8"]["recall_at_5"] >= 0.8
+    assert (
+        report["modes"]["int8"]["resident_bytes"]
+        < report["modes"]["float32"]["resident_bytes"]
+    )
+
+
+def test_query_benchmark_matches_legacy_path():
+    report = query_bench.run_benchmark(sizes=(300,), dim=16, n_queries=5)
+    cases = report["sizes"]["300"]
+    assert set(cases) == set(query_bench.FILTER_CASES)
+    assert all(case["same_results"] for case in cases.values())
+
+
+def test_load_benchmark_runs_each_mode_in_a_new_process():
+    report = load_bench.run_benchmark(n_entries=200, dim=8)
+    assert set(report["modes"]) == set(load_bench.LOAD_MODES)
+    assert all(mode["load_ms"] > 0 for mode in report["modes"].values())
@@ -0,0 +1,179 @@
+"""Tests for the BM25 keyword index."""
+
+import math
+import os
+import time
+from collections import Counter
+
+import numpy as np
+import torch
+
+from src.compiler.bm25 import (
+    BM25_B,
+    BM25_K1,
+    META_FILENAME,
+    BM25Index,
+    build_bm25_index,
+    module_text,
+    tokenize,
+)
+from src.compiler.indexer import NumpyIndex
+from src.gateway.retriever import LatentRetriever
+from src.shared.types import EncodedModule, ParsedModule
+
+
+def _module(module_id: str, content: str, module_type: str = "skill") -> ParsedModule:
+    return ParsedModule(
+        module_id=module_id,
+        module_type=module_type,
+        name=module_id.split("/")[-1],
+        description="",
+        content=content,
+        source_path=f"/repo/{module_id}.md",
+    )
+
+
+MODULES = [
+    _module("skills/security-review", "Check auth tokens and sql injection in queries."),
+    _module("skills/tdd-workflow", "Write the failing test first, then the code."),
+    _module("rules/common--testing", "Every change needs a test. Test coverage matters.", "rule"),
+    _module("agents/architect", "Design services, queues and storage for scale.", "agent"),
+]
+
+
+def _reference_scores(modules, query):
+    """Textbook BM25 (union of query terms) computed per document."""
+    docs = {m.module_id: Counter(tokenize(module_text(m))) for m in modules}
+    avgdl = sum(sum(tf.values()) for tf in docs.values()) / len(docs)
+    scores = {}
+    for module_id, tf in docs.items():
+        dl = sum(tf.values())
+        score = 0.0
+        for term in set(tokenize(query)):
+            if term not in tf:
+                continue
+            df = sum(1 for other in docs.values() if term in other)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            f = tf[term]
+            score += idf * f * (BM25_K1 + 1) / (f + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl))
+        if score > 0:
+            scores[module_id] = score
+    return scores
+
+
+def test_scores_match_reference_bm25(tmp_path):
+    build_bm25_index(MODULES, str(tmp_path))
+    index = BM25Index.load(str(tmp_path))
+
+    for query in ["test coverage", "sql auth", "architect scale storage", "test"]:
+        results = index.query(query, top_k=10)
+        expected = _reference_scores(MODULES, query)
+        assert {mid for mid, _ in results} == set(expected)
+        for module_id, score in results:
+            assert math.isclose(score, expected[module_id], rel_tol=1e-5)
+        scores = [score for _, score in results]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_content_and_id_are_searchable(tmp_path):
+    build_bm25_index(MODULES, str(tmp_path))
+    index = BM25Index.load(str(tmp_path))
+
+    assert index.query("injection", top_k=1)[0][0] == "skills/security-review"
+    # module id parts are tokens too
+    assert index.query("common", top_k=1)[0][0] == "rules/common--testing"
+    assert index.query("nonexistent words") == []
+
+
+def test_type_filters_and_top_k(tmp_path):
+    build_bm25_index(MODULES, str(tmp_path))
+    index = BM25Index.load(str(tmp_path))
+
+    assert [mid for mid, _ in index.query("test", top_k=5, module_type_filter="rule")] == [
+        "rules/common--testing"
+    ]
+    excluded = index.query("test", top_k=5, exclude_types={"rule"})
+    assert [mid for mid, _ in excluded] == ["skills/tdd-workflow"]
+    assert index.query("test", top_k=5, module_type_filter="hook") == []
+    assert len(index.query("test the code", top_k=1)) == 1
+
+
+def test_load_is_memory_mapped_and_rebuild_skipped(tmp_path):
+    assert build_bm25_index(MODULES, str(tmp_path)) is True
+    assert build_bm25_index(list(reversed(MODULES)), str(tmp_path)) is False
+    index = BM25Index.load(str(tmp_path))
+    assert isinstance(index.docs, np.memmap)
+    assert isinstance(index.weights, np.memmap)
+
+    changed = MODULES[:-1] + [_module("agents/architect", "Now about caching.", "agent")]
+    assert build_bm25_index(changed, str(tmp_path)) is True
+    assert BM25Index.load(str(tmp_path)).query("caching")[0][0] == "agents/architect"
+
+
+def test_rebuild_leaves_loaded_index_intact(tmp_path):
+    build_bm25_index(MODULES, str(tmp_path))
+    live = BM25Index.load(str(tmp_path))
+    before = live.query("test", top_k=10)
+
+    # A smaller corpus shrinks every array file
+    build_bm25_index(MODULES[:1], str(tmp_path))
+    assert live.query("test", top_k=10) == before
+    assert BM25Index.load(str(tmp_path)).query("test", top_k=10) == []
+
+
+def test_load_missing_or_incomplete(tmp_path):
+    assert BM25Index.load(str(tmp_path)) is None
+    build_bm25_index(MODULES, str(tmp_path))
+    np.save(os.path.join(tmp_path, "bm25.docs.npy"), np.zeros(1, dtype=np.int32))
+    assert BM25Index.load(str(tmp_path)) is None
+    assert os.path.exists(os.path.join(tmp_path, META_FILENAME))
+
+
+def test_retriever_uses_bm25_content_ranking(tmp_path):
+    build_bm25_index(MODULES, str(tmp_path))
+    index = NumpyIndex()
+    index.build([
+        EncodedModule(
+            module_id=m.module_id,
+            module_type=m.module_type,
+            name=m.name,
+            description=m.description,
+            mean_embedding=torch.ones(4),
+            layer_states=None,
+            latent_trajectory=None,
+            content_hash=m.content_hash,
+            token_count=10,
+        )
+        for m in MODULES
+    ])
+
+    # "injection" only occurs in the content, which the metadata scan cannot see
+    scan = LatentRetriever(index, str(tmp_path))
+    assert scan.retrieve_by_keywords("sql injection") == []
+
+    retriever = LatentRetriever(index, str(tmp_path), keyword_index=BM25Index.load(str(tmp_path)))
+    results = retriever.retrieve_by_keywords("sql injection", top_k=2)
+    assert [m.module_id for m in results] == ["skills/security-review"]
+    assert results[0].layer_states is None
+    assert results[0].original_token_count == 10
+
+
+def test_query_latency_10k_modules(tmp_path):
+    rng = np.random.default_rng(0)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    modules = [
+        _module(f"skills/m{i:05d}", " ".join(rng.choice(vocabulary, 200)))
+        for i in range(10000)
+    ]
+    build_bm25_index(modules, str(tmp_path))
+    index = BM25Index.load(str(tmp_path))
+
+    queries = [" ".join(rng.choice(vocabulary, 4)) for _ in range(50)]
+    for query in queries:
+        index.query(query, top_k=5)  # warm the mapping
+    t0 = time.perf_counter()
+    for query in queries:
+        assert index.query(query, top_k=5)
+    per_query = (time.perf_counter() - t0) / len(queries)
+    # Loose bound for shared CI machines; typically well under a millisecond
+    assert per_query < 0.02
@@ -0,0 +1,93 @@
+"""Tests for the compiled content pack and its use by SourceContentStore."""
+
+import os
+
+from src.compiler.content_pack import CONTENT_PACK, ContentPack, write_content_pack
+from src.gateway.content_store import SourceContentStore
+from src.shared.types import ParsedModule
+
+
+def _module(module_id: str, content: str) -> ParsedModule:
+    return ParsedModule(
+        module_id=module_id,
+        module_type="skill",
+        name=module_id.split("/")[-1],
+        description="",
+        content=content,
+        source_path=f"/repo/{module_id}.md",
+    )
+
+
+MODULES = [
+    _module("skills/tdd-workflow", "# TDD\n\nWrite the failing test first.\n" * 20),
+    _module("agents/architect", "# Architect\n\nDesign for scale — 设计可扩展的服务。"),
+    _module("rules/common--testing", ""),
+    _module("skills/security-review", "Check auth tokens and sql injection."),
+]
+
+
+def test_round_trip(tmp_path):
+    assert write_content_pack(MODULES, str(tmp_path))
+    pack = ContentPack(str(tmp_path / CONTENT_PACK))
+
+    assert len(pack) == len(MODULES)
+    assert pack.module_ids() == sorted(m.module_id for m in MODULES)
+    for m in MODULES:
+        assert m.module_id in pack
+        assert pack.get(m.module_id) == m.content
+    assert "skills/missing" not in pack
+    assert pack.get("skills/missing") is None
+    assert pack.get("") is None
+
+
+def test_bodies_are_compressed(tmp_path):
+    modules = [_module(f"skills/s{i}", MODULES[0].content * 10) for i in range(20)]
+    write_content_pack(modules, str(tmp_path))
+    raw = sum(len(m.content.encode("utf-8")) for m in modules)
+    assert os.path.getsize(tmp_path / CONTENT_PACK) < raw
+
+
+def test_unchanged_corpus_is_not_rewritten(tmp_path):
+    assert write_content_pack(MODULES, str(tmp_path))
+    path = tmp_path / CONTENT_PACK
+    mtime = os.stat(path).st_mtime_ns
+
+    assert not write_content_pack(list(reversed(MODULES)), str(tmp_path))
+    assert os.stat(path).st_mtime_ns == mtime
+
+    changed = MODULES[:-1] + [_module("skills/security-review", "Rotate secrets.")]
+    assert write_content_pack(changed, str(tmp_path))
+    assert ContentPack(str(path)).get("skills/security-review") == "Rotate secrets."
+
+
+def test_empty_corpus(tmp_path):
+    write_content_pack([], str(tmp_path))
+    pack = ContentPack(str(tmp_path / CONTENT_PACK))
+    assert len(pack) == 0
+    assert pack.module_ids() == []
+    assert pack.get("skills/tdd-workflow") is None
+
+
+def test_open_ignores_missing_or_corrupt_pack(tmp_path):
+    path = tmp_path / CONTENT_PACK
+    assert ContentPack.open(str(path)) is None
+    path.write_bytes(b"not a pack")
+    assert ContentPack.open(str(path)) is None
+
+
+def test_content_store_loads_pack(tmp_path):
+    write_content_pack(MODULES, str(tmp_path))
+    store = SourceContentStore()
+
+    assert store.load_from_pack(tmp_path / CONTENT_PACK) == len(MODULES)
+    assert len(store) == len(MODULES)
+    assert "agents/architect" in store
+    assert store.get("agents/architect") == MODULES[1].content
+    assert store.get("skills/missing") is None
+
+
+def test_content_store_without_pack_falls_back(tmp_path):
+    store = SourceContentStore()
+    assert store.load_from_pack(tmp_path / CONTENT_PACK) == 0
+    assert len(store) == 0
+    assert store.get("agents/architect") is None
@@ -0,0 +1,115 @@
+"""Tests for the persistent decode cache."""
+
+import subprocess
+import sys
+import time
+
+import torch
+
+from src.gateway.decode_cache import DecodeCache, decode_cache_key
+from src.gateway.decoder import LatentDecoder
+from src.shared.types import RetrievedModule
+
+
+def test_key_is_content_addressed():
+    key = decode_cache_key("get_rules", ["a", "b"], "Qwen/Qwen3-4B", 150, 0.3, 0.9)
+    assert key == decode_cache_key("get_rules", ["b", "a"], "Qwen/Qwen3-4B", 150, 0.3, 0.9)
+    for other in [
+        ("architect_consult", ["a", "b"], "Qwen/Qwen3-4B", 150, 0.3, 0.9),
+        ("get_rules", ["a", "c"], "Qwen/Qwen3-4B", 150, 0.3, 0.9),
+        ("get_rules", ["a", "b"], "Qwen/Qwen3-14B", 150, 0.3, 0.9),
+        ("get_rules", ["a", "b"], "Qwen/Qwen3-4B", 100, 0.3, 0.9),
+        ("get_rules", ["a", "b"], "Qwen/Qwen3-4B", 150, 0.0, 0.9),
+        ("get_rules", ["a", "b"], "Qwen/Qwen3-4B", 150, 0.3, 0.9, ["fp-latent-4"]),
+    ]:
+        assert decode_cache_key(*other) != key
+
+
+def test_survives_reopen_and_evicts_least_recently_used(tmp_path):
+    path = str(tmp_path / "cache" / "decode.sqlite3")
+    cache = DecodeCache(path, max_entries=3)
+    for key in ("a", "b", "c"):
+        cache.put(key, f"text {key}")
+        time.sleep(0.002)
+    assert cache.get("a") == "text a"  # a is now the most recent
+    time.sleep(0.002)
+    cache.put("d", "text d")
+    cache.close()
+
+    reopened = DecodeCache(path, max_entries=3)
+    assert len(reopened) == 3
+    assert reopened.get("b") is None
+    assert [reopened.get(k) for k in ("a", "c", "d")] == ["text a", "text c", "text d"]
+    assert reopened.get("missing") is None
+
+
+# Run in separate interpreters that import only the cache module
+_WRITER = """
+import sys
+from src.gateway.decode_cache import DecodeCache
+cache = DecodeCache(sys.argv[1], max_entries=50)
+for i in range(40):
+    cache.put(f"{sys.argv[2]}-{i}", "x" * 100)
+    cache.get(f"{sys.argv[2]}-{i // 2}")
+cache.close()
+"""
+
+
+def test_concurrent_processes(tmp_path):
+    path = str(tmp_path / "decode.sqlite3")
+    DecodeCache(path).close()
+    workers = [
+        subprocess.Popen([sys.executable, "-c", _WRITER, path, str(w)]) for w in range(3)
+    ]
+    assert [worker.wait(60) for worker in workers] == [0, 0, 0]
+    assert len(DecodeCache(path, max_entries=50)) == 50
+
+
+class _CountingWrapper:
+    model_name = "tiny"
+
+    def __init__(self):
+        self.calls = 0
+
+    def decode_from_latent(self, latent_embeddings, decode_messages, max_new_tokens):
+        self.calls += 1
+        return f"decoded {latent_embeddings.shape[0]} steps"
+
+
+def _module(module_id: str, content_hash: str, fingerprint: str = "fp") -> RetrievedModule:
+    return RetrievedModule(
+        module_id=module_id,
+        name=module_id,
+        module_type="rule",
+        description="",
+        score=1.0,
+        layer_states=None,
+        latent_trajectory=torch.zeros(2, 4),
+        original_token_count=10,
+        content_hash=content_hash,
+        compile_fingerprint=fingerprint,
+    )
+
+
+def test_decoder_reuses_store_across_instances(tmp_path):
+    path = str(tmp_path / "decode.sqlite3")
+    modules = [_module("rules/a", "hash-a"), _module("rules/b", "hash-b")]
+
+    first = _CountingWrapper()
+    text = LatentDecoder(first, store=DecodeCache(path)).decode(modules, "get_rules")
+    assert first.calls == 1
+
+    # A fresh process (empty in-memory LRU) finds it on disk
+    second = _CountingWrapper()
+    decoder = LatentDecoder(second, store=DecodeCache(path))
+    assert decoder.decode(list(reversed(modules)), "get_rules") == text
+    assert second.calls == 0
+
+    # A recompiled module has a new content hash and misses
+    decoder.decode([modules[0], _module("rules/b", "hash-b2")], "get_rules")
+    assert second.calls == 1
+
+    # So does one recompiled with other settings (e.g. --latent-steps)
+    recompiled = [_module("rules/a", "hash-a", "fp2"), _module("rules/b", "hash-b", "fp2")]
+    decoder.decode(recompiled, "get_rules")
+    assert second.calls == 2
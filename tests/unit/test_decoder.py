@@ -0,0 +1,74 @@
+"""Tests for streaming latent decoding."""
+
+import pytest
+import torch
+
+from src.adapter.chat_template import build_decode_prompt
+from src.benchmarks.tiny_model import build_tiny_wrapper
+from src.gateway.decoder import LatentDecoder
+from src.shared.types import RetrievedModule
+
+
+@pytest.fixture(scope="module")
+def wrapper():
+    return build_tiny_wrapper()
+
+
+def _drain(stream):
+    """All yielded pieces and the generator's return value."""
+    pieces = []
+    while True:
+        try:
+            pieces.append(next(stream))
+        except StopIteration as done:
+            return pieces, done.value
+
+
+def _modules(seed: int = 0) -> list[RetrievedModule]:
+    generator = torch.Generator().manual_seed(seed)
+    return [
+        RetrievedModule(
+            module_id=f"rules/m{i}",
+            name=f"m{i}",
+            module_type="rule",
+            description="",
+            score=0.9,
+            layer_states=None,
+            latent_trajectory=torch.randn(3, 64, generator=generator),
+            original_token_count=100,
+        )
+        for i in range(2)
+    ]
+
+
+def test_stream_matches_decode_from_latent(wrapper):
+    latent = torch.randn(4, 64, generator=torch.Generator().manual_seed(1))
+    messages = build_decode_prompt("rule", "m0, m1")
+    expected = wrapper.decode_from_latent(latent, messages, max_new_tokens=24, temperature=0)
+
+    pieces, text = _drain(
+        wrapper.decode_from_latent_stream(latent, messages, max_new_tokens=24, temperature=0)
+    )
+    assert text == expected
+    assert len(pieces) > 1
+    assert all(pieces)
+    assert "".join(pieces) == expected
+
+
+def test_decode_stream_fills_cache_on_completion(wrapper):
+    decoder = LatentDecoder(wrapper, max_tokens=8)
+    modules = _modules()
+
+    pieces, text = _drain(decoder.decode_stream(modules, "architect_consult"))
+    assert "".join(pieces) == text
+    # Cached: decode() and a second stream return the same text without generating
+    assert decoder.decode(modules, "architect_consult") == text
+    assert _drain(decoder.decode_stream(modules, "architect_consult")) == ([text], text)
+
+
+def test_closed_stream_is_not_cached(wrapper):
+    decoder = LatentDecoder(wrapper, max_tokens=8)
+    stream = decoder.decode_stream(_modules(seed=2), "architect_consult")
+    next(stream)
+    stream.close()
+    assert len(decoder._cache) == 0
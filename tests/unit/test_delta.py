@@ -3,8 +3,10 @@
 import json
 import os
 import tempfile
+from types import SimpleNamespace
 
-from src.compiler.delta import DeltaCompiler
+from src.compiler import cli
+from src.compiler.delta import CompileFingerprint, DeltaCompiler
 from src.shared.types import ParsedModule
 
 
@@ -83,3 +85,139 @@ def test_save_creates_directory():
         dc.needs_recompile(_make_module("x", "y"))
         dc.save_hashes()
         assert os.path.exists(hash_file)
+
+
+def _fingerprint(model_name="Qwen/Qwen3-4B", latent_steps=8):
+    return CompileFingerprint(
+        model_name=model_name, hidden_size=2560, latent_steps=latent_steps, template_hash="t"
+    )
+
+
+def test_fingerprint_change_forces_recompile():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hash_file = os.path.join(tmpdir, "hashes.json")
+        m = _make_module("rules/a", "content a")
+
+        dc1 = DeltaCompiler(hash_file=hash_file, fingerprint=_fingerprint())
+        dc1.needs_recompile(m)
+        dc1.save_hashes()
+
+        same = DeltaCompiler(hash_file=hash_file, fingerprint=_fingerprint())
+        same.load_previous_hashes()
+        assert same.needs_recompile(m) is False
+        assert same.needs_recompile(m, stamp=_fingerprint().key) is False
+        assert same.needs_recompile(m, stamp="") is True
+
+        other = DeltaCompiler(hash_file=hash_file, fingerprint=_fingerprint(latent_steps=4))
+        other.load_previous_hashes()
+        assert other.needs_recompile(m) is True
+
+
+def test_activate_swaps_artifacts_between_fingerprints():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hash_file = os.path.join(tmpdir, "cache", "hashes.json")
+        tensor_dir = os.path.join(tmpdir, "tensors")
+        index_dir = os.path.join(tmpdir, "index")
+        m = _make_module("rules/a", "content a")
+
+        def compile_with(fp, marker):
+            dc = DeltaCompiler(hash_file=hash_file, fingerprint=fp)
+            dc.load_previous_hashes()
+            dc.activate(tensor_dir, index_dir)
+            if dc.needs_recompile(m):
+                for d in (tensor_dir, index_dir):
+                    os.makedirs(d, exist_ok=True)
+                    with open(os.path.join(d, "marker"), "w") as f:
+                        f.write(marker)
+            dc.save_hashes()
+
+        small, large = _fingerprint("small"), _fingerprint("large")
+        compile_with(small, "small")
+        compile_with(large, "large")
+        compile_with(small, "unused")  # restored from the stash, not recompiled
+
+        with open(os.path.join(tensor_dir, "marker")) as f:
+            assert f.read() == "small"
+        with open(hash_file) as f:
+            data = json.load(f)
+        assert data["active"] == small.key
+        assert set(data["profiles"]) == {small.key, large.key}
+
+
+def test_crash_after_activate_keeps_both_stashes():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hash_file = os.path.join(tmpdir, "cache", "hashes.json")
+        tensor_dir = os.path.join(tmpdir, "tensors")
+        index_dir = os.path.join(tmpdir, "index")
+        small, large = _fingerprint("small"), _fingerprint("large")
+
+        def write_marker(marker):
+            for d in (tensor_dir, index_dir):
+                os.makedirs(d, exist_ok=True)
+                with open(os.path.join(d, "marker"), "w") as f:
+                    f.write(marker)
+
+        def start(fp):
+            dc = DeltaCompiler(hash_file=hash_file, fingerprint=fp)
+            dc.load_previous_hashes()
+            dc.activate(tensor_dir, index_dir)
+            return dc
+
+        start(small)
+        write_marker("small")
+        DeltaCompiler(hash_file=hash_file, fingerprint=small).save_hashes()
+
+        # Crash: the swap happened but the compile never saved its hashes
+        start(large)
+        write_marker("large-partial")
+        with open(hash_file) as f:
+            assert json.load(f)["active"] == large.key
+
+        # The rerun resumes as large and leaves small's stash alone
+        assert start(large).previous_profile == large.key
+        with open(os.path.join(tensor_dir, "marker")) as f:
+            assert f.read() == "large-partial"
+        start(small)
+        with open(os.path.join(tensor_dir, "marker")) as f:
+            assert f.read() == "small"
+
+
+def test_loads_v1_hash_file():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hash_file = os.path.join(tmpdir, "hashes.json")
+        m = _make_module("rules/a", "content a")
+        with open(hash_file, "w") as f:
+            json.dump({"rules/a": m.content_hash}, f)
+
+        dc = DeltaCompiler(hash_file=hash_file)
+        dc.load_previous_hashes()
+        assert dc.needs_recompile(m) is False
+
+
+def test_cli_delta_reads_stamps_only_without_a_profile_entry(monkeypatch):
+    reads = []
+
+    def fake_metadata(tensor_dir, module_id):
+        reads.append(module_id)
+        return {"compile_fingerprint": _fingerprint().key}
+
+    monkeypatch.setattr(cli, "load_module_metadata", fake_metadata)
+    args = SimpleNamespace(dry_run=False, output="/tmp/tensors")
+    m = _make_module("rules/a", "content a")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        hash_file = os.path.join(tmpdir, "hashes.json")
+        first = DeltaCompiler(hash_file=hash_file, fingerprint=_fingerprint())
+        first.needs_recompile(m)
+        first.save_hashes()
+
+        recorded = DeltaCompiler(hash_file=hash_file, fingerprint=_fingerprint())
+        recorded.load_previous_hashes()
+        assert cli._needs_recompile(recorded, m, args) is False
+        assert reads == []
+
+        # Hashes without this fingerprint's entry: the tensors' stamp decides
+        legacy = DeltaCompiler(hash_file=hash_file, fingerprint=_fingerprint())
+        legacy.old_hashes = {m.module_id: m.content_hash}
+        assert cli._needs_recompile(legacy, m, args) is False
+        assert reads == ["rules/a"]
@@ -0,0 +1,57 @@
+"""Tests for the latent encoder (single and batched paths)."""
+
+import pytest
+import torch
+
+from src.benchmarks.tiny_model import build_tiny_wrapper
+from src.compiler.encoder import LatentEncoder, bucket_by_length
+from src.shared.types import ParsedModule
+
+
+def _make_module(module_id: str, content: str) -> ParsedModule:
+    return ParsedModule(
+        module_id=module_id,
+        module_type="rule",
+        name=module_id.split("/")[-1],
+        description="",
+        content=content,
+        source_path="/tmp/test.md",
+    )
+
+
+@pytest.fixture(scope="module")
+def encoder():
+    return LatentEncoder(build_tiny_wrapper())
+
+
+def test_encode_modules_matches_single(encoder):
+    """Batched encoding should match one-at-a-time encoding despite padding."""
+    modules = [
+        _make_module("rules/short", "Use tabs."),
+        _make_module("rules/long", "Always validate input at trust boundaries. " * 4),
+        _make_module("rules/mid", "Prefer composition over inheritance."),
+    ]
+    batched = encoder.encode_modules(modules, latent_steps=3)
+
+    assert [e.module_id for e in batched] == [m.module_id for m in modules]
+    for module, enc in zip(modules, batched):
+        single = encoder.encode_module(module, latent_steps=3)
+        assert enc.latent_trajectory.shape == single.latent_trajectory.shape
+        assert torch.allclose(enc.mean_embedding, single.mean_embedding, atol=1e-4)
+        assert torch.allclose(enc.layer_states, single.layer_states, atol=1e-4)
+        assert torch.allclose(enc.latent_trajectory, single.latent_trajectory, atol=1e-4)
+        assert enc.token_count == single.token_count
+
+
+def test_bucket_by_length_groups_similar_sizes():
+    modules = [_make_module(f"rules/{n}", "x" * n) for n in (50, 1, 40, 2, 30, 3)]
+    batches = bucket_by_length(modules, 2, lambda m: len(m.content))
+
+    assert [[len(m.content) for m in b] for b in batches] == [[1, 2], [3, 30], [40, 50]]
+
+
+def test_bucket_by_length_batch_size_one_keeps_order():
+    modules = [_make_module(f"rules/{n}", "x" * n) for n in (5, 1, 3)]
+    batches = bucket_by_length(modules, 1, lambda m: len(m.content))
+
+    assert [b[0].module_id for b in batches] == ["rules/5", "rules/1", "rules/3"]
@@ -4,9 +4,11 @@ import os
 import tempfile
 
 import numpy as np
+import pytest
 import torch
 
-from src.compiler.indexer import NumpyIndex
+from src.compiler.indexer import NumpyIndex, TypeLayout, quantize_embeddings, top_k_indices
+from src.compiler.manifest import BINARY_MANIFEST, BinaryManifest
 from src.shared.types import EncodedModule
 
 
@@ -77,9 +79,9 @@ def test_query_module_type_filter():
     index.build(modules)
 
     query = np.ones(H, dtype=np.float32)
-    # min_score=0.0 filters out entries whose score was set to -1.0 by the type filter
-    results = index.query(query, top_k=5, module_type_filter="rule", min_score=0.0)
-    assert len(results) >= 1
+    # Rows of other types are never returned, whatever min_score is
+    results = index.query(query, top_k=5, module_type_filter="rule", min_score=-10.0)
+    assert len(results) == 1
     for entry, score in results:
         assert entry.module_type == "rule"
 
@@ -128,7 +130,412 @@ def test_save_and_load():
         assert len(loaded.entries) == 5
 
 
+def test_load_binary_manifest_and_mmap():
+    H = 32
+    modules = [_make_encoded(f"skills/{i}", torch.randn(H)) for i in range(5)]
+    modules[3].module_type = "rule"
+    index = NumpyIndex()
+    index.build(modules)
+    index.compile_fingerprint = "fp1"
+    query = np.random.randn(H).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index.save(tmpdir)
+        assert os.path.exists(os.path.join(tmpdir, BINARY_MANIFEST))
+
+        loaded = NumpyIndex(mmap=True)
+        loaded.load(tmpdir)
+        assert isinstance(loaded.embeddings, np.memmap)
+        assert isinstance(loaded.entries, BinaryManifest)
+        assert loaded.compile_fingerprint == "fp1"
+        # Nothing is decoded per entry until a lookup needs it
+        assert loaded._rows is None and loaded._keywords is None and loaded._types is None
+        assert loaded.entries._cache == {}
+        assert list(loaded.entries) == index.entries
+        assert loaded.get_by_id("skills/3").module_type == "rule"
+        assert loaded.query(query, min_score=-1.0) == index.query(query, min_score=-1.0)
+        assert loaded.query(query, module_type_filter="rule", min_score=-1.0)[0][0].module_id == (
+            "skills/3"
+        )
+
+        # Mutations work on in-memory copies; a delta log forces the JSON path
+        loaded.remove("skills/0")
+        assert isinstance(loaded.entries, list)
+        loaded.save_delta(tmpdir)
+        reloaded = NumpyIndex(mmap=True)
+        reloaded.load(tmpdir)
+        assert isinstance(reloaded.entries, list)
+        assert [e.module_id for e in reloaded.entries] == [e.module_id for e in loaded.entries]
+        assert reloaded.compile_fingerprint == "fp1"
+
+
 def test_empty_index_query():
     index = NumpyIndex()
     results = index.query(np.zeros(32, dtype=np.float32))
     assert results == []
+
+
+def test_upsert_and_remove_patch_saved_index():
+    H = 32
+    modules = [_make_encoded(f"skills/{i}", torch.randn(H)) for i in range(5)]
+    index = NumpyIndex()
+    index.build(modules)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index.save(tmpdir)
+
+        patched = NumpyIndex()
+        patched.load(tmpdir)
+        changed = _make_encoded("skills/2", torch.randn(H))
+        added = _make_encoded("skills/new", torch.randn(H))
+        patched.upsert(changed)
+        patched.upsert(added)
+        assert patched.remove("skills/0")
+        assert not patched.remove("skills/missing")
+        patched.save_delta(tmpdir)
+        assert os.path.exists(os.path.join(tmpdir, "manifest.log.jsonl"))
+
+        loaded = NumpyIndex()
+        loaded.load(tmpdir)
+        ids = [e.module_id for e in loaded.entries]
+        assert sorted(ids) == ["skills/1", "skills/2", "skills/3", "skills/4", "skills/new"]
+        np.testing.assert_array_equal(loaded.embeddings, patched.embeddings)
+
+        # Same vectors as a from-scratch build of the final module set
+        final = [m for m in modules if m.module_id not in ("skills/0", "skills/2")]
+        rebuilt = NumpyIndex()
+        rebuilt.build(final + [changed, added])
+        for entry, row in zip(rebuilt.entries, rebuilt.embeddings):
+            np.testing.assert_allclose(
+                loaded.embeddings[ids.index(entry.module_id)], row, rtol=1e-6
+            )
+
+
+def test_save_delta_leaves_mapped_readers_intact():
+    H = 16
+    modules = [_make_encoded(f"skills/{i}", torch.randn(H)) for i in range(6)]
+    index = NumpyIndex()
+    index.build(modules)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index.save(tmpdir)
+        server = NumpyIndex(mmap=True)
+        server.load(tmpdir)
+        before = np.array(server.embeddings)
+
+        patcher = NumpyIndex()
+        patcher.load(tmpdir)
+        patcher.upsert(_make_encoded("skills/1", torch.randn(H)))
+        for i in range(2, 6):
+            patcher.remove(f"skills/{i}")  # shrinks the file
+        patcher.save_delta(tmpdir)
+
+        # The server's mapping still shows the file it loaded
+        np.testing.assert_array_equal(server.embeddings, before)
+        reloaded = NumpyIndex()
+        reloaded.load(tmpdir)
+        np.testing.assert_array_equal(reloaded.embeddings, patcher.embeddings)
+        del server
+
+
+def test_save_delta_without_synced_dir_does_full_save():
+    H = 16
+    index = NumpyIndex()
+    index.upsert(_make_encoded("skills/a", torch.randn(H)))
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index.save_delta(tmpdir)
+        assert not os.path.exists(os.path.join(tmpdir, "manifest.log.jsonl"))
+
+        loaded = NumpyIndex()
+        loaded.load(tmpdir)
+        assert [e.module_id for e in loaded.entries] == ["skills/a"]
+
+
+def test_quantize_int8_per_row_scale():
+    matrix = np.random.default_rng(0).standard_normal((10, 16)).astype(np.float32)
+    matrix[3] *= 100  # per-row scales keep small rows precise
+    quantized, scales = quantize_embeddings(matrix, "int8")
+    assert quantized.dtype == np.int8
+    np.testing.assert_allclose(quantized * scales[:, None], matrix, atol=scales.max() / 2)
+    np.testing.assert_allclose(quantized[0] * scales[0], matrix[0], atol=scales[0] / 2 + 1e-7)
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_quantized_query_matches_float32(storage):
+    H = 64
+    modules = [_make_encoded(f"skills/m{i}", torch.randn(H)) for i in range(200)]
+    modules[7].module_type = "rule"
+    exact = NumpyIndex()
+    exact.build(modules)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        exact.save(tmpdir)
+        quantized = NumpyIndex(storage=storage)
+        quantized.load(tmpdir)
+        assert isinstance(quantized.embeddings, np.memmap)
+
+        rng = np.random.default_rng(1)
+        for _ in range(10):
+            query = rng.standard_normal(H).astype(np.float32)
+            kwargs = {"top_k": 5, "min_score": -1.0, "query_text": "m7 m12"}
+            expected = exact.query(query, **kwargs)
+            actual = quantized.query(query, **kwargs)
+            # Rescoring is exact, so ids and scores match the float32 index
+            assert [e.module_id for e, _ in actual] == [e.module_id for e, _ in expected]
+            np.testing.assert_allclose(
+                [s for _, s in actual], [s for _, s in expected], rtol=1e-5
+            )
+        filtered = quantized.query(query, top_k=3, module_type_filter="rule", min_score=-0.5)
+        assert [e.module_id for e, _ in filtered] == [
+            e.module_id
+            for e, _ in exact.query(query, top_k=3, module_type_filter="rule", min_score=-0.5)
+        ]
+        del quantized
+
+
+def test_quantized_copy_saved_and_refreshed():
+    H = 32
+    modules = [_make_encoded(f"skills/{i}", torch.randn(H)) for i in range(5)]
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index = NumpyIndex(storage="int8")
+        index.build(modules)
+        index.save(tmpdir)
+        assert os.path.exists(os.path.join(tmpdir, "embeddings.i8.npy"))
+        assert os.path.exists(os.path.join(tmpdir, "embeddings.i8.scale.npy"))
+
+        # A float32 delta compile leaves the quantized copy stale
+        patcher = NumpyIndex()
+        patcher.load(tmpdir)
+        changed = _make_encoded("skills/1", -torch.ones(H))
+        patcher.upsert(changed)
+        patcher.save_delta(tmpdir)
+        os.utime(
+            os.path.join(tmpdir, "embeddings.i8.npy"), ns=(0, 0)
+        )
+
+        loaded = NumpyIndex(storage="int8")
+        loaded.load(tmpdir)
+        results = loaded.query(-np.ones(H, dtype=np.float32), top_k=1)
+        assert results[0][0].module_id == "skills/1"
+
+        # Mutating a mapped index copies it into memory first
+        loaded.upsert(_make_encoded("skills/new", torch.ones(H)))
+        assert not isinstance(loaded.embeddings, np.memmap)
+        assert loaded.query(np.ones(H, dtype=np.float32), top_k=1)[0][0].module_id == "skills/new"
+        del loaded
+
+
+def test_unknown_storage_rejected():
+    with pytest.raises(ValueError):
+        NumpyIndex(storage="int4")
+
+
+def _reference_keyword_scores(index, query, query_text):
+    """The original per-entry substring loop the postings replace."""
+    query_norm = (query / max(np.linalg.norm(query), 1e-8)).astype(np.float32)
+    scores = index.embeddings @ query_norm
+    keywords = set(query_text.lower().split())
+    for i, entry in enumerate(index.entries):
+        match_text = f"{entry.module_id} {entry.name} {entry.description}".lower()
+        hits = sum(1 for kw in keywords if kw in match_text)
+        if hits > 0:
+            scores[i] += 0.05 * hits
+    return scores
+
+
+def test_keyword_boost_identical_to_substring_loop():
+    rng = np.random.default_rng(0)
+    words = ["auth", "authentication", "API", "rate-limit", "go", "golang", "tdd", "é-test"]
+    H = 16
+    modules = []
+    for i in range(300):
+        module = _make_encoded(f"skills/m{i}", torch.randn(H))
+        module.name = f"Name{i}"
+        module.description = " ".join(rng.choice(words, rng.integers(0, 6)))
+        modules.append(module)
+    index = NumpyIndex()
+    index.build(modules)
+
+    queries = [
+        "auth", "AUTH api", "s/m1", "m12 go", "thentic limit-", "é-t", "nothing-matches",
+        "go go golang", "-", "name29 tdd rate",
+    ]
+    for query_text in queries:
+        query = rng.standard_normal(H).astype(np.float32)
+        expected = _reference_keyword_scores(index, query, query_text)
+        results = index.query(query, top_k=300, min_score=-10.0, query_text=query_text)
+        rows = [index._row_map()[e.module_id] for e, _ in results]
+        np.testing.assert_array_equal(
+            np.array([s for _, s in results], dtype=np.float32), expected[rows]
+        )
+        assert sorted(rows) == list(range(300))
+
+    # Postings follow upserts and removals
+    changed = _make_encoded("skills/m5", torch.randn(H))
+    changed.description = "brand-new-keyword"
+    index.upsert(changed)
+    index.remove("skills/m7")
+    query = rng.standard_normal(H).astype(np.float32)
+    expected = _reference_keyword_scores(index, query, "brand auth")
+    np.testing.assert_array_equal(
+        index.embeddings @ (query / np.linalg.norm(query)).astype(np.float32)
+        + index._keyword_boost("brand auth"),
+        expected,
+    )
+
+
+def test_top_k_indices():
+    scores = np.array([0.1, 0.9, 0.5, 0.9, -0.2], dtype=np.float32)
+    assert top_k_indices(scores, 3).tolist() == [1, 3, 2]
+    assert top_k_indices(scores, 10).tolist() == [1, 3, 2, 0, 4]
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_type_layout_rows_and_masks():
+    layout = TypeLayout(["skill", "rule", "skill", "hook", "rule"])
+    from_codes = TypeLayout.from_codes(np.array([2, 0, 2, 1, 0]), ["rule", "hook", "skill"])
+    for name in ("skill", "rule", "hook"):
+        assert from_codes.rows(name).tolist() == layout.rows(name).tolist()
+    assert layout.rows("skill").tolist() == [0, 2]
+    assert layout.rows("rule").tolist() == [1, 4]
+    assert layout.rows("agent").tolist() == []
+    assert layout.keep(None, None) is None
+    assert layout.keep("rule", None).tolist() == [False, True, False, False, True]
+    assert layout.keep(None, {"hook", "agent"}).tolist() == [True, True, True, False, True]
+    assert layout.keep("rule", {"rule"}).tolist() == [False] * 5
+    assert layout.keep("agent", None).tolist() == [False] * 5
+
+
+def _reference_filtered_query(index, query, top_k, module_type_filter, exclude_types):
+    """Per-call list masks and a full argsort, as query() did before TypeLayout."""
+    query_norm = (query / max(np.linalg.norm(query), 1e-8)).astype(np.float32)
+    scores = index.embeddings @ query_norm
+    keep = np.array([
+        (not module_type_filter or e.module_type == module_type_filter)
+        and not (exclude_types and e.module_type in exclude_types)
+        for e in index.entries
+    ])
+    rows = [i for i in np.argsort(-scores, kind="stable") if keep[i]][:top_k]
+    return [(index.entries[i].module_id, float(scores[i])) for i in rows]
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16"])
+def test_type_filters_match_reference(storage):
+    rng = np.random.default_rng(3)
+    types = ["skill", "rule", "agent", "hook", "context"]
+    H = 16
+    modules = []
+    for i in range(400):
+        vector = torch.from_numpy(rng.standard_normal(H).astype(np.float32))
+        module = _make_encoded(f"m/{i}", vector)
+        module.module_type = types[i % len(types)]
+        modules.append(module)
+    index = NumpyIndex(storage=storage)
+    index.build(modules)
+    # Layout follows upserts and removals
+    moved = _make_encoded("m/7", torch.from_numpy(rng.standard_normal(H).astype(np.float32)))
+    moved.module_type = "hook"
+    index.upsert(moved)
+    index.remove("m/11")
+
+    filters = [
+        (None, None), ("rule", None), (None, {"hook", "context"}), ("hook", {"context"}),
+        ("hook", {"hook"}), ("missing", None), (None, {"missing"}),
+    ]
+    for module_type_filter, exclude_types in filters:
+        query = rng.standard_normal(H).astype(np.float32)
+        expected = _reference_filtered_query(index, query, 5, module_type_filter, exclude_types)
+        results = index.query(
+            query,
+            top_k=5,
+            module_type_filter=module_type_filter,
+            exclude_types=exclude_types,
+            min_score=-2.0,
+        )
+        assert [e.module_id for e, _ in results] == [mid for mid, _ in expected]
+        np.testing.assert_allclose(
+            [s for _, s in results], [s for _, s in expected], rtol=1e-5, atol=1e-6
+        )
+
+
+def test_rows_grouped_by_type_on_build_and_save():
+    rng = np.random.default_rng(4)
+    H = 16
+    modules = []
+    for i, module_type in enumerate(["skill", "rule", "skill", "hook", "rule", "agent"] * 5):
+        vector = torch.from_numpy(rng.standard_normal(H).astype(np.float32))
+        module = _make_encoded(f"m/{i}", vector)
+        module.module_type = module_type
+        modules.append(module)
+    index = NumpyIndex()
+    index.build(modules)
+
+    types = [e.module_type for e in index.entries]
+    assert types == sorted(types)
+    layout = TypeLayout(types)
+    assert layout.grouped
+    assert layout.span("rule") == slice(types.index("rule"), types.index("rule") + 10)
+    assert layout.span("missing") is None
+
+    # An upsert appends out of place; that type falls back to a gather
+    extra = _make_encoded("m/new", torch.from_numpy(rng.standard_normal(H).astype(np.float32)))
+    extra.module_type = "hook"
+    index.upsert(extra)
+    scattered = TypeLayout([e.module_type for e in index.entries])
+    assert scattered.span("hook") is None and scattered.span("rule") is not None
+    assert not scattered.grouped
+
+    query = rng.standard_normal(H).astype(np.float32)
+    expected = index.query(query, top_k=4, module_type_filter="hook", min_score=-2.0)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        index.save(tmpdir)
+        loaded = NumpyIndex(mmap=True)
+        loaded.load(tmpdir)
+        assert TypeLayout([e.module_type for e in loaded.entries]).grouped
+        actual = loaded.query(query, top_k=4, module_type_filter="hook", min_score=-2.0)
+        assert [e.module_id for e, _ in actual] == [e.module_id for e, _ in expected]
+        np.testing.assert_allclose([s for _, s in actual], [s for _, s in expected], rtol=1e-6)
+        del loaded
+
+
+def test_query_batch_matches_query():
+    rng = np.random.default_rng(5)
+    H = 16
+    modules = []
+    for i in range(60):
+        vector = torch.from_numpy(rng.standard_normal(H).astype(np.float32))
+        module = _make_encoded(f"m/{i}", vector)
+        module.module_type = ("rule", "skill", "hook")[i % 3]
+        modules.append(module)
+    index = NumpyIndex()
+    index.build(modules)
+
+    queries = rng.standard_normal((4, H)).astype(np.float32)
+    filters = ["rule", None, None, "skill"]
+    texts = [None, "m/1", None, "m/4 m/7"]
+    excludes = [None, {"hook"}, None, {"skill"}]
+    top_ks = [3, 5, 10, 2]
+    batched = index.query_batch(
+        queries,
+        top_k=top_ks,
+        module_type_filters=filters,
+        min_score=-2.0,
+        query_texts=texts,
+        exclude_types=excludes,
+    )
+    for i, results in enumerate(batched):
+        expected = index.query(
+            queries[i],
+            top_k=top_ks[i],
+            module_type_filter=filters[i],
+            min_score=-2.0,
+            query_text=texts[i],
+            exclude_types=excludes[i],
+        )
+        assert [e.module_id for e, _ in results] == [e.module_id for e, _ in expected]
+        np.testing.assert_allclose(
+            [s for _, s in results], [s for _, s in expected], rtol=1e-5, atol=1e-6
+        )
+    assert batched[3] == []
+    assert NumpyIndex().query_batch(queries) == [[], [], [], []]
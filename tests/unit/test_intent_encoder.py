@@ -0,0 +1,28 @@
+"""Tests for the intent encoder."""
+
+import numpy as np
+
+from src.benchmarks.tiny_model import build_tiny_wrapper
+from src.gateway.intent_encoder import IntentEncoder
+
+
+def test_encode_batch_matches_encode_and_dedupes():
+    wrapper = build_tiny_wrapper()
+    batch_encoder = IntentEncoder(wrapper)
+    single_encoder = IntentEncoder(wrapper)
+    intents = ["auth flow", "rate limiting ", "auth flow", "tdd"]
+
+    calls = []
+    encode_text_batch = wrapper.encode_text_batch
+    wrapper.encode_text_batch = lambda batch: calls.append(len(batch)) or encode_text_batch(batch)
+    vectors = batch_encoder.encode_batch(intents)
+
+    assert calls == [3]  # one forward pass over the distinct intents
+    assert vectors.shape == (4, 64)
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+    for intent, vector in zip(intents, vectors):
+        np.testing.assert_allclose(vector, single_encoder.encode(intent), atol=1e-4)
+
+    # Everything is cached now
+    batch_encoder.encode_batch(intents)
+    assert calls == [3]
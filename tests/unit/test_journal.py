@@ -0,0 +1,89 @@
+"""Tests for the compile checkpoint journal."""
+
+import torch
+
+from src.compiler.journal import CompileJournal
+from src.shared.types import EncodedModule, ParsedModule
+
+
+def _parsed(module_id: str, content_hash: str) -> ParsedModule:
+    return ParsedModule(
+        module_id=module_id,
+        module_type="rule",
+        name=module_id,
+        description="",
+        content="x",
+        source_path="/tmp/x.md",
+        content_hash=content_hash,
+    )
+
+
+def _encoded(module_id: str, content_hash: str) -> EncodedModule:
+    return EncodedModule(
+        module_id=module_id,
+        module_type="rule",
+        name=module_id,
+        description="",
+        mean_embedding=torch.zeros(1),
+        layer_states=torch.zeros(1),
+        latent_trajectory=torch.zeros(1),
+        content_hash=content_hash,
+        token_count=1,
+    )
+
+
+def test_record_then_load(tmp_path):
+    path = str(tmp_path / "cache" / "journal.jsonl")
+    journal = CompileJournal(path, fingerprint="fp1")
+    journal.record(_encoded("rules/a", "h1"))
+    journal.record(_encoded("rules/b", "h2"))
+    journal.close()
+
+    resumed = CompileJournal(path, fingerprint="fp1")
+    assert resumed.load() == 2
+    assert resumed.is_done(_parsed("rules/a", "h1"))
+    assert not resumed.is_done(_parsed("rules/a", "changed"))
+    assert not resumed.is_done(_parsed("rules/c", "h3"))
+
+
+def test_load_ignores_other_fingerprints_and_torn_lines(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with CompileJournal(path, fingerprint="old") as journal:
+        journal.record(_encoded("rules/a", "h1"))
+    with CompileJournal(path, fingerprint="new") as journal:
+        journal.record(_encoded("rules/b", "h2"))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"module_id": "rules/c", "cont')
+
+    resumed = CompileJournal(path, fingerprint="new")
+    assert resumed.load() == 1
+    assert resumed.done == {"rules/b": "h2"}
+
+
+def test_record_after_torn_line_survives_reload(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    with CompileJournal(path, fingerprint="fp") as journal:
+        journal.record(_encoded("m1", "h1"))
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"module_id": "m2", "cont')  # crashed mid-write
+
+    with CompileJournal(path, fingerprint="fp") as journal:
+        assert journal.load() == 1
+        journal.record(_encoded("m3", "h3"))
+
+    resumed = CompileJournal(path, fingerprint="fp")
+    assert resumed.load() == 2
+    assert resumed.done == {"m1": "h1", "m3": "h3"}
+
+
+def test_reset_and_remove(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CompileJournal(str(path), fingerprint="fp")
+    journal.record(_encoded("rules/a", "h1"))
+    journal.reset()
+    assert not path.exists()
+    assert journal.done == {}
+
+    journal.record(_encoded("rules/b", "h2"))
+    journal.remove()
+    assert not path.exists()
@@ -0,0 +1,44 @@
+"""Tests for the columnar binary index manifest."""
+
+from src.compiler.indexer import IndexEntry
+from src.compiler.manifest import BinaryManifest, write_binary_manifest
+
+ENTRIES = [
+    IndexEntry("skills/a", "A", "skill", "first", 10, "h1"),
+    IndexEntry("rules/common--b", "Bé", "rule", "", 0, "h2"),
+    IndexEntry("agents/c", "", "agent", "ünïcode ✓ text", 7, ""),
+]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "manifest.bin")
+    write_binary_manifest(path, ENTRIES, embedding_dim=16)
+    manifest = BinaryManifest(path, IndexEntry)
+
+    assert len(manifest) == 3
+    assert manifest.embedding_dim == 16
+    assert list(manifest) == ENTRIES
+    assert manifest[-1] == ENTRIES[-1]
+    assert manifest[1:] == ENTRIES[1:]
+    assert manifest.column("module_id") == [e.module_id for e in ENTRIES]
+    assert manifest.column("description") == [e.description for e in ENTRIES]
+    assert manifest.column("module_type") == ["skill", "rule", "agent"]
+    assert manifest.column("token_count") == [10, 0, 7]
+
+
+def test_entries_built_lazily_and_cached(tmp_path):
+    path = str(tmp_path / "manifest.bin")
+    write_binary_manifest(path, ENTRIES, embedding_dim=16)
+    manifest = BinaryManifest(path, IndexEntry)
+
+    assert manifest._cache == {}
+    assert manifest[2] is manifest[2]
+    assert set(manifest._cache) == {2}
+
+
+def test_empty_manifest(tmp_path):
+    path = str(tmp_path / "manifest.bin")
+    write_binary_manifest(path, [], embedding_dim=0)
+    manifest = BinaryManifest(path, IndexEntry)
+    assert len(manifest) == 0
+    assert manifest.column("module_id") == []
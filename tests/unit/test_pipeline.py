@@ -0,0 +1,118 @@
+"""Tests for the streaming compile pipeline."""
+
+import filecmp
+import os
+import threading
+
+import pytest
+
+from src.benchmarks.tiny_model import build_tiny_wrapper
+from src.compiler.encoder import LatentEncoder
+from src.compiler.pipeline import CompilePipeline
+from src.compiler.runner import compile_modules
+from src.shared.types import ParsedModule
+
+
+def _make_module(module_id: str, content: str) -> ParsedModule:
+    return ParsedModule(
+        module_id=module_id,
+        module_type="rule",
+        name=module_id.split("/")[-1],
+        description=f"About {module_id}",
+        content=content,
+        source_path="/tmp/test.md",
+    )
+
+
+def _modules():
+    return [
+        _make_module(f"rules/common--r{i}", f"Rule {i}: " + "avoid shared state. " * (i + 1))
+        for i in range(7)
+    ]
+
+
+def _tree_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(d, f), root)
+        for d, _, files in os.walk(root)
+        for f in files
+    )
+
+
+@pytest.fixture(scope="module")
+def encoder():
+    return LatentEncoder(build_tiny_wrapper())
+
+
+def test_pipeline_matches_compile_modules(tmp_path, encoder):
+    """Streaming output is byte-identical to the synchronous loop."""
+    modules = _modules()
+    serial_dir = str(tmp_path / "serial")
+    compile_modules(encoder, modules, serial_dir, batch_size=2)
+
+    stream_dir = str(tmp_path / "stream")
+    pipeline = CompilePipeline(
+        lambda: encoder, stream_dir, batch_size=2, writer_threads=3, queue_size=2
+    )
+    progress = []
+    result = pipeline.run(iter(modules), on_progress=progress.append)
+
+    assert not result.failed
+    assert sorted(e.module_id for e in result.compiled) == [m.module_id for m in modules]
+    assert sum(progress) == len(modules)
+    assert pipeline.stats["scan"].items == len(modules)
+    assert pipeline.stats["write"].items == len(modules)
+
+    files = _tree_files(serial_dir)
+    assert files == _tree_files(stream_dir)
+    _, mismatch, errors = filecmp.cmpfiles(serial_dir, stream_dir, files, shallow=False)
+    assert mismatch == [] and errors == []
+
+
+def test_pipeline_empty_source_never_builds_encoder(tmp_path):
+    def factory():
+        raise AssertionError("encoder should not be built")
+
+    pipeline = CompilePipeline(factory, str(tmp_path))
+    result = pipeline.run(iter([]))
+
+    assert result.compiled == [] and result.failed == []
+
+
+def test_pipeline_surfaces_scan_errors(tmp_path, encoder):
+    def source():
+        yield _make_module("rules/ok", "fine")
+        raise OSError("disk went away")
+
+    pipeline = CompilePipeline(lambda: encoder, str(tmp_path))
+    with pytest.raises(OSError, match="disk went away"):
+        pipeline.run(source())
+
+
+def test_pipeline_surfaces_encoder_errors_without_hanging(tmp_path):
+    def factory():
+        raise RuntimeError("model failed to load")
+
+    scanned = []
+
+    def source():
+        for i in range(100):
+            scanned.append(i)
+            yield _make_module(f"rules/r{i}", "text")
+
+    errors = []
+
+    def run():
+        pipeline = CompilePipeline(factory, str(tmp_path), queue_size=4)
+        try:
+            pipeline.run(source())
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive(), "pipeline hung after the encoder failed"
+    assert [str(e) for e in errors] == ["model failed to load"]
+    assert len(scanned) < 100  # the scanner stopped early
@@ -0,0 +1,96 @@
+"""Tests for the shared system-prompt prefix KV cache."""
+
+import pytest
+import torch
+
+from src.adapter.chat_template import build_intent_query_prompt, build_rule_encoding_prompt
+from src.benchmarks.tiny_model import build_tiny_wrapper
+
+
+@pytest.fixture(scope="module")
+def wrapper():
+    return build_tiny_wrapper()
+
+
+def _uncached(wrapper, fn, *args):
+    wrapper.use_prefix_cache = False
+    try:
+        return fn(*args)
+    finally:
+        wrapper.use_prefix_cache = True
+
+
+def test_prefix_covers_shared_system_preamble(wrapper):
+    prefix = wrapper._get_prefix_cache()
+    assert prefix is not None
+    text = wrapper.tokenizer.decode(prefix.input_ids)
+    assert text.startswith("<|im_start|>system\nYou are a code assistant")
+    assert "query" not in text
+
+
+def test_encode_text_matches_uncached(wrapper):
+    messages = build_intent_query_prompt("implement debounced search")
+    mean, layers = wrapper.encode_text(messages)
+    ref_mean, ref_layers = _uncached(wrapper, wrapper.encode_text, messages)
+
+    assert torch.allclose(mean, ref_mean, atol=1e-5)
+    assert torch.allclose(layers, ref_layers, atol=1e-5)
+    assert wrapper.verify_prefix_cache(messages) < 1e-4
+
+
+def test_generate_latent_steps_matches_uncached(wrapper):
+    messages = build_rule_encoding_prompt("skill", "tdd", "Write the test first.")
+    mean, layers, trajectory, _ = wrapper.generate_latent_steps(messages, n_steps=3)
+    ref_mean, ref_layers, ref_trajectory, _ = _uncached(
+        wrapper, wrapper.generate_latent_steps, messages, 3
+    )
+
+    assert torch.allclose(layers, ref_layers, atol=1e-5)
+    assert torch.allclose(trajectory, ref_trajectory, atol=1e-5)
+    assert torch.allclose(mean, ref_mean, atol=1e-5)
+
+
+def test_batched_latent_steps_with_prefix_matches_uncached(wrapper):
+    batch = [
+        build_rule_encoding_prompt("rule", "short", "Tabs."),
+        build_rule_encoding_prompt("agent", "planner", "Break work into small steps. " * 3),
+    ]
+    results = wrapper.generate_latent_steps_batch(batch, n_steps=3)
+    for messages, (mean, layers, trajectory) in zip(batch, results):
+        _, ref_layers, ref_trajectory, _ = _uncached(
+            wrapper, wrapper.generate_latent_steps, messages, 3
+        )
+        assert torch.allclose(layers, ref_layers, atol=1e-4)
+        assert torch.allclose(trajectory, ref_trajectory, atol=1e-4)
+
+
+@pytest.mark.parametrize("use_prefix_cache", [True, False])
+def test_encode_text_batch_matches_single(wrapper, use_prefix_cache):
+    batch = [
+        build_intent_query_prompt("auth"),
+        build_intent_query_prompt("design a rate limiter for the public API " * 3),
+        build_intent_query_prompt("tdd"),
+    ]
+    wrapper.use_prefix_cache = use_prefix_cache
+    try:
+        results = wrapper.encode_text_batch(batch)
+        for messages, (mean, layers) in zip(batch, results):
+            ref_mean, ref_layers = wrapper.encode_text(messages)
+            assert torch.allclose(mean.float(), ref_mean.float(), atol=1e-4)
+            assert torch.allclose(layers, ref_layers, atol=1e-4)
+    finally:
+        wrapper.use_prefix_cache = True
+
+
+def test_prefix_cache_not_mutated_by_use(wrapper):
+    prefix = wrapper._get_prefix_cache()
+    keys_before = [k.clone() for k, _ in prefix.layers]
+    messages = build_intent_query_prompt("refactor the session manager")
+
+    first = wrapper.encode_text(messages)[0]
+    wrapper.generate_latent_steps(messages, n_steps=2)
+    second = wrapper.encode_text(messages)[0]
+
+    assert torch.equal(first, second)
+    for before, (after, _) in zip(keys_before, prefix.layers):
+        assert torch.equal(before, after)
@@ -1,8 +1,16 @@
 """Tests for realignment matrix computation."""
 
+import os
+
 import torch
 
-from src.adapter.realignment import apply_realignment, compute_realignment_matrix
+from src.adapter import realignment
+from src.adapter.realignment import (
+    apply_realignment,
+    compute_realignment_matrix,
+    load_or_compute_realignment,
+    weight_checksum,
+)
 
 
 def test_compute_realignment_tied_weights():
@@ -75,3 +83,59 @@ def test_apply_realignment_dtype_preserved():
 
     out = apply_realignment(hidden, M, target_norm=1.0)
     assert out.dtype == torch.float32
+
+
+def test_tied_weights_take_identity_fast_path():
+    """Shared embedding storage skips the solve and returns exactly I."""
+    W = torch.randn(100, 32)
+    M, target_norm = compute_realignment_matrix(W, W)
+    assert torch.equal(M, torch.eye(32))
+    assert target_norm > 0
+
+
+def test_realignment_cache_roundtrip(tmp_path, monkeypatch):
+    """A second load reads the cached matrix instead of solving again."""
+    W_in, W_out = torch.randn(100, 32), torch.randn(100, 32)
+    M, norm = load_or_compute_realignment(W_in, W_out, "org/model", cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("realignment should come from the cache")
+
+    monkeypatch.setattr(realignment, "compute_realignment_matrix", fail)
+    cached_M, cached_norm = load_or_compute_realignment(
+        W_in, W_out, "org/model", cache_dir=str(tmp_path)
+    )
+    assert torch.equal(cached_M, M)
+    assert cached_norm == norm
+
+
+def test_realignment_cache_keyed_by_weights_and_lambda(tmp_path):
+    W_in, W_out = torch.randn(100, 32), torch.randn(100, 32)
+    load_or_compute_realignment(W_in, W_out, "org/model", cache_dir=str(tmp_path))
+    load_or_compute_realignment(
+        W_in, W_out, "org/model", cache_dir=str(tmp_path), reg_lambda=1e-2
+    )
+    changed = W_out.clone()
+    changed[7, 3] += 1.0
+    assert weight_checksum(W_in, changed) != weight_checksum(W_in, W_out)
+    load_or_compute_realignment(W_in, changed, "org/model", cache_dir=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_realignment_cache_recovers_from_corrupt_file(tmp_path):
+    W_in, W_out = torch.randn(100, 32), torch.randn(100, 32)
+    M, _ = load_or_compute_realignment(W_in, W_out, "org/model", cache_dir=str(tmp_path))
+    (path,) = tmp_path.iterdir()
+    path.write_bytes(b"not a safetensors file")
+
+    recomputed, _ = load_or_compute_realignment(
+        W_in, W_out, "org/model", cache_dir=str(tmp_path)
+    )
+    assert torch.allclose(recomputed, M)
+
+
+def test_tied_weights_are_not_cached(tmp_path):
+    W = torch.randn(100, 32)
+    load_or_compute_realignment(W, W, "org/model", cache_dir=str(tmp_path))
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,158 @@
+"""Tests for the in-process and sharded compile loops."""
+
+import filecmp
+import functools
+import os
+
+from src.benchmarks.tiny_model import build_tiny_wrapper
+from src.compiler import cli
+from src.compiler.cli import _rebuild_index_from_encoded
+from src.compiler.encoder import LatentEncoder
+from src.compiler.journal import CompileJournal
+from src.compiler.runner import compile_modules, compile_sharded
+from src.shared.types import ParsedModule
+
+
+def _make_module(module_id: str, content: str) -> ParsedModule:
+    return ParsedModule(
+        module_id=module_id,
+        module_type="rule",
+        name=module_id.split("/")[-1],
+        description=f"About {module_id}",
+        content=content,
+        source_path="/tmp/test.md",
+    )
+
+
+def _modules():
+    return [
+        _make_module(f"rules/common--r{i}", f"Rule {i}: " + "keep functions small. " * (i + 1))
+        for i in range(6)
+    ]
+
+
+def _tree_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(d, f), root)
+        for d, _, files in os.walk(root)
+        for f in files
+    )
+
+
+def test_compile_modules_shards_cover_all_batches(tmp_path):
+    modules = _modules()
+    encoder = LatentEncoder(build_tiny_wrapper())
+    shard_ids = [
+        {e.module_id for e in compile_modules(
+            encoder, modules, str(tmp_path), batch_size=2, shard=(i, 2)
+        ).compiled}
+        for i in range(2)
+    ]
+    assert shard_ids[0].isdisjoint(shard_ids[1])
+    assert shard_ids[0] | shard_ids[1] == {m.module_id for m in modules}
+
+
+def test_sharded_output_byte_identical_to_serial(tmp_path):
+    """Worker processes must produce exactly the same files as compile_modules()."""
+    modules = _modules()
+
+    serial_tensors = str(tmp_path / "serial" / "tensors")
+    serial_index = str(tmp_path / "serial" / "index")
+    serial = compile_modules(
+        LatentEncoder(build_tiny_wrapper()), modules, serial_tensors, batch_size=2
+    )
+    _rebuild_index_from_encoded(serial.compiled, modules, serial_tensors, serial_index, None)
+
+    sharded_tensors = str(tmp_path / "sharded" / "tensors")
+    sharded_index = str(tmp_path / "sharded" / "index")
+    sharded = compile_sharded(
+        modules,
+        sharded_tensors,
+        workers=2,
+        batch_size=2,
+        threads_per_worker=1,
+        wrapper_factory=build_tiny_wrapper,
+    )
+    _rebuild_index_from_encoded(sharded.compiled, modules, sharded_tensors, sharded_index, None)
+
+    assert not serial.failed and not sharded.failed
+    assert [e.module_id for e in sharded.compiled] == [m.module_id for m in modules]
+    for serial_root, sharded_root in (
+        (serial_tensors, sharded_tensors),
+        (serial_index, sharded_index),
+    ):
+        files = _tree_files(serial_root)
+        assert files == _tree_files(sharded_root)
+        _, mismatch, errors = filecmp.cmpfiles(serial_root, sharded_root, files, shallow=False)
+        assert mismatch == [] and errors == []
+
+
+def test_sharded_worker_failure_reports_modules(tmp_path):
+    modules = _modules()[:2]
+    result = compile_sharded(
+        modules,
+        str(tmp_path),
+        workers=2,
+        wrapper_factory=_broken_factory,
+    )
+    assert sorted(mid for mid, _ in result.failed) == sorted(m.module_id for m in modules)
+    assert result.compiled == []
+
+
+def _broken_factory():
+    raise RuntimeError("no model")
+
+
+def test_cli_serial_and_sharded_builds_are_byte_identical(tmp_path, monkeypatch):
+    """main() streams single-process builds and shards --workers builds."""
+    repo = tmp_path / "repo"
+    for i in range(19):  # several bucketing windows at --batch-size 2
+        path = repo / ("agents" if i % 2 else "rules/common") / f"m{i}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = f"Module {i}. " + "Check inputs first. " * ((7 * i) % 11 + 1)
+        path.write_text(text, encoding="utf-8")
+    monkeypatch.setattr(cli, "AdaptedModelWrapper", build_tiny_wrapper)
+    sharded_tiny = functools.partial(compile_sharded, wrapper_factory=build_tiny_wrapper)
+    monkeypatch.setattr(cli, "compile_sharded", sharded_tiny)
+
+    def build(name, *extra):
+        out = tmp_path / name
+        argv = [
+            "--repo-root", str(repo),
+            "--output", str(out / "tensors"),
+            "--index-dir", str(out / "index"),
+            "--cache-dir", str(out / "cache"),
+            "--batch-size", "2",
+            *extra,
+        ]
+        assert cli.main(argv) == 0
+        return out
+
+    serial = build("serial")
+    sharded = build("sharded", "--workers", "2", "--threads-per-worker", "1")
+
+    files = _tree_files(serial / "tensors")
+    assert len(files) == 19 and files == _tree_files(sharded / "tensors")
+    _, mismatch, errors = filecmp.cmpfiles(
+        serial / "tensors", sharded / "tensors", files, shallow=False
+    )
+    assert mismatch == [] and errors == []
+    index_files = ["manifest.json", "embeddings.npy"]
+    _, mismatch, errors = filecmp.cmpfiles(
+        serial / "index", sharded / "index", index_files, shallow=False
+    )
+    assert mismatch == [] and errors == []
+
+
+def test_compile_modules_journals_saved_modules(tmp_path):
+    modules = _modules()
+    journal = CompileJournal(str(tmp_path / "journal.jsonl"), fingerprint="fp")
+    compile_modules(
+        LatentEncoder(build_tiny_wrapper()), modules, str(tmp_path / "t"),
+        batch_size=2, journal=journal,
+    )
+    journal.close()
+
+    resumed = CompileJournal(journal.path, fingerprint="fp")
+    assert resumed.load() == len(modules)
+    assert all(resumed.is_done(m) for m in modules)
@@ -0,0 +1,111 @@
+"""Tests for the stat-based incremental scan cache."""
+
+import os
+
+from src.compiler import scan_cache
+from src.compiler.scan_cache import ScanCache
+from src.compiler.scanner import iter_repository, scan_repository
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _make_repo(root):
+    _write(root / "agents" / "planner.md", "---\nname: planner\ndescription: Plans\n---\nPlan first.\n")
+    _write(root / "rules" / "common" / "style.md", "Use clear names.\n")
+    _write(root / "commands" / "review.md", "Review the diff.\n")
+
+
+def test_cached_scan_matches_full_scan(tmp_path):
+    repo = tmp_path / "repo"
+    _make_repo(repo)
+    cache = ScanCache(str(tmp_path / "scan_cache.json"))
+
+    first = cache.scan(repo)
+    assert cache.stats["parsed"] == 3
+    second = ScanCache(cache.cache_file).scan(repo)
+
+    expected = scan_repository(repo)
+    assert first == expected
+    assert second == expected
+
+
+def test_only_changed_files_are_reparsed(tmp_path):
+    repo = tmp_path / "repo"
+    _make_repo(repo)
+    cache = ScanCache(str(tmp_path / "scan_cache.json"))
+    cache.scan(repo)
+
+    style = repo / "rules" / "common" / "style.md"
+    style.write_text("Use clear, descriptive names.\n", encoding="utf-8")
+    os.utime(style, ns=(1, 1))
+    (repo / "commands" / "review.md").unlink()
+
+    modules = cache.scan(repo)
+    assert cache.stats == {"reused": 1, "parsed": 1, "removed": 1}
+    by_id = {m.module_id: m for m in modules}
+    assert set(by_id) == {"agents/planner", "rules/common--style"}
+    assert by_id["rules/common--style"].content == "Use clear, descriptive names."
+
+    cache.scan(repo)
+    assert cache.stats == {"reused": 2, "parsed": 0, "removed": 0}
+
+
+def test_unwritable_cache_still_returns_modules(tmp_path):
+    repo = tmp_path / "repo"
+    _make_repo(repo)
+    # The cache's parent is a file, so the cache can never be written
+    blocker = tmp_path / "blocker"
+    blocker.write_text("", encoding="utf-8")
+
+    modules = ScanCache(str(blocker / "scan_cache.json")).scan(repo)
+    assert modules == scan_repository(repo)
+    assert not any(p.name.endswith(".tmp") for p in tmp_path.iterdir())
+
+
+def test_iter_scan_streams_in_discovery_order(tmp_path):
+    repo = tmp_path / "repo"
+    _make_repo(repo)
+    cache_file = str(tmp_path / "scan_cache.json")
+
+    cache = ScanCache(cache_file)
+    stream = cache.iter_scan(repo)
+    first = next(stream)
+    # Lazy: later files are not parsed until the consumer asks for them
+    assert cache.stats["parsed"] == 1
+    streamed = [first, *stream]
+    assert streamed == list(iter_repository(repo))
+    assert cache.stats == {"reused": 0, "parsed": 3, "removed": 0}
+
+    # The completed walk saved the cache; the next stream only reuses it
+    cached = ScanCache(cache_file)
+    assert list(iter_repository(repo, cache_file=cache_file)) == streamed
+    assert list(cached.iter_scan(repo)) == streamed
+    assert cached.stats == {"reused": 3, "parsed": 0, "removed": 0}
+
+
+def test_yaml_values_match_between_cold_and_warm_scans(tmp_path):
+    repo = tmp_path / "repo"
+    text = "---\nname: dated\nupdated: 2024-05-01\ntags: [a, 1]\n---\nBody.\n"
+    _write(repo / "agents" / "dated.md", text)
+    cache_file = str(tmp_path / "scan_cache.json")
+
+    cold = ScanCache(cache_file).scan(repo)
+    warm = ScanCache(cache_file).scan(repo)
+    assert cold == warm
+    assert warm[0].metadata == {"name": "dated", "updated": "2024-05-01", "tags": ["a", 1]}
+    assert list(ScanCache(cache_file).iter_scan(repo)) == warm
+
+
+def test_iter_scan_parses_changed_files_in_a_pool(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    for i in range(6):
+        _write(repo / "commands" / f"c{i}.md", f"Command {i}.\n")
+    monkeypatch.setattr(scan_cache, "PROCESS_POOL_MIN_FILES", 2)
+    monkeypatch.setattr(scan_cache, "READAHEAD_FILES", 3)
+
+    cache = ScanCache(str(tmp_path / "scan_cache.json"), max_workers=2)
+    assert list(cache.iter_scan(repo)) == list(iter_repository(repo))
+    assert cache.stats == {"reused": 0, "parsed": 6, "removed": 0}
@@ -2,7 +2,7 @@
 
 from pathlib import Path
 
-from src.compiler.scanner import scan_repository
+from src.compiler.scanner import iter_repository, scan_repository
 
 
 def test_scan_everything_claude_code():
@@ -46,3 +46,18 @@ def test_modules_sorted_by_id():
     modules = scan_repository(repo_root)
     ids = [m.module_id for m in modules]
     assert ids == sorted(ids)
+
+
+def test_iter_repository_streams_same_modules(tmp_path):
+    """iter_repository yields the same modules scan_repository returns."""
+    (tmp_path / "agents").mkdir()
+    (tmp_path / "agents" / "b.md").write_text("---\nname: b\n---\nAgent B body.\n")
+    (tmp_path / "agents" / "a.md").write_text("---\nname: a\n---\nAgent A body.\n")
+    (tmp_path / "commands").mkdir()
+    (tmp_path / "commands" / "plan.md").write_text("Plan the work.\n")
+
+    streamed = list(iter_repository(tmp_path))
+    scanned = scan_repository(tmp_path)
+
+    assert sorted(m.module_id for m in streamed) == [m.module_id for m in scanned]
+    assert {m.module_type for m in streamed} == {"agent", "command"}
@@ -0,0 +1,73 @@
+"""Tests for the near-duplicate intent cache."""
+
+import numpy as np
+
+from src.gateway.semantic_cache import SemanticIntentCache
+
+VECTOR = np.ones(4, dtype=np.float32) / 2
+
+
+def test_reuses_near_duplicate_intents():
+    cache = SemanticIntentCache(overlap_threshold=0.6, cosine_threshold=0.7)
+    cache.add("add rate limiting to the api", ["a", "b", "c", "d"], VECTOR)
+
+    hit = cache.lookup("add rate limiting to our api", ["a", "b", "c", "e"])
+    assert hit is not None
+    assert hit.intent == "add rate limiting to the api"
+    assert hit.vector is VECTOR
+    assert hit.overlap == 0.6
+    assert 0.7 <= hit.cosine < 1.0
+
+    # Same candidates, different wording / same wording, different candidates
+    assert cache.lookup("write a database migration", ["a", "b", "c", "d"]) is None
+    assert cache.lookup("add rate limiting to the api", ["a", "x", "y", "z"]) is None
+    assert cache.lookup("add rate limiting to the api", []) is None
+
+    stats = cache.stats()
+    assert stats["lookups"] == 4
+    assert stats["hits"] == 1
+    assert stats["hit_rate"] == 0.25
+    assert stats["overlap_threshold"] == 0.6
+    assert stats["cosine_threshold"] == 0.7
+
+
+def test_prefers_the_closest_entry():
+    cache = SemanticIntentCache(overlap_threshold=0.5, cosine_threshold=0.5)
+    cache.add("review auth code", ["a", "b", "c", "d"], np.zeros(4))
+    cache.add("review the auth code", ["a", "b", "c", "e"], VECTOR)
+    hit = cache.lookup("review the auth code please", ["a", "b", "c", "e"])
+    assert hit.intent == "review the auth code"
+
+
+def test_lru_eviction_drops_candidate_postings():
+    cache = SemanticIntentCache(max_entries=2, overlap_threshold=1.0, cosine_threshold=1.0)
+    cache.add("first", ["a"], VECTOR)
+    cache.add("second", ["b"], VECTOR)
+    assert cache.lookup("first", ["a"]) is not None  # first is now most recent
+    cache.add("third", ["c"], VECTOR)
+
+    assert len(cache) == 2
+    assert cache.lookup("second", ["b"]) is None
+    assert cache.lookup("first", ["a"]) is not None
+    assert "b" not in cache._by_candidate
+
+    # Re-adding an intent replaces its postings
+    cache.add("first", ["d"], VECTOR)
+    assert cache.lookup("first", ["a"]) is None
+    assert cache.lookup("first", ["d"]) is not None
+
+
+def test_audits():
+    cache = SemanticIntentCache(audit_rate=1.0, seed=0)
+    assert cache.should_audit()
+    assert not SemanticIntentCache(audit_rate=0.0).should_audit()
+
+    cache.record_audit(VECTOR, VECTOR, same_results=True)
+    other = np.array([0.5, 0.5, 0.5, -0.5], dtype=np.float32)
+    cache.record_audit(VECTOR, other, same_results=False)
+    stats = cache.stats()
+    assert stats["audits"] == 2
+    assert stats["false_reuses"] == 1
+    assert stats["false_reuse_rate"] == 0.5
+    assert stats["audit_vector_cosine_min"] == 0.5
+    assert stats["audit_vector_cosine_mean"] == 0.75
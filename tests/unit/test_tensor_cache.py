@@ -0,0 +1,114 @@
+"""Tests for lazy module tensors and the shared tensor LRU."""
+
+import torch
+
+import src.gateway.retriever as retriever_module
+from src.compiler.indexer import NumpyIndex
+from src.compiler.persistence import save_encoded_module
+from src.gateway.decoder import LatentDecoder
+from src.gateway.retriever import LatentRetriever
+from src.gateway.tensor_cache import TensorCache
+from src.shared.types import EncodedModule, LazyTensor, RetrievedModule
+
+
+def test_lru_is_bounded_by_bytes():
+    cache = TensorCache(max_bytes=100)
+    tensor = torch.zeros(10)  # 40 bytes
+    for key in ("a", "b"):
+        cache.get(key, lambda: tensor)
+    assert cache.get("a", lambda: None) is tensor  # a is now most recent
+    cache.get("c", lambda: tensor)
+
+    assert len(cache) == 2 and cache.bytes == 80
+    reloaded = torch.ones(10)
+    assert cache.get("b", lambda: reloaded) is reloaded  # b was evicted; now a is
+    cache.get("huge", lambda: torch.zeros(100))  # larger than the cache: not kept
+    stats = cache.stats()
+    assert stats["bytes"] <= 100
+    assert stats["hits"] == 1
+    assert stats["misses"] == 5
+    assert stats["evictions"] == 2
+
+
+def test_lazy_fields_load_once_on_access():
+    calls = []
+
+    def load():
+        calls.append(1)
+        return torch.ones(2)
+
+    module = RetrievedModule(
+        module_id="rules/a", name="a", module_type="rule", description="", score=1.0,
+        layer_states=LazyTensor(load), latent_trajectory=torch.zeros(1),
+    )
+    # repr() and == never load a lazy tensor
+    assert "layer_states" not in repr(module)
+    assert module == RetrievedModule("rules/a", "a", "rule", "", 1.0)
+    assert calls == []
+    assert torch.equal(module.layer_states, torch.ones(2))
+    assert module.layer_states is module.layer_states
+    assert calls == [1]
+    assert torch.equal(module.latent_trajectory, torch.zeros(1))
+    assert RetrievedModule("m", "m", "rule", "", 0.0).layer_states is None
+
+
+class _Wrapper:
+    model_name = "tiny"
+
+    def decode_from_latent(self, latent_embeddings, decode_messages, max_new_tokens):
+        return "dense"
+
+
+def _store(tmp_path, content_hash="v1"):
+    module = EncodedModule(
+        module_id="rules/a", module_type="rule", name="a", description="",
+        mean_embedding=torch.ones(4), layer_states=torch.zeros(2, 4),
+        latent_trajectory=torch.full((3, 4), 2.0), content_hash=content_hash,
+        token_count=10,
+    )
+    save_encoded_module(module, str(tmp_path))
+    index = NumpyIndex()
+    index.build([module])
+    return index
+
+
+def test_cache_hit_queries_do_no_file_io(tmp_path, monkeypatch):
+    loads = []
+    real_load = retriever_module.load_module_tensor
+
+    def counting_load(base_dir, module_id, tensor_name):
+        loads.append(tensor_name)
+        return real_load(base_dir, module_id, tensor_name)
+
+    monkeypatch.setattr(retriever_module, "load_module_tensor", counting_load)
+    retriever = LatentRetriever(_store(tmp_path), str(tmp_path))
+    decoder = LatentDecoder(_Wrapper())
+    query = torch.ones(4).numpy()
+
+    # Retrieval alone reads nothing; decoding reads only the trajectory
+    retrieved = retriever.retrieve(query)
+    assert loads == []
+    decoder.decode(retrieved, "get_rules")
+    assert loads == ["latent_trajectory"]
+
+    # Decode cache hit: no tensor is touched at all
+    decoder.decode(retriever.retrieve(query), "get_rules")
+    assert loads == ["latent_trajectory"]
+
+    # Decode cache miss, tensor cache hit: served from memory
+    decoder.clear_cache()
+    decoder.decode(retriever.retrieve(query), "get_rules")
+    module = retriever.retrieve_by_id("rules/a")
+    assert torch.equal(module.latent_trajectory, torch.full((3, 4), 2.0))
+    assert loads == ["latent_trajectory"]
+    stats = retriever.tensor_cache.stats()
+    assert stats["misses"] == 1 and stats["hits"] == 2
+    assert stats["bytes"] == 3 * 4 * 4
+
+    # A recompiled module (new content hash) is loaded afresh
+    recompiled = LatentRetriever(
+        _store(tmp_path, "v2"), str(tmp_path), tensor_cache=retriever.tensor_cache
+    )
+    trajectory = recompiled.retrieve(query)[0].latent_trajectory
+    assert torch.equal(trajectory, torch.full((3, 4), 2.0))
+    assert loads == ["latent_trajectory", "latent_trajectory"]
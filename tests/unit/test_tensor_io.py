@@ -52,3 +52,28 @@ def test_load_metadata_empty():
         save_tensors({"t": torch.zeros(5)}, path)
         meta = load_metadata(path)
         assert isinstance(meta, dict)
+
+
+def test_save_is_byte_deterministic():
+    """Metadata key order must not leak into the file bytes."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tensors = {"a": torch.arange(6.0), "b": torch.ones(2, 3)}
+        first = os.path.join(tmpdir, "first.safetensors")
+        second = os.path.join(tmpdir, "second.safetensors")
+        save_tensors(tensors, first, metadata={"x": "1", "y": "2", "z": "é"})
+        save_tensors(tensors, second, metadata={"z": "é", "y": "2", "x": "1"})
+
+        with open(first, "rb") as f1, open(second, "rb") as f2:
+            assert f1.read() == f2.read()
+        assert load_metadata(first) == {"x": "1", "y": "2", "z": "é"}
+        assert torch.equal(load_tensor(first, "b"), tensors["b"])
+
+
+def test_save_leaves_no_temp_files():
+    """Writes go through a temp file that is renamed into place."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "atomic.safetensors")
+        save_tensors({"t": torch.zeros(5)}, path)
+        save_tensors({"t": torch.ones(5)}, path)
+        assert os.listdir(tmpdir) == ["atomic.safetensors"]
+        assert torch.equal(load_tensor(path, "t"), torch.ones(5))
@@ -0,0 +1,116 @@
+"""Tests for the packed tensor store and its per-file converters."""
+
+import os
+
+import torch
+
+from src.compiler.persistence import (
+    delete_module,
+    list_compiled_modules,
+    load_module_all,
+    load_module_metadata,
+    load_module_tensor,
+    load_module_tensors,
+    pack_tensor_dir,
+    save_encoded_module,
+    unpack_tensor_dir,
+)
+from src.shared.tensor_pack import TABLE_FILENAME, PackedTensorStore, write_pack
+from src.shared.types import EncodedModule
+
+
+def _encoded(module_id: str, seed: int, dtype=torch.float32) -> EncodedModule:
+    gen = torch.Generator().manual_seed(seed)
+    return EncodedModule(
+        module_id=module_id,
+        module_type=module_id.split("/")[0].rstrip("s"),
+        name=module_id.split("/")[-1],
+        description=f"About {module_id}",
+        mean_embedding=torch.randn(16, generator=gen).to(dtype),
+        layer_states=torch.randn(3, 16, generator=gen).to(dtype),
+        latent_trajectory=torch.randn(2, 16, generator=gen).to(dtype),
+        content_hash=f"hash{seed}",
+        token_count=10 + seed,
+    )
+
+
+def _save_all(base_dir, modules):
+    for m in modules:
+        save_encoded_module(m, base_dir)
+
+
+def test_pack_roundtrip_is_zero_copy(tmp_path):
+    base = str(tmp_path)
+    modules = [_encoded("agents/a", 0), _encoded("rules/common--b", 1)]
+    _save_all(base, modules)
+
+    assert pack_tensor_dir(base) == 2
+    assert not list(tmp_path.rglob("*.safetensors"))
+    assert list_compiled_modules(base) == ["agents/a", "rules/common--b"]
+
+    for m in modules:
+        states = load_module_tensor(base, m.module_id, "layer_states")
+        assert torch.equal(states, m.layer_states)
+        _layer_states, trajectory = load_module_tensors(
+            base, m.module_id, ["layer_states", "latent_trajectory"]
+        )
+        assert torch.equal(trajectory, m.latent_trajectory)
+        assert load_module_metadata(base, m.module_id)["token_count"] == str(m.token_count)
+
+    # Two loads of the same tensor share the mapped pack memory
+    a = load_module_tensor(base, "agents/a", "mean_embedding")
+    b = load_module_tensor(base, "agents/a", "mean_embedding")
+    assert a.data_ptr() == b.data_ptr()
+
+
+def test_bfloat16_survives_pack(tmp_path):
+    base = str(tmp_path)
+    module = _encoded("skills/x", 2, dtype=torch.bfloat16)
+    _save_all(base, [module])
+    pack_tensor_dir(base)
+
+    loaded = load_module_all(base, "skills/x")
+    assert loaded["layer_states"].dtype == torch.bfloat16
+    assert torch.equal(loaded["layer_states"], module.layer_states)
+
+
+def test_write_after_pack_overrides_entry(tmp_path):
+    base = str(tmp_path)
+    _save_all(base, [_encoded("agents/a", 0), _encoded("agents/b", 1)])
+    pack_tensor_dir(base)
+
+    table_mtime = os.stat(tmp_path / TABLE_FILENAME).st_mtime_ns
+    updated = _encoded("agents/a", 5)
+    save_encoded_module(updated, base)
+    assert torch.equal(load_module_tensor(base, "agents/a", "layer_states"), updated.layer_states)
+    assert load_module_metadata(base, "agents/a")["content_hash"] == "hash5"
+    # The write leaves the offset table alone; the new file shadows the stale entry
+    assert "agents/a" in PackedTensorStore(base)
+    assert os.stat(tmp_path / TABLE_FILENAME).st_mtime_ns == table_mtime
+
+    assert delete_module(base, "agents/b")
+    assert list_compiled_modules(base) == ["agents/a"]
+
+    # Repacking folds the per-file write back in
+    assert pack_tensor_dir(base) == 1
+    assert torch.equal(load_module_tensor(base, "agents/a", "layer_states"), updated.layer_states)
+    assert len([f for f in os.listdir(base) if f.endswith(".pack")]) == 1
+
+
+def test_unpack_restores_per_file_layout(tmp_path):
+    base = str(tmp_path)
+    modules = [_encoded("agents/a", 0), _encoded("commands/plan", 1)]
+    _save_all(base, modules)
+    pack_tensor_dir(base)
+
+    assert unpack_tensor_dir(base) == 2
+    assert not (tmp_path / TABLE_FILENAME).exists()
+    assert sorted(p.name for p in tmp_path.rglob("*.safetensors")) == ["a.safetensors", "plan.safetensors"]
+    for m in modules:
+        assert torch.equal(load_module_tensor(base, m.module_id, "mean_embedding"), m.mean_embedding)
+
+
+def test_empty_pack(tmp_path):
+    write_pack(str(tmp_path), [])
+    store = PackedTensorStore(str(tmp_path))
+    assert store.module_ids() == []